@@ -0,0 +1,122 @@
+import math
+from collections import deque
+
+from timeseries import TimeSeries
+
+HOUR = 3600
+WINDOWS = (HOUR, 12 * HOUR)
+
+
+class RollingWindow:
+    # Okno przesuwne nad buforem TimeSeries z sumą, liczbą, min i max
+    # aktualizowanymi przyrostowo. Okno trzyma tylko pozycje [tail, head)
+    # w buforze; każdy odczyt raz do niego wchodzi i raz wychodzi, a min/max
+    # są w kolejkach monotonicznych - koszt zamortyzowany O(1) na odczyt.
+    # Kilka okien może dzielić jeden bufor (każdy odczyt zapisany tylko raz).
+    def __init__(self, span: float, series: TimeSeries = None):
+        self.span = span
+        self._owns_series = series is None
+        self.series = TimeSeries(span) if series is None else series
+        self._tail = self._head = self.series.end
+        self._min = deque()
+        self._max = deque()
+        self._count = 0
+        self._total = 0.0
+
+    def add(self, timestamp: float, value: float) -> None:
+        self.series.append(timestamp, value)
+
+    def expire(self, now: float) -> None:
+        self._catch_up()
+        series = self.series
+        new_tail = series.first_at_or_after(now - self.span, self._tail, self._head)
+        if new_tail > self._tail:
+            self._count -= new_tail - self._tail
+            self._total -= float(series.values_between(self._tail, new_tail).sum())
+            self._tail = new_tail
+            while self._min and self._min[0][0] < new_tail:
+                self._min.popleft()
+            while self._max and self._max[0][0] < new_tail:
+                self._max.popleft()
+        if not self._count:
+            # zerujemy, żeby błędy zaokrągleń z odejmowania się nie kumulowały
+            self._total = 0.0
+        if self._owns_series:
+            series.expire(now)
+
+    @property
+    def count(self) -> int:
+        self._catch_up()
+        return self._count
+
+    @property
+    def total(self) -> float:
+        self._catch_up()
+        return self._total
+
+    @property
+    def mean(self):
+        self._catch_up()
+        return self._total / self._count if self._count else None
+
+    @property
+    def min(self):
+        self._catch_up()
+        return self._min[0][1] if self._min else None
+
+    @property
+    def max(self):
+        self._catch_up()
+        return self._max[0][1] if self._max else None
+
+    def _catch_up(self) -> None:
+        series = self.series
+        if self._tail < series.start:
+            # ktoś usunął z bufora odczyty, których okno jeszcze nie zdjęło
+            self._tail = self._head = series.start
+            self._min.clear()
+            self._max.clear()
+            self._count = 0
+            self._total = 0.0
+        if self._head == series.end:
+            return
+        values = series.values_between(self._head, series.end)
+        self._count += len(values)
+        self._total += float(values.sum())
+        position = self._head
+        for value in values.tolist():
+            while self._min and self._min[-1][1] > value:
+                self._min.pop()
+            self._min.append((position, value))
+            while self._max and self._max[-1][1] < value:
+                self._max.pop()
+            self._max.append((position, value))
+            position += 1
+        self._head = series.end
+
+
+class SensorAggregate:
+    def __init__(self, windows=WINDOWS, series: TimeSeries = None):
+        self.last_timestamp = None
+        self.last_value = None
+        self.unit = None
+        # Historia jest trzymana tak długo, jak najdłuższe okno
+        self.series = TimeSeries(max(windows)) if series is None else series
+        self.windows = {span: RollingWindow(span, self.series) for span in windows}
+
+    def add(self, timestamp: float, value, unit) -> None:
+        self.last_timestamp = timestamp
+        self.last_value = value
+        self.unit = unit
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or math.isnan(value):
+            return
+        self.series.unit = unit
+        self.series.append(timestamp, value)
+
+    def expire(self, now: float) -> None:
+        for window in self.windows.values():
+            window.expire(now)
+        self.series.expire(now)
+
+    def mean(self, span: float):
+        return self.windows[span].mean
@@ -0,0 +1,118 @@
+"""Benchmark archive formats: compressed CSV (per codec) vs Parquet.
+
+Compares compression ratio and throughput, full scan and filtered queries
+(one sensor, one hour) through Logger.read_logs, plus a columnar scan of the
+Parquet file.
+
+    python -m benchmarks.bench_archive --rows 500000 --sensors 20 --codecs deflate zstd parquet
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import columnar  # noqa: E402
+import compression  # noqa: E402
+from logger import Logger  # noqa: E402
+
+
+def write_csv(path, rows, sensors):
+    start = datetime(2025, 5, 13, 0, 0)
+    units = ["°C", "hPa", "lux", "AQI"]
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("timestamp,sensor_id,value,unit\n")
+        for i in range(rows):
+            sensor = i % sensors
+            timestamp = start + timedelta(milliseconds=100 * i)
+            f.write(f"{timestamp.isoformat()},Sensor-{sensor},{round(random.uniform(0, 1000), 1)},"
+                    f"{units[sensor % len(units)]}\n")
+    return start, start + timedelta(milliseconds=100 * rows)
+
+
+def make_logger(log_dir, codec, level):
+    config = {
+        "log_dir": log_dir,
+        "filename_pattern": "bench.csv",
+        "buffer_size": 100,
+        "archive_format": "parquet" if codec == "parquet" else "zip",
+        "archive_codec": "deflate" if codec == "parquet" else codec,
+        "archive_level": level,
+        "archive_workers": 0,
+    }
+    config_path = os.path.join(log_dir, "config.json")
+    with open(config_path, "w") as f:
+        json.dump(config, f)
+    return Logger(config_path)
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - started, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare archive codecs and Parquet")
+    parser.add_argument("--rows", type=int, default=500000)
+    parser.add_argument("--sensors", type=int, default=20)
+    parser.add_argument("--codecs", nargs="+", default=None,
+                        help="kodeki do porównania (domyślnie wszystkie dostępne + parquet)")
+    parser.add_argument("--level", type=int, default=None, help="poziom kompresji (domyślny kodeka)")
+    args = parser.parse_args(argv)
+    codecs = args.codecs
+    if codecs is None:
+        codecs = [c for c in compression.CODECS if c != "zstd" or compression.zstandard is not None]
+        if columnar.pa is not None:
+            codecs.append("parquet")
+
+    work_dir = tempfile.mkdtemp()
+    try:
+        source = os.path.join(work_dir, "source.csv")
+        start, end = write_csv(source, args.rows, args.sensors)
+        print(f"{args.rows} wierszy, {args.sensors} czujników, CSV {os.path.getsize(source) / 1e6:.1f} MB")
+        query_start = start + (end - start) / 2
+        query_end = query_start + timedelta(hours=1)
+
+        source_size = os.path.getsize(source)
+        for codec in codecs:
+            log_dir = os.path.join(work_dir, codec)
+            os.makedirs(log_dir)
+            logger = make_logger(log_dir, codec, args.level)
+            archive_dir = os.path.join(log_dir, "archive")
+            pending = os.path.join(archive_dir, "bench.csv")
+            shutil.copy(source, pending)
+
+            # kompresja + weryfikacja, tak jak w procesie roboczym przy rotacji
+            archive_time, _ = timed(lambda: logger._submit_archive(pending))
+            size = sum(os.path.getsize(os.path.join(archive_dir, name)) for name in os.listdir(archive_dir)
+                       if name.endswith(logger._archive_suffix()))
+            # pierwsze zapytanie zbuduje brakujące indeksy - nie wliczamy go
+            list(logger.read_logs(start, start))
+
+            scan_time, rows = timed(lambda: sum(1 for _ in logger.read_logs(start, end)))
+            filter_time, matched = timed(lambda: sum(
+                1 for _ in logger.read_logs(query_start, query_end, sensor_id="Sensor-3")))
+            print(f"{codec:8s} archiwum {size / 1e6:6.2f} MB, współczynnik {source_size / size:5.1f}x, "
+                  f"{source_size / 1e6 / archive_time:6.1f} MB/s, "
+                  f"pełny odczyt {rows} w {scan_time:.2f} s, "
+                  f"zapytanie 1 h/1 czujnik {matched} w {filter_time * 1000:.0f} ms")
+
+            if codec == "parquet":
+                path = os.path.join(archive_dir, "bench.csv" + columnar.PARQUET_SUFFIX)
+                column_time, table = timed(lambda: columnar.pq.read_table(path))
+                mean_time, _ = timed(lambda: columnar.pa.compute.mean(table.column("value")))
+                print(f"{'':8s} skan kolumnowy {len(table)} wierszy w {column_time * 1000:.0f} ms, "
+                      f"średnia w {mean_time * 1000:.1f} ms")
+    finally:
+        shutil.rmtree(work_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Benchmark the GUI sensor table model without a display.
+
+Simulates N sensors each sending readings at RATE Hz. Readings are pushed
+into ReadingCoalescer as the server thread would, and once per frame the
+model applies them, refreshes the 1h/12h means of its share of rows, and
+emits dataChanged for changed cells only. The "reset" variant re-formats
+every row and resets the model on each frame, which is what the old
+QTableWidget refresh amounted to.
+
+    python -m benchmarks.bench_gui_model --sensors 1000 --rate 50 --seconds 10
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gui.sensor_model import ReadingCoalescer, SensorTableModel  # noqa: E402
+
+
+def frames(sensors, rate, seconds, frame_ms):
+    # Odczyty każdej klatki w czasie symulowanym (bez czekania na zegar)
+    start = datetime.now() - timedelta(seconds=seconds)
+    per_frame = rate * frame_ms / 1000
+    carry = 0.0
+    for frame in range(int(seconds * 1000 / frame_ms)):
+        carry += per_frame
+        count, carry = int(carry), carry - int(carry)
+        base = start + timedelta(milliseconds=frame * frame_ms)
+        yield (base + timedelta(milliseconds=frame_ms)).timestamp(), [
+            {"sensor_id": f"Sensor-{sensor}", "timestamp": (base + timedelta(milliseconds=i * 1000 / rate)).isoformat(),
+             "value": round(random.uniform(0, 100), 1), "unit": "°C"}
+            for i in range(count) for sensor in range(sensors)
+        ]
+
+
+def run(args, reset):
+    model = SensorTableModel()
+    coalescer = ReadingCoalescer()
+    signals = [0]
+    model.dataChanged.connect(lambda *_: signals.__setitem__(0, signals[0] + 1))
+    add_time = apply_time = 0.0
+    frame_times = []
+    readings = 0
+    for frame, (now, batch) in enumerate(frames(args.sensors, args.rate, args.seconds, args.frame_ms)):
+        started = time.perf_counter()
+        for data in batch:
+            coalescer.add(data)
+        add_time += time.perf_counter() - started
+        readings += len(batch)
+
+        started = time.perf_counter()
+        model.apply(coalescer.drain())
+        if reset:
+            model.beginResetModel()
+            model._cells = [model._format(sensor_id) for sensor_id in model._sensors]
+            model.endResetModel()
+        else:
+            model.refresh(now, part=frame, parts=args.refresh_ms // args.frame_ms)
+        elapsed = time.perf_counter() - started
+        apply_time += elapsed
+        frame_times.append(elapsed)
+
+    frame_times.sort()
+    name = "reset" if reset else "diff"
+    print(f"{name:5s} {readings} odczytów w {len(frame_times)} klatkach: "
+          f"dodawanie {add_time / readings * 1e6:.2f} µs/odczyt, "
+          f"klatka średnio {apply_time / len(frame_times) * 1000:.1f} ms, "
+          f"p99 {frame_times[int(len(frame_times) * 0.99)] * 1000:.1f} ms, "
+          f"dataChanged {signals[0]}, zmienione komórki {model.changed_cells}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure SensorTableModel update cost")
+    parser.add_argument("--sensors", type=int, default=1000)
+    parser.add_argument("--rate", type=float, default=50, help="odczyty na sekundę na czujnik")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--frame-ms", type=int, default=100)
+    parser.add_argument("--refresh-ms", type=int, default=3000, help="co ile odświeżane są średnie każdego wiersza")
+    parser.add_argument("--reset", action="store_true", help="porównaj z pełnym resetem modelu w każdej klatce")
+    args = parser.parse_args(argv)
+    run(args, reset=False)
+    if args.reset:
+        run(args, reset=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""End-to-end benchmark: sensors -> SensorScheduler -> Logger -> network -> server.
+
+Every configuration runs in a fresh interpreter: N sensors from sensors.py
+are scheduled at RATE readings/s each, every reading goes through
+Logger.log_and_send (CSV on disk + ConnectionManager) to an IngestServer
+(the engine behind NetworkServer, without Qt) on localhost. The sweep is the
+product of --sensors, --rates, --buffer-sizes and --formats.
+
+Reported per configuration: delivered readings/s, end-to-end latency
+percentiles (sample time -> server callback), scheduler misses, CPU and RSS
+of the process, and bytes on disk per reading. Results go to a JSON file;
+--compare prints the change against an earlier results file.
+
+    python -m benchmarks.bench_pipeline --sensors 10 100 --rates 10 --formats json binary1 \\
+        --output results.json --compare baseline.json
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SENSOR_TYPES = ("TemperatureSensor", "PressureSensor", "LightSensor", "AirQualitySensor")
+
+
+def _rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def _disk_bytes(directory):
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(directory) for name in names)
+
+
+def run_one(config):
+    # Wykonywane w osobnym procesie (--run-one), żeby CPU i RSS dotyczyły jednej konfiguracji
+    import metrics
+    import sensors
+    from logger import Logger
+    from scheduler import SensorScheduler
+    from server.core import IngestServer
+
+    latency = metrics.Histogram()
+    received = [0]
+    last_received = [None]
+
+    def on_reading(data):
+        received[0] += 1
+        last_received[0] = time.perf_counter()
+        try:
+            latency.record(time.time() - datetime.fromisoformat(data["timestamp"]).timestamp())
+        except (KeyError, TypeError, ValueError):
+            pass
+
+    def on_batch(readings):
+        for data in readings:
+            on_reading(data)
+
+    server = IngestServer(config["port"])
+    server.new_data.connect(on_reading)
+    server.new_batch.connect(on_batch)
+    server.start()
+
+    log_dir = tempfile.mkdtemp(prefix="bench_pipeline_")
+    config_path = os.path.join(log_dir, "logger.json")
+    with open(config_path, "w") as f:
+        json.dump({
+            "log_dir": os.path.join(log_dir, "logs"),
+            "filename_pattern": "bench.csv",
+            "buffer_size": config["buffer_size"],
+            "max_size_mb": 1024,
+            "wire_format": config["format"],
+            "send_window": config["send_window"],
+            "send_batch_size": config["send_batch_size"],
+            "async_write": config["async_write"],
+        }, f)
+
+    try:
+        logger = Logger(config_path, "127.0.0.1", config["port"])
+        logger.start()
+        scheduler = SensorScheduler(config["dispatch"], config["workers"])
+        interval = 1.0 / config["rate"]
+        for i in range(config["sensors"]):
+            cls = getattr(sensors, SENSOR_TYPES[i % len(SENSOR_TYPES)])
+            sensor = cls(seed=i, name=f"{cls.__name__}-{i}")
+            sensor.register_callback(logger.log_and_send)
+            scheduler.add(sensor, interval, offset=interval * i / config["sensors"])
+
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        started = time.perf_counter()
+        scheduler.start()
+        time.sleep(config["duration"])
+        scheduler.stop()
+        sent = time.perf_counter()
+        logger.stop()
+        generated = scheduler.stats()["runs"]
+        # czekamy na ostatnie odczyty w drodze do serwera
+        deadline = time.monotonic() + 5
+        while received[0] < generated and time.monotonic() < deadline:
+            time.sleep(0.01)
+        end_usage = resource.getrusage(resource.RUSAGE_SELF)
+        # tempo liczone do ostatniego odczytu, który dotarł do serwera - bez czasu
+        # bezczynnego czekania powyżej (przy zgubionych odczytach to do 5 s)
+        elapsed = max(last_received[0] or sent, sent) - started
+        stats = scheduler.stats()
+        disk = _disk_bytes(os.path.join(log_dir, "logs"))
+    finally:
+        server.stop()
+        shutil.rmtree(log_dir, ignore_errors=True)
+
+    cpu = (end_usage.ru_utime - usage.ru_utime) + (end_usage.ru_stime - usage.ru_stime)
+    snapshot = latency.snapshot()
+    return {
+        "generated": generated,
+        "delivered": received[0],
+        "readings_per_s": received[0] / elapsed,
+        "missed": stats["missed"],
+        "latency_ms": {q: snapshot[q] * 1000 if snapshot[q] is not None else None
+                       for q in ("p50", "p90", "p99", "p999", "max")},
+        "cpu_percent": cpu / elapsed * 100,
+        "cpu_us_per_reading": cpu / generated * 1e6 if generated else None,
+        "rss_mb": _rss_mb(),
+        "max_rss_mb": end_usage.ru_maxrss / 1024,
+        "disk_bytes_per_reading": disk / generated if generated else None,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _key(config):
+    return (config["sensors"], config["rate"], config["buffer_size"], config["format"])
+
+
+def _print_row(config, result, baseline=None):
+    latency = result["latency_ms"]
+    line = (f"{config['sensors']:>7} {config['rate']:>6g} {config['buffer_size']:>7} {config['format']:>8} "
+            f"{result['readings_per_s']:>9.0f} {latency['p50'] or 0:>8.2f} {latency['p99'] or 0:>8.2f} "
+            f"{result['cpu_percent']:>6.0f} {result['rss_mb'] or 0:>7.1f} {result['disk_bytes_per_reading'] or 0:>8.1f}")
+    if baseline:
+        def change(new, old):
+            return f"{(new - old) / old * 100:+.0f}%" if new is not None and old else "n/a"
+        line += (f"   vs baseline: throughput {change(result['readings_per_s'], baseline['readings_per_s'])}, "
+                 f"p99 {change(latency['p99'], baseline['latency_ms']['p99'])}, "
+                 f"cpu/reading {change(result['cpu_us_per_reading'], baseline['cpu_us_per_reading'])}")
+    print(line, flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="End-to-end sensor -> logger -> server benchmark")
+    parser.add_argument("--sensors", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--rates", type=float, nargs="+", default=[1, 10], help="odczyty/s na czujnik")
+    parser.add_argument("--buffer-sizes", type=int, nargs="+", default=[1, 100])
+    parser.add_argument("--formats", nargs="+", default=["json", "binary1"])
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--dispatch", default="inline")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--send-window", type=int, default=64)
+    parser.add_argument("--send-batch-size", type=int, default=1)
+    parser.add_argument("--async-write", action="store_true")
+    parser.add_argument("--port", type=int, default=9300)
+    parser.add_argument("--output", default="bench_pipeline.json", help="plik JSON z wynikami")
+    parser.add_argument("--compare", help="wcześniejszy plik z wynikami do porównania")
+    parser.add_argument("--run-one", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run_one:
+        print(json.dumps(run_one(json.loads(args.run_one))))
+        return
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = {_key(entry["config"]): entry["result"] for entry in json.load(f)["results"]}
+
+    print(f"{'sensors':>7} {'rate':>6} {'buffer':>7} {'format':>8} {'readings/s':>9} {'p50 ms':>8} "
+          f"{'p99 ms':>8} {'cpu %':>6} {'rss MB':>7} {'B/read':>8}")
+    results = []
+    sweep = itertools.product(args.sensors, args.rates, args.buffer_sizes, args.formats)
+    for i, (sensors, rate, buffer_size, wire_format) in enumerate(sweep):
+        config = {
+            "sensors": sensors, "rate": rate, "buffer_size": buffer_size, "format": wire_format,
+            "duration": args.duration, "dispatch": args.dispatch, "workers": args.workers,
+            "send_window": args.send_window, "send_batch_size": args.send_batch_size,
+            "async_write": args.async_write, "port": args.port + i,
+        }
+        output = subprocess.run([sys.executable, "-m", "benchmarks.bench_pipeline", "--run-one", json.dumps(config)],
+                                cwd=ROOT, capture_output=True, text=True)
+        if output.returncode:
+            print(f"konfiguracja {config} nie powiodła się:\n{output.stderr}", file=sys.stderr)
+            continue
+        result = json.loads(output.stdout.strip().splitlines()[-1])
+        results.append({"config": config, "result": result})
+        _print_row(config, result, baseline.get(_key(config)))
+
+    with open(args.output, "w") as f:
+        json.dump({
+            "commit": _git_commit(),
+            "time": datetime.now().isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "results": results,
+        }, f, indent=1)
+    print(f"Wyniki zapisane w {args.output}")
+
+
+if __name__ == "__main__":
+    main()
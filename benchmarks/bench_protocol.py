@@ -0,0 +1,92 @@
+"""Benchmark wire formats: bytes per reading and server-side parse CPU per reading.
+
+    python -m benchmarks.bench_protocol --readings 200000 --batch 500
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from network.protocol import BinaryDecoder, BinaryEncoder  # noqa: E402
+
+SENSORS = [("TemperatureSensor", "°C"), ("PressureSensor", "hPa"),
+           ("LightSensor", "lux"), ("AirQualitySensor", "AQI")]
+
+
+def make_readings(n):
+    start = datetime(2025, 5, 13, 23, 0, 13, 227401)
+    readings = []
+    for i in range(n):
+        sensor_id, unit = SENSORS[i % len(SENSORS)]
+        readings.append({
+            "timestamp": (start + timedelta(milliseconds=100 * i)).isoformat(),
+            "sensor_id": sensor_id,
+            "value": round(random.uniform(0, 1000), 1),
+            "unit": unit
+        })
+    return readings
+
+
+def json_stream(readings, batch):
+    if batch <= 1:
+        return b"".join(json.dumps(r).encode() + b"\n" for r in readings)
+    return b"".join(json.dumps({"type": "batch", "readings": readings[i:i + batch]}).encode() + b"\n"
+                    for i in range(0, len(readings), batch))
+
+
+def binary_stream(readings, batch):
+    encoder = BinaryEncoder()
+    if batch <= 1:
+        return b"".join(encoder.encode(r) for r in readings)
+    return b"".join(encoder.encode({"type": "batch", "readings": readings[i:i + batch]})
+                    for i in range(0, len(readings), batch))
+
+
+def parse_json(stream, chunk=65536):
+    # To samo co serwer: linie JSON z bufora porcjami po `chunk` bajtów
+    count = 0
+    pending = b""
+    for i in range(0, len(stream), chunk):
+        *lines, pending = (pending + stream[i:i + chunk]).split(b"\n")
+        for line in lines:
+            message = json.loads(line)
+            count += len(message["readings"]) if message.get("type") == "batch" else 1
+    return count
+
+
+def parse_binary(stream, chunk=65536):
+    decoder = BinaryDecoder()
+    count = 0
+    for i in range(0, len(stream), chunk):
+        for _, message in decoder.feed(stream[i:i + chunk]):
+            count += len(message) if isinstance(message, list) else 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--readings", type=int, default=200000)
+    parser.add_argument("--batch", type=int, default=500)
+    args = parser.parse_args()
+
+    readings = make_readings(args.readings)
+    print(f"{'format':<16} {'bytes/reading':>14} {'parse us/reading':>17}")
+    for batch in (1, args.batch):
+        for name, encode, parse in (("json", json_stream, parse_json),
+                                    ("binary", binary_stream, parse_binary)):
+            stream = encode(readings, batch)
+            started = time.process_time()
+            assert parse(stream) == len(readings)
+            cpu = time.process_time() - started
+            label = name if batch <= 1 else f"{name} x{batch}"
+            print(f"{label:<16} {len(stream) / len(readings):>14.1f} "
+                  f"{cpu / len(readings) * 1e6:>17.2f}")
+
+
+if __name__ == "__main__":
+    main()
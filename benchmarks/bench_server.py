@@ -0,0 +1,118 @@
+"""Benchmark NetworkServer: messages/s and ACK latency for N concurrent clients.
+
+Every client keeps one message in flight (send, wait for ACK, send again).
+
+    python -m benchmarks.bench_server --connections 10 1000 5000 --duration 5
+"""
+import argparse
+import json
+import logging
+import os
+import resource
+import selectors
+import socket
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from server.server import NetworkServer  # noqa: E402
+
+
+def _percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def _raise_fd_limit(needed):
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < needed:
+        target = needed if hard == resource.RLIM_INFINITY else min(needed, hard)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+
+
+def run(port, connections, duration):
+    server = NetworkServer(port=port, max_connections=connections + 16)
+    server.start()
+    selector = selectors.DefaultSelector()
+    message = json.dumps({
+        "timestamp": "2025-05-13T23:00:13.227401",
+        "sensor_id": "TemperatureSensor",
+        "value": 10.5,
+        "unit": "°C"
+    }).encode() + b"\n"
+
+    clients = []
+    try:
+        for _ in range(connections):
+            sock = socket.create_connection(("127.0.0.1", port))
+            sock.setblocking(False)
+            state = {"sock": sock, "sent_at": 0.0, "pending": b""}
+            selector.register(sock, selectors.EVENT_READ, state)
+            clients.append(state)
+
+        latencies = []
+        received = 0
+        deadline = time.perf_counter() + duration
+        started = time.perf_counter()
+        for state in clients:
+            state["sent_at"] = time.perf_counter()
+            state["sock"].sendall(message)
+
+        while time.perf_counter() < deadline:
+            for key, _ in selector.select(timeout=0.5):
+                state = key.data
+                try:
+                    data = state["sock"].recv(4096)
+                except BlockingIOError:
+                    continue
+                if not data:
+                    selector.unregister(state["sock"])
+                    continue
+                state["pending"] += data
+                acks = state["pending"].count(b"\n")
+                if not acks:
+                    continue
+                state["pending"] = state["pending"].rsplit(b"\n", 1)[1]
+                now = time.perf_counter()
+                latencies.append(now - state["sent_at"])
+                received += acks
+                state["sent_at"] = now
+                state["sock"].sendall(message)
+        elapsed = time.perf_counter() - started
+    finally:
+        for state in clients:
+            state["sock"].close()
+        selector.close()
+        server.stop()
+
+    return {
+        "connections": connections,
+        "messages": received,
+        "msgs_per_s": received / elapsed,
+        "p50_ms": _percentile(latencies, 0.50) * 1000,
+        "p99_ms": _percentile(latencies, 0.99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--connections", type=int, nargs="+", default=[10, 1000, 5000])
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--port", type=int, default=9100)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    _raise_fd_limit(2 * max(args.connections) + 64)
+
+    print(f"{'conns':>6} {'messages':>10} {'msg/s':>10} {'p50 ms':>8} {'p99 ms':>8}")
+    for i, n in enumerate(args.connections):
+        result = run(args.port + i, n, args.duration)
+        print(f"{result['connections']:>6} {result['messages']:>10} {result['msgs_per_s']:>10.0f} "
+              f"{result['p50_ms']:>8.2f} {result['p99_ms']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
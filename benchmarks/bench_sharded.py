@@ -0,0 +1,96 @@
+"""Load test for multi-process ingestion (server.sharded).
+
+Starts ShardedIngestServer with each --workers count on the same port and
+drives it from --clients load processes. Every client opens --connections
+connections and keeps writing blocks of --block JSON readings per
+connection, waiting for the ACKs of a block before sending the next one.
+Reported per worker count: readings/s counted by the merged aggregates in
+the parent, the per-worker split, and the speed-up against one worker.
+
+Scaling is bounded by the cores left for the load clients; on a machine
+with fewer cores than workers + clients the numbers will not scale.
+
+    python -m benchmarks.bench_sharded --workers 1 2 4 --clients 4 --duration 5
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from server.sharded import ShardedIngestServer  # noqa: E402
+
+
+def load_client(index, port, connections, block, sensors, duration, results):
+    # Osobny proces: `connections` gniazd, na każdym bloki po `block` odczytów
+    socks = [socket.create_connection(("127.0.0.1", port)) for _ in range(connections)]
+    payload = b"".join(json.dumps({"sensor_id": f"Sensor-{(index * block + i) % sensors}",
+                                    "timestamp": "2025-05-13T23:00:13", "value": float(i),
+                                    "unit": "°C"}).encode() + b"\n"
+                        for i in range(block))
+    sent = 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        for sock in socks:
+            sock.sendall(payload)
+        for sock in socks:
+            acks = 0
+            while acks < block:
+                acks += sock.recv(65536).count(b"\n")
+        sent += block * connections
+    for sock in socks:
+        sock.close()
+    results.put(sent)
+
+
+def run(workers, port, args):
+    server = ShardedIngestServer(port, workers, flush_interval=0.1)
+    server.start()
+    try:
+        context = multiprocessing.get_context("spawn")
+        results = context.Queue()
+        clients = [context.Process(target=load_client, args=(i, port, args.connections, args.block,
+                                                             args.sensors, args.duration, results))
+                   for i in range(args.clients)]
+        started_messages = server.messages
+        started = time.perf_counter()
+        for client in clients:
+            client.start()
+        sent = sum(results.get() for _ in clients)
+        elapsed = time.perf_counter() - started
+        for client in clients:
+            client.join()
+    finally:
+        server.stop()
+    received = server.messages - started_messages
+    return {"workers": workers, "sent": sent, "received": received, "readings_per_s": received / elapsed,
+            "worker_messages": server.stats()["worker_messages"], "sensors": len(server.sensors)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Multi-process ingestion load test")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=4, help="procesy generujące obciążenie")
+    parser.add_argument("--connections", type=int, default=4, help="połączenia na proces klienta")
+    parser.add_argument("--block", type=int, default=100, help="odczyty wysyłane przed czekaniem na ACK")
+    parser.add_argument("--sensors", type=int, default=1000)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--port", type=int, default=9400)
+    args = parser.parse_args(argv)
+
+    print(f"{os.cpu_count()} CPU, {args.clients} klientów x {args.connections} połączeń")
+    baseline = None
+    for i, workers in enumerate(args.workers):
+        result = run(workers, args.port + i, args)
+        baseline = baseline or result
+        print(f"workers={workers:<3} {result['readings_per_s']:>10.0f} odczytów/s "
+              f"(x{result['readings_per_s'] / baseline['readings_per_s']:.2f} vs workers={baseline['workers']}), "
+              f"per proces {result['worker_messages']}, czujniki {result['sensors']}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Cold start time and RSS of the headless server vs the Qt NetworkServer.
+
+Each run is a fresh interpreter that imports the server, starts listening
+and reports its RSS.
+
+    python -m benchmarks.bench_startup --runs 5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEADLESS = """
+from server.core import IngestServer
+server = IngestServer(port={port})
+server.start()
+"""
+
+QT = """
+from PyQt6.QtCore import QCoreApplication
+from server.server import NetworkServer
+app = QCoreApplication([])
+server = NetworkServer(port={port})
+server.start()
+"""
+
+REPORT = """
+for line in open("/proc/self/status"):
+    if line.startswith("VmRSS"):
+        print(line.split()[1], flush=True)
+server.stop()
+"""
+
+
+def run_once(code, port):
+    # Czas liczymy do momentu, gdy proces zgłosi gotowość (bez stop())
+    started = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-c", code.format(port=port) + REPORT],
+                            cwd=ROOT, stdout=subprocess.PIPE, text=True)
+    rss_kb = int(proc.stdout.readline())
+    elapsed = time.perf_counter() - started
+    proc.wait()
+    return elapsed, rss_kb / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=9200)
+    args = parser.parse_args()
+
+    print(f"{'mode':<10} {'ready s':>8} {'RSS MB':>8}")
+    for name, code in (("headless", HEADLESS), ("qt", QT)):
+        results = [run_once(code, args.port + i) for i in range(args.runs)]
+        print(f"{name:<10} {statistics.median(r[0] for r in results):>8.3f} "
+              f"{statistics.median(r[1] for r in results):>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
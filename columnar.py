@@ -0,0 +1,142 @@
+import csv
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# pyarrow jest potrzebny tylko do archiwów Parquet (archive_format = "parquet")
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+PARQUET_SUFFIX = '.parquet'
+
+
+def require_pyarrow():
+    if pa is None:
+        raise ImportError("archive_format 'parquet' wymaga pakietu pyarrow (pip install pyarrow)")
+
+
+def _schema():
+    return pa.schema([
+        ('timestamp', pa.int64()),      # mikrosekundy od epoki
+        ('sensor_id', pa.dictionary(pa.int32(), pa.string())),
+        ('value', pa.float64()),
+        ('unit', pa.dictionary(pa.int32(), pa.string())),
+    ])
+
+
+def csv_to_parquet(source: str, dest: str, row_group_rows: int = 65536, compression: str = 'zstd') -> int:
+    # Zamienia plik CSV loggera na Parquet. Wiersze zostają w kolejności zapisu
+    # (czyli prawie posortowane po czasie), więc statystyki min/max grup wierszy
+    # pozwalają przy zapytaniach pomijać całe grupy spoza zakresu czasu.
+    # Plik jest czytany strumieniowo: w pamięci jest najwyżej jedna grupa wierszy.
+    require_pyarrow()
+    rows = 0
+    columns = ([], [], [], [])
+    with open(source, newline='', encoding='utf-8') as f, \
+            pq.ParquetWriter(dest, _schema(), compression=compression, use_dictionary=['sensor_id', 'unit'],
+                             write_statistics=True) as writer:
+        timestamps, sensors, values, units = columns
+        for row in csv.reader(f):
+            if len(row) < 4:
+                continue
+            try:
+                timestamp = datetime.fromisoformat(row[0])
+                value = float(row[2])
+            except ValueError:
+                # nagłówek albo uszkodzony wiersz
+                continue
+            timestamps.append(round(timestamp.timestamp() * 1e6))
+            sensors.append(row[1])
+            values.append(value)
+            units.append(row[3])
+            if len(timestamps) >= row_group_rows:
+                rows += _write_row_group(writer, columns)
+        if timestamps or not rows:
+            rows += _write_row_group(writer, columns)
+    return rows
+
+
+def _write_row_group(writer, columns) -> int:
+    timestamps, sensors, values, units = columns
+    table = pa.table([
+        pa.array(timestamps, pa.int64()),
+        pa.array(sensors, pa.string()).dictionary_encode(),
+        pa.array(values, pa.float64()),
+        pa.array(units, pa.string()).dictionary_encode(),
+    ], schema=_schema())
+    writer.write_table(table, row_group_size=len(table) or None)
+    for column in columns:
+        column.clear()
+    return len(table)
+
+
+def parquet_time_range(path: str):
+    # Zakres czasu archiwum (w sekundach) ze statystyk w stopce, bez czytania danych
+    require_pyarrow()
+    metadata = pq.ParquetFile(path).metadata
+    column = metadata.schema.names.index('timestamp')
+    low = high = None
+    for i in range(metadata.num_row_groups):
+        stats = metadata.row_group(i).column(column).statistics
+        if stats is None or not stats.has_min_max:
+            return None
+        low = stats.min if low is None else min(low, stats.min)
+        high = stats.max if high is None else max(high, stats.max)
+    if low is None:
+        return None
+    return low / 1e6, high / 1e6
+
+
+def _decode(array) -> list:
+    # Kolumna słownikowa: zamiana indeksów na napisy przez listę słownika jest
+    # wielokrotnie szybsza niż to_pylist() na całej kolumnie
+    dictionary = array.dictionary.to_pylist()
+    return [dictionary[i] for i in array.indices.to_numpy(zero_copy_only=False).tolist()]
+
+
+def read_parquet(path: str, start_ts: float, end_ts: float, sensor_id: str = None, batch_rows: int = 65536):
+    # Grupy wierszy spoza zakresu (wg statystyk min/max w stopce) są pomijane
+    # bez dekodowania, a pozostałe czytane porcjami po `batch_rows` wierszy -
+    # w pamięci nigdy nie ma całego archiwum
+    require_pyarrow()
+    low, high = int(start_ts * 1e6), int(end_ts * 1e6)
+    parquet = pq.ParquetFile(path)
+    metadata = parquet.metadata
+    column = metadata.schema.names.index('timestamp')
+    row_groups = []
+    for i in range(metadata.num_row_groups):
+        stats = metadata.row_group(i).column(column).statistics
+        if stats is not None and stats.has_min_max and (stats.max < low or stats.min > high):
+            continue
+        row_groups.append(i)
+    if not row_groups:
+        return
+    # Czas lokalny liczymy raz na godzinę (zmiany czasu i strefy są na pełnych godzinach)
+    hours = {}
+    for batch in parquet.iter_batches(batch_size=batch_rows, row_groups=row_groups):
+        timestamps = batch.column(0).to_numpy()
+        mask = (timestamps >= low) & (timestamps <= high)
+        if sensor_id is not None:
+            sensors = batch.column(1)
+            matching = [i for i, name in enumerate(sensors.dictionary.to_pylist()) if name == sensor_id]
+            mask &= np.isin(sensors.indices.to_numpy(zero_copy_only=False), matching)
+        if not mask.any():
+            continue
+        if not mask.all():
+            batch = batch.filter(pa.array(mask))
+        columns = [batch.column(0).to_numpy().tolist(), _decode(batch.column(1)),
+                   batch.column(2).to_numpy().tolist(), _decode(batch.column(3))]
+        for timestamp, sensor, value, unit in zip(*columns):
+            hour, micros = divmod(timestamp, 3_600_000_000)
+            base = hours.get(hour)
+            if base is None:
+                base = hours[hour] = datetime.fromtimestamp(hour * 3600)
+            yield {
+                'timestamp': base + timedelta(microseconds=micros),
+                'sensor_id': sensor,
+                'value': value,
+                'unit': unit,
+            }
@@ -0,0 +1,132 @@
+import gzip
+import io
+import zipfile
+import zlib
+
+# zstd jest opcjonalny (pip install zstandard); pozostałe kodeki są w bibliotece standardowej
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ZIP_CODECS = {
+    'stored': zipfile.ZIP_STORED,
+    'deflate': zipfile.ZIP_DEFLATED,
+    'bzip2': zipfile.ZIP_BZIP2,
+    'lzma': zipfile.ZIP_LZMA,
+}
+STREAM_CODECS = {
+    'gzip': '.gz',
+    'zstd': '.zst',
+}
+CODECS = tuple(ZIP_CODECS) + tuple(STREAM_CODECS)
+SUFFIXES = ('.zip',) + tuple(STREAM_CODECS.values())
+DEFAULT_LEVELS = {'gzip': 6, 'zstd': 3}
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def suffix(codec: str) -> str:
+    return '.zip' if codec in ZIP_CODECS else STREAM_CODECS[codec]
+
+
+def require(codec: str) -> None:
+    if codec not in CODECS:
+        raise ValueError(f"Nieznany kodek kompresji: {codec}")
+    if codec == 'zstd' and zstandard is None:
+        raise ImportError("kodek 'zstd' wymaga pakietu zstandard (pip install zstandard)")
+
+
+def compress(source: str, dest: str, codec: str, level: int = None, member: str = None) -> int:
+    # Kompresja strumieniowa porcjami po CHUNK_SIZE (stała pamięć niezależnie od
+    # rozmiaru pliku). Zwraca CRC32 danych źródłowych do późniejszej weryfikacji.
+    crc = 0
+    with open(source, 'rb') as src, _writer(dest, codec, level, member) as out:
+        for chunk in iter(lambda: src.read(CHUNK_SIZE), b''):
+            crc = zlib.crc32(chunk, crc)
+            out.write(chunk)
+    return crc
+
+
+def open_stream(path: str, codec: str, member: str = None):
+    # Plik tylko do odczytu z danymi po dekompresji; seek działa do przodu
+    # (tak czyta Logger.read_logs - bloki indeksu po kolei)
+    if codec in ZIP_CODECS:
+        return zipfile.ZipFile(path).open(member)
+    if codec == 'gzip':
+        return gzip.open(path, 'rb')
+    require(codec)
+    reader = zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+    return _ForwardSeekReader(reader, CHUNK_SIZE)
+
+
+def verify(path: str, codec: str, member: str, crc: int, size: int) -> None:
+    # Rozpakowuje archiwum i porównuje rozmiar oraz CRC32 z plikiem źródłowym
+    actual_crc, actual_size = 0, 0
+    with open_stream(path, codec, member) as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            actual_crc = zlib.crc32(chunk, actual_crc)
+            actual_size += len(chunk)
+    if actual_crc != crc or actual_size != size:
+        raise ValueError(f"Weryfikacja archiwum {path} nie powiodła się "
+                         f"({actual_size} B, crc {actual_crc:08x}; oczekiwano {size} B, crc {crc:08x})")
+
+
+def _writer(dest: str, codec: str, level: int, member: str):
+    require(codec)
+    if codec in ZIP_CODECS:
+        return _ZipMemberWriter(dest, ZIP_CODECS[codec], level, member)
+    if level is None:
+        level = DEFAULT_LEVELS[codec]
+    if codec == 'gzip':
+        return gzip.open(dest, 'wb', compresslevel=level)
+    return _ZstdWriter(dest, level)
+
+
+class _ForwardSeekReader(io.BufferedReader):
+    # Strumień zstd nie obsługuje seek(); przeskok do przodu to odczyt z pominięciem danych
+    def seekable(self):
+        return True
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence != io.SEEK_SET or offset < self.tell():
+            raise io.UnsupportedOperation("only forward seeks are supported")
+        skip = offset - self.tell()
+        while skip > 0:
+            chunk = self.read(min(skip, CHUNK_SIZE))
+            if not chunk:
+                break
+            skip -= len(chunk)
+        return self.tell()
+
+
+class _ZipMemberWriter:
+    def __init__(self, dest, compression, level, member):
+        self._zip = zipfile.ZipFile(dest, 'w', compression=compression, compresslevel=level)
+        self._member = self._zip.open(member, 'w', force_zip64=True)
+
+    def write(self, data):
+        return self._member.write(data)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._member.close()
+        self._zip.close()
+
+
+class _ZstdWriter:
+    def __init__(self, dest, level):
+        self._file = open(dest, 'wb')
+        self._stream = zstandard.ZstdCompressor(level=level).stream_writer(self._file, closefd=False)
+
+    def write(self, data):
+        return self._stream.write(data)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._stream.close()
+        self._file.close()
@@ -0,0 +1,110 @@
+import itertools
+import queue
+import threading
+import time
+
+import metrics
+
+OVERFLOW_POLICIES = ('block', 'drop_oldest', 'drop_newest')
+
+_STOP = object()
+# Etykieta "id" odróżnia w metrykach subskrybentów o tej samej nazwie (np. ten sam callback)
+_IDS = itertools.count()
+
+
+class Subscriber:
+    # Odbiorca odczytów z własną ograniczoną kolejką i wątkiem roboczym.
+    # Obiekt jest wywoływalny z tą samą sygnaturą co opakowany callback, więc
+    # można go przekazać do Sensor.register_callback i dzielić między czujnikami;
+    # wolny odbiorca (np. sieć) nie blokuje wtedy ani próbkowania, ani innych
+    # odbiorców (np. zapisu CSV).
+    def __init__(self, callback, queue_size: int = 1000, overflow_policy: str = 'drop_oldest', name: str = None):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Nieznana polityka przepełnienia: {overflow_policy}")
+        self.callback = callback
+        self.name = name or getattr(callback, '__qualname__', repr(callback))
+        self.overflow_policy = overflow_policy
+        self.delivered = 0
+        self.dropped = 0
+        self.errors = 0
+        # czas oczekiwania w kolejce i czas samego wywołania callbacku
+        self.queue_latency = metrics.Histogram()
+        self.call_latency = metrics.Histogram()
+        # od odczytu czujnika (wstawienia do kolejki) do końca callbacku
+        self._labels = {'subscriber': self.name, 'id': str(next(_IDS))}
+        self._delivery = metrics.histogram('subscriber_delivery_seconds', self._labels)
+        metrics.gauge('subscriber_queue_depth', self._labels, fn=lambda: self.queue_depth)
+        metrics.gauge('subscriber_dropped', self._labels, fn=lambda: self.dropped)
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._drop_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._worker, name=f"subscriber-{self.name}", daemon=True)
+        self._thread.start()
+
+    def __call__(self, *args) -> None:
+        self._enqueue((time.perf_counter(), args))
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def close(self, timeout: float = None) -> None:
+        # Dostarcza to, co już jest w kolejce, i kończy wątek
+        if not self._thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        for name in ('subscriber_delivery_seconds', 'subscriber_queue_depth', 'subscriber_dropped'):
+            metrics.REGISTRY.remove(name, self._labels)
+
+    def stats(self) -> dict:
+        return {
+            'name': self.name,
+            'delivered': self.delivered,
+            'dropped': self.dropped,
+            'errors': self.errors,
+            'queue_depth': self.queue_depth,
+            'queue_latency': self.queue_latency.snapshot(),
+            'call_latency': self.call_latency.snapshot(),
+        }
+
+    def _enqueue(self, entry) -> None:
+        if self.overflow_policy == 'block':
+            self._queue.put(entry)
+            return
+        while True:
+            try:
+                self._queue.put_nowait(entry)
+                return
+            except queue.Full:
+                if self.overflow_policy == 'drop_newest':
+                    with self._drop_lock:
+                        self.dropped += 1
+                    return
+            # drop_oldest: robimy miejsce, wyrzucając najstarszy odczyt
+            try:
+                oldest = self._queue.get_nowait()
+            except queue.Empty:
+                continue
+            if oldest is _STOP:
+                self._queue.put(_STOP)
+                return
+            with self._drop_lock:
+                self.dropped += 1
+
+    def _worker(self) -> None:
+        while True:
+            entry = self._queue.get()
+            if entry is _STOP:
+                return
+            queued_at, args = entry
+            started = time.perf_counter()
+            self.queue_latency.record(started - queued_at)
+            try:
+                self.callback(*args)
+            except Exception as e:
+                self.errors += 1
+                print(f"[Subscriber] Błąd w {self.name}: {e}")
+            finished = time.perf_counter()
+            self.call_latency.record(finished - started)
+            self._delivery.record(finished - queued_at)
+            self.delivered += 1
@@ -1,12 +1,18 @@
 from PyQt6.QtWidgets import (
     QWidget, QMainWindow, QVBoxLayout, QHBoxLayout, QPushButton, QLineEdit, QLabel,
-    QTableWidget, QTableWidgetItem, QStatusBar, QApplication, QMessageBox
+    QTableView, QStatusBar, QApplication, QMessageBox
 )
 from PyQt6.QtCore import QTimer
-from datetime import datetime, timedelta
-from collections import defaultdict, deque
 
+from gui.sensor_model import ReadingCoalescer, SensorTableModel
+from network.config import load_config
 from server.server import NetworkServer
+from server.sink import PersistenceSink
+
+# Odczyty trafiają do tabeli raz na klatkę; średnie każdego czujnika są
+# odświeżane co 3 s (w każdej klatce inna część wierszy)
+FRAME_INTERVAL_MS = 100
+REFRESH_INTERVAL_MS = 3000
 
 
 class MainWindow(QMainWindow):
@@ -33,24 +39,26 @@ class MainWindow(QMainWindow):
         top_layout.addWidget(self.start_button)
         top_layout.addWidget(self.stop_button)
 
-        self.sensor_table = QTableWidget(0, 6)
-        self.sensor_table.setHorizontalHeaderLabels([
-            "Sensor", "Ostatnia wartość", "Jednostka", "Timestamp", "Średnia 1h", "Średnia 12h"
-        ])
+        self.sensor_model = SensorTableModel(self)
+        self.sensor_table = QTableView()
+        self.sensor_table.setModel(self.sensor_model)
         self.sensor_table.verticalHeader().setVisible(False)
-        self.sensor_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
-        self.sensor_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.sensor_table.setEditTriggers(QTableView.EditTrigger.NoEditTriggers)
+        self.sensor_table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
         main_layout.addWidget(self.sensor_table)
 
         self.status_bar = QStatusBar()
         self.setStatusBar(self.status_bar)
 
-        self.sensor_data = defaultdict(lambda: deque())
+        # sensor_id -> SensorAggregate (średnie 1h/12h liczone przyrostowo)
+        self.sensor_data = self.sensor_model.sensor_data
+        self.coalescer = ReadingCoalescer()
 
         self.server = None
 
+        self.frame = 0
         self.update_timer = QTimer()
-        self.update_timer.setInterval(3000)
+        self.update_timer.setInterval(FRAME_INTERVAL_MS)
         self.update_timer.timeout.connect(self.update_sensor_table)
 
         self.start_button.clicked.connect(self.start_server)
@@ -67,8 +75,15 @@ class MainWindow(QMainWindow):
             return
 
         try:
-            self.server = NetworkServer(port=port)
-            self.server.new_data.connect(self.handle_new_sensor_data)
+            # Zapis wszystkich odczytów po stronie serwera (network_server.sink w config.yaml)
+            sink_config = load_config().get("network_server", {}).get("sink")
+            sink = PersistenceSink(sink_config["config"], sink_config.get("durable_ack", False)) \
+                if sink_config else None
+            self.server = NetworkServer(port=port, sink=sink)
+            # Odczyty omijają kolejkę sygnałów Qt: wątek serwera dopisuje je
+            # do bufora, a GUI zabiera je raz na klatkę
+            self.server.core.new_data.connect(self.coalescer.add)
+            self.server.core.new_batch.connect(self.coalescer.add_batch)
             self.server.status_update.connect(self.handle_status_update)
             self.server.start()
         except Exception as e:
@@ -93,56 +108,22 @@ class MainWindow(QMainWindow):
         self.port_input.setEnabled(True)
 
         self.update_timer.stop()
+        self.apply_pending_readings()
 
-    def handle_new_sensor_data(self, data: dict):
-        sensor_id = data.get("sensor_id") or data.get("Sensor") or "UNKNOWN"
-        value = data.get("value")
-        unit = data.get("unit")
-        timestamp_str = data.get("timestamp")
-        try:
-            timestamp = datetime.fromisoformat(timestamp_str)
-        except Exception:
-            timestamp = datetime.now()
-
-        buffer = self.sensor_data[sensor_id]
-
-        # Usuwamy odczyty starsze niż 12h
-        cutoff = datetime.now() - timedelta(hours=12)
-        while buffer and buffer[0][0] < cutoff:
-            buffer.popleft()
-
-        buffer.append((timestamp, value, unit))
+    def apply_pending_readings(self):
+        if self.sensor_model.apply(self.coalescer.drain()):
+            # szerokość kolumn dopasowujemy tylko przy nowych czujnikach
+            self.sensor_table.resizeColumnsToContents()
 
     def handle_status_update(self, message: str):
         self.status_bar.showMessage(message)
 
     def update_sensor_table(self):
-        sensors = list(self.sensor_data.keys())
-        self.sensor_table.setRowCount(len(sensors))
-
-        now = datetime.now()
-        for row, sensor_id in enumerate(sensors):
-            readings = self.sensor_data[sensor_id]
-            if not readings:
-                continue
-
-            last_ts, last_val, last_unit = readings[-1]
-
-            cutoff_1h = now - timedelta(hours=1)
-            values_1h = [v for (ts, v, u) in readings if ts >= cutoff_1h]
-            avg_1h = round(sum(values_1h) / len(values_1h), 2) if values_1h else None
-
-            values_12h = [v for (ts, v, u) in readings]
-            avg_12h = round(sum(values_12h) / len(values_12h), 2) if values_12h else None
+        self.apply_pending_readings()
+        self.sensor_model.refresh(part=self.frame, parts=REFRESH_INTERVAL_MS // FRAME_INTERVAL_MS)
+        self.frame += 1
 
-            self.sensor_table.setItem(row, 0, QTableWidgetItem(str(sensor_id)))
-            self.sensor_table.setItem(row, 1, QTableWidgetItem(str(last_val)))
-            self.sensor_table.setItem(row, 2, QTableWidgetItem(str(last_unit)))
-            self.sensor_table.setItem(row, 3, QTableWidgetItem(last_ts.strftime("%Y-%m-%d %H:%M:%S")))
-            self.sensor_table.setItem(row, 4, QTableWidgetItem(str(avg_1h) if avg_1h is not None else ""))
-            self.sensor_table.setItem(row, 5, QTableWidgetItem(str(avg_12h) if avg_12h is not None else ""))
 
-        self.sensor_table.resizeColumnsToContents()
 if __name__ == "__main__":
     import sys
     app = QApplication(sys.argv)
@@ -0,0 +1,153 @@
+import threading
+import time
+from datetime import datetime
+
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+from aggregates import HOUR, SensorAggregate
+
+COLUMNS = ("Sensor", "Ostatnia wartość", "Jednostka", "Timestamp", "Średnia 1h", "Średnia 12h")
+
+
+class ReadingCoalescer:
+    # Odczyty z wątku serwera zbierane per czujnik między klatkami GUI.
+    # add/add_batch są wołane bezpośrednio w wątku serwera (bez kolejkowania
+    # sygnału Qt dla każdego odczytu), a wątek GUI raz na klatkę zabiera
+    # wszystko przez drain().
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self.received = 0
+        self.rejected = 0
+
+    def add(self, data: dict) -> None:
+        # Wołane w wątku serwera - wyjątek tutaj zamknąłby połączenie klienta
+        if not isinstance(data, dict):
+            self.rejected += 1
+            return
+        sensor_id = data.get("sensor_id") or data.get("Sensor") or "UNKNOWN"
+        with self._lock:
+            readings = self._pending.get(sensor_id)
+            if readings is None:
+                readings = self._pending[sensor_id] = []
+            readings.append(data)
+            self.received += 1
+
+    def add_batch(self, readings: list) -> None:
+        for data in readings:
+            self.add(data)
+
+    def drain(self) -> dict:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return pending
+
+
+class SensorTableModel(QAbstractTableModel):
+    # Model tabeli czujników: w każdej klatce przeliczamy tylko ostatnią wartość
+    # czujników, które dostały odczyty. Średnie 1h/12h (droższe - okno musi
+    # wchłonąć wszystkie nowe odczyty) odświeża refresh(), po części wierszy
+    # na klatkę, żeby koszt nie kumulował się w jednej klatce. Widok dostaje
+    # dataChanged wyłącznie dla zmienionych komórek, scalonych w ciągłe
+    # zakresy wierszy.
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.sensor_data = {}
+        self._sensors = []
+        self._rows = {}
+        self._cells = []
+        self.changed_cells = 0
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._sensors)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole or not index.isValid():
+            return None
+        return self._cells[index.row()][index.column()]
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return COLUMNS[section]
+        return None
+
+    def apply(self, pending: dict) -> bool:
+        # Odczyty z ReadingCoalescer.drain(); zwraca True, jeśli doszły nowe wiersze
+        new_sensors = []
+        for sensor_id, readings in pending.items():
+            aggregate = self.sensor_data.get(sensor_id)
+            if aggregate is None:
+                aggregate = self.sensor_data[sensor_id] = SensorAggregate()
+                new_sensors.append(sensor_id)
+            for data in readings:
+                try:
+                    timestamp = datetime.fromisoformat(data.get("timestamp")).timestamp()
+                except Exception:
+                    timestamp = time.time()
+                aggregate.add(timestamp, data.get("value"), data.get("unit"))
+
+        if new_sensors:
+            first = len(self._sensors)
+            self.beginInsertRows(QModelIndex(), first, first + len(new_sensors) - 1)
+            for sensor_id in new_sensors:
+                self._rows[sensor_id] = len(self._sensors)
+                self._sensors.append(sensor_id)
+                self._cells.append(self._format(sensor_id))
+            self.endInsertRows()
+        self._update(sorted(self._rows[sensor_id] for sensor_id in pending if sensor_id not in new_sensors))
+        return bool(new_sensors)
+
+    def refresh(self, now: float = None, part: int = 0, parts: int = 1) -> None:
+        # Średnie wierszy row % parts == part; okna 1h/12h przesuwają się też bez nowych odczytów
+        now = time.time() if now is None else now
+        rows = range(part % parts, len(self._sensors), parts)
+        for row in rows:
+            self.sensor_data[self._sensors[row]].expire(now)
+        self._update(rows, means=True)
+
+    def _update(self, rows, means=False) -> None:
+        # rows rosnąco; sąsiednie zmienione wiersze idą w jednym dataChanged
+        first = last = None
+        low, high = len(COLUMNS), -1
+        for row in rows:
+            old = self._cells[row]
+            cells = self._format(self._sensors[row], old if not means else None)
+            changed = [column for column in range(len(COLUMNS)) if cells[column] != old[column]]
+            if not changed:
+                continue
+            self._cells[row] = cells
+            self.changed_cells += len(changed)
+            if first is not None and row != last + 1:
+                self._emit(first, last, low, high)
+                low, high = len(COLUMNS), -1
+                first = None
+            if first is None:
+                first = row
+            last = row
+            low, high = min(low, changed[0]), max(high, changed[-1])
+        if first is not None:
+            self._emit(first, last, low, high)
+
+    def _emit(self, first, last, low, high) -> None:
+        self.dataChanged.emit(self.index(first, low), self.index(last, high), [Qt.ItemDataRole.DisplayRole])
+
+    def _format(self, sensor_id, previous=None) -> tuple:
+        # `previous` - bieżące komórki wiersza, z których bierzemy średnie bez przeliczania
+        aggregate = self.sensor_data[sensor_id]
+        cells = (
+            str(sensor_id),
+            str(aggregate.last_value),
+            str(aggregate.unit),
+            datetime.fromtimestamp(aggregate.last_timestamp).strftime("%Y-%m-%d %H:%M:%S"),
+        )
+        if previous is not None:
+            return cells + previous[4:]
+        avg_1h = aggregate.mean(HOUR)
+        avg_12h = aggregate.mean(12 * HOUR)
+        return cells + (
+            str(round(avg_1h, 2)) if avg_1h is not None else "",
+            str(round(avg_12h, 2)) if avg_12h is not None else "",
+        )
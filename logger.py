@@ -1,40 +1,206 @@
+import bisect
 import csv
 import json
+import logging
+import multiprocessing
 import os
 import zipfile
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 import io
-import socket
+import queue
 import threading
+import time
 
-class NetworkClient:
+import columnar
+import compression
+import metrics
+from rollups import RESOLUTIONS, RollupStore
+from storage import STORAGE_BACKENDS, SQLiteStorage
+from network.client import BatchSender
+from network.pool import ConnectionManager
+from network.protocol import JSON_FORMAT
+from network.spool import Spool, SpoolSender
 
-    def __init__(self, host, port):
-        self.host = host
-        self.port = port
-        self.sock = None
-        self.lock = threading.Lock()
+INDEX_SUFFIX = '.idx'
+STATE_FILE = '.logger_state.json'
+RETENTION_FILE = 'retention.json'
+ARCHIVE_SUFFIXES = compression.SUFFIXES + (columnar.PARQUET_SUFFIX,)
 
-    def connect(self):
-        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.sock.connect((self.host, self.port))
+OVERFLOW_POLICIES = ('block', 'drop_oldest', 'drop_newest')
+FSYNC_POLICIES = ('never', 'always', 'interval')
+ARCHIVE_FORMATS = ('zip', 'parquet')
 
-    def send(self, data_dict):
-        import json
+_STOP = object()
+
+# błędy wysyłki mogą wystąpić przy każdym odczycie - logujemy je z próbkowaniem
+_sampled_log = metrics.SampledLog(logging.getLogger(__name__))
+
+
+def _parse_ts(raw: bytes):
+    return datetime.fromisoformat(raw.decode('utf-8')).timestamp()
+
+
+def _scan_blocks(f, offset: int, every: int):
+    # Jedno przejście po pliku: co `every` wierszy zapamiętujemy offset bloku
+    # oraz min/max znacznika czasu w tym bloku.
+    blocks = []
+    block = None
+    rows = 0
+    pos = offset
+    f.seek(offset)
+    for line in f:
         try:
-            msg = json.dumps(data_dict) + "\n"
-            with self.lock:
-                self.sock.sendall(msg.encode())
-        except Exception as e:
-            print(f"[NetworkClient] Błąd wysyłki danych: {e}")
+            ts = _parse_ts(line.split(b',', 1)[0])
+        except ValueError:
+            # nagłówek albo uszkodzony wiersz
+            pos += len(line)
+            continue
+        if block is None or rows >= every:
+            block = [pos, ts, ts]
+            blocks.append(block)
+            rows = 0
+        elif ts < block[1]:
+            block[1] = ts
+        elif ts > block[2]:
+            block[2] = ts
+        rows += 1
+        pos += len(line)
+    return blocks, pos
+
+
+def _make_index(blocks, length: int, size: int, every: int, member: str = None):
+    index = {
+        'size': size,
+        'length': length,
+        'every': every,
+        'min_ts': min((b[1] for b in blocks), default=None),
+        'max_ts': max((b[2] for b in blocks), default=None),
+        'blocks': blocks,
+    }
+    if member:
+        index['member'] = member
+    return index
+
+
+def _load_index(path: str):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _count_lines(path: str, offset: int = 0) -> int:
+    count = 0
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            count += chunk.count(b'\n')
+    return count
+
+
+def _truncate_partial_row(path: str) -> int:
+    # Po awarii w trakcie zapisu plik może kończyć się uciętym wierszem - obcinamy
+    # go do ostatniego '\n' (taki wiersz nie został zapisany w całości, więc nie był
+    # potwierdzony). Zwraca liczbę usuniętych bajtów.
+    with open(path, 'rb+') as f:
+        size = f.seek(0, os.SEEK_END)
+        end = size
+        while end > 0:
+            start = max(0, end - 65536)
+            f.seek(start)
+            chunk = f.read(end - start)
+            newline = chunk.rfind(b'\n')
+            if newline >= 0:
+                end = start + newline + 1
+                break
+            end = start
+        if end < size:
+            f.truncate(end)
+    return size - end
+
+
+def _save_index(path: str, index: dict):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(index, f)
+    os.replace(tmp_path, path)
+
+
+def _read_blocks(f, index: dict, start_ts: float, end_ts: float, sensor_id=None):
+    blocks = index['blocks']
+    for i, (offset, block_min, block_max) in enumerate(blocks):
+        if block_max < start_ts or block_min > end_ts:
+            continue
+        end_offset = blocks[i + 1][0] if i + 1 < len(blocks) else index['length']
+        f.seek(offset)
+        pos = offset
+        while pos < end_offset:
+            line = f.readline()
+            if not line:
+                break
+            pos += len(line)
+            row = next(csv.reader([line.decode('utf-8')]), None)
+            if not row or len(row) < 4:
+                continue
+            try:
+                timestamp = datetime.fromisoformat(row[0])
+                value = float(row[2])
+            except ValueError:
+                continue
+            if sensor_id is not None and row[1] != sensor_id:
+                continue
+            if start_ts <= timestamp.timestamp() <= end_ts:
+                yield {
+                    'timestamp': timestamp,
+                    'sensor_id': row[1],
+                    'value': value,
+                    'unit': row[3],
+                }
+
+
+def _archive_job(source: str, archive_path: str, codec: str, level, every: int,
+                 row_group_rows: int = 65536, parquet_compression: str = 'zstd') -> dict:
+    # Wykonywane w procesie roboczym: kompresja do pliku tymczasowego,
+    # weryfikacja i dopiero wtedy podmiana na docelową nazwę. Pliku źródłowego
+    # nie ruszamy - usuwa go Logger po udanym zakończeniu zadania.
+    started = time.perf_counter()
+    size = os.path.getsize(source)
+    tmp_path = archive_path + '.tmp'
+    try:
+        if codec == 'parquet':
+            rows = columnar.csv_to_parquet(source, tmp_path, row_group_rows, parquet_compression)
+            if columnar.pq.ParquetFile(tmp_path).metadata.num_rows != rows:
+                raise ValueError(f"Weryfikacja archiwum {archive_path} nie powiodła się")
+            os.replace(tmp_path, archive_path)
+        else:
+            member = os.path.basename(archive_path)[:-len(compression.suffix(codec))]
+            with open(source, 'rb') as f:
+                blocks, length = _scan_blocks(f, 0, every)
+            crc = compression.compress(source, tmp_path, codec, level, member)
+            compression.verify(tmp_path, codec, member, crc, size)
+            os.replace(tmp_path, archive_path)
+            index = _make_index(blocks, length, os.path.getsize(archive_path), every, member=member)
+            index['codec'] = codec
+            _save_index(archive_path + INDEX_SUFFIX, index)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return {
+        'codec': codec,
+        'bytes_in': size,
+        'bytes_out': os.path.getsize(archive_path),
+        'seconds': time.perf_counter() - started,
+    }
 
-    def close(self):
-        if self.sock:
-            self.sock.close()
-            self.sock = None
 
 class Logger:
-    def __init__(self, config_path: str, server_host: str, server_port: int):
+    def __init__(self, config_path: str, server_host: str = None, server_port: int = None,
+                 read_only: bool = False):
+        # read_only=True: tylko read_logs() (np. replay.py) - bez tworzenia katalogów,
+        # agregatów (otwarcie RollupStore oznacza stan jako niezamknięty), sieci i spoola
+        self.read_only = read_only
         with open(config_path) as f:
             config = json.load(f)
         self.log_dir = config['log_dir']
@@ -44,9 +210,60 @@ class Logger:
         self.max_size_mb = config.get('max_size_mb', 10)
         self.rotate_after_lines = config.get('rotate_after_lines')
         self.retention_days = config.get('retention_days', 30)
+        self.index_every_rows = config.get('index_every_rows', 1000)
+        # Magazyn odczytów: "csv" (pliki z rotacją i archiwami) albo "sqlite"
+        # (baza w log_dir, partycje czasowe usuwane zgodnie z retention_days)
+        self.storage_backend = config.get('storage', 'csv')
+        self.sqlite_file = config.get('sqlite_file', 'readings.db')
+        self.sqlite_partition_hours = config.get('sqlite_partition_hours', 24)
+        # Format archiwum: "zip" (CSV w zipie) albo "parquet" (kolumnowy, wymaga pyarrow)
+        self.archive_format = config.get('archive_format', 'zip')
+        self.parquet_row_group_rows = config.get('parquet_row_group_rows', 65536)
+        self.parquet_compression = config.get('parquet_compression', 'zstd')
+        # Kompresja archiwów CSV: deflate/bzip2/lzma/stored (zip), gzip albo zstd;
+        # archive_workers > 0 kompresuje w puli procesów, 0 - synchronicznie w _rotate
+        self.archive_codec = config.get('archive_codec', 'deflate')
+        self.archive_level = config.get('archive_level')
+        self.archive_workers = config.get('archive_workers', 1)
+        # Agregaty w kubełkach czasu (log_dir/rollups) do zapytań o długie okresy
+        self.rollups_enabled = config.get('rollups', False)
+        self.rollup_resolutions = config.get('rollup_resolutions', list(RESOLUTIONS))
+        self.send_batch_size = config.get('send_batch_size', 1)
+        self.send_linger_ms = config.get('send_linger_ms', 50)
+        self.wire_format = config.get('wire_format', JSON_FORMAT)
+        # Dodatkowe serwery ("host:port"); połączenia są wspólne dla loggerów w procesie
+        self.servers = config.get('servers', [])
+        self.send_window = config.get('send_window', 1)
+        # Spool: odczyty do wysłania trafiają najpierw na dysk, a osobny wątek
+        # wysyła je do serwera, gdy ten jest dostępny
+        self.spool_dir = config.get('spool_dir')
+        self.spool_segment_mb = config.get('spool_segment_mb', 16)
+        self.spool_max_mb = config.get('spool_max_mb')
+        self.spool_batch_size = config.get('spool_batch_size', 500)
+
+        # Tryb asynchroniczny: log_reading tylko wrzuca do kolejki, a zapis,
+        # rotacja i archiwizacja odbywają się w osobnym wątku
+        self.async_write = config.get('async_write', False)
+        self.queue_size = config.get('queue_size', 10000)
+        self.overflow_policy = config.get('overflow_policy', 'block')
+        self.fsync = config.get('fsync', 'never')
+        self.fsync_interval_seconds = config.get('fsync_interval_seconds', 1.0)
+        if self.overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Nieznana polityka przepełnienia: {self.overflow_policy}")
+        if self.fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Nieznana polityka fsync: {self.fsync}")
+        if self.storage_backend not in STORAGE_BACKENDS:
+            raise ValueError(f"Nieznany magazyn odczytów: {self.storage_backend}")
+        if self.archive_format not in ARCHIVE_FORMATS:
+            raise ValueError(f"Nieznany format archiwum: {self.archive_format}")
+        if self.archive_format == 'parquet':
+            columnar.require_pyarrow()
+        else:
+            compression.require(self.archive_codec)
 
-        os.makedirs(self.log_dir, exist_ok=True)
-        os.makedirs(os.path.join(self.log_dir, 'archive'), exist_ok=True)
+        if not read_only:
+            os.makedirs(self.log_dir, exist_ok=True)
+            os.makedirs(os.path.join(self.log_dir, 'archive'), exist_ok=True)
 
         self.buffer = []
         self.current_file = None
@@ -54,68 +271,339 @@ class Logger:
         self.current_size = 0
         self.line_count = 0
         self.next_rotation_time = None
+        self.state_path = os.path.join(self.log_dir, STATE_FILE)
+        self._retention = None
+        self._archive_pool = None
+        self._archive_lock = threading.Lock()
+        self._archives_done = threading.Condition(self._archive_lock)
+        self._archives_pending = 0
+        self.archive_stats = {}
+        self.storage = None
+        if self.storage_backend == 'sqlite':
+            # fsync 'always' = fsync pliku WAL przy każdym zatwierdzeniu
+            self.storage = SQLiteStorage(os.path.join(self.log_dir, self.sqlite_file),
+                                         self.sqlite_partition_hours, self.retention_days,
+                                         'FULL' if self.fsync == 'always' else 'NORMAL')
+        self.rollups = RollupStore(os.path.join(self.log_dir, 'rollups'), self.rollup_resolutions) \
+            if self.rollups_enabled and not read_only else None
+        self.last_fsync = time.monotonic()
+        self.unsynced = False
+
+        labels = self._labels = {'log_dir': self.log_dir}
+        self._flush_latency = metrics.histogram('logger_flush_seconds', labels)
+        self._rotation_latency = metrics.histogram('logger_rotation_seconds', labels)
+        self._bytes_written = metrics.counter('logger_bytes_written', labels)
+        self._rows_written = metrics.counter('logger_rows_written', labels)
+
+        self.dropped_rows = 0
+        self.commits = 0
+        self._drop_lock = threading.Lock()
+        # Zapis synchroniczny (bez async_write) może być wołany z wielu wątków naraz
+        # (SensorScheduler z dispatch 'threads') - bufor i flush są pod jedną blokadą
+        self._write_lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=self.queue_size) if self.async_write else None
+        self._writer_thread = None
+
+        # Sieć (opcjonalna - sam zapis do plików nie wymaga serwera). Połączenie
+        # otwiera się dopiero przy pierwszej wysyłce, więc serwer nie musi działać przy starcie
+        self.network_client = None
+        endpoints = list(self.servers)
+        if server_host is not None and server_port is not None:
+            endpoints.insert(0, (server_host, server_port))
+        if endpoints and not read_only:
+            self.network_client = ConnectionManager.shared(
+                endpoints, wire_format=self.wire_format, window=self.send_window)
+        self.spool = None
+        self._spool_sender = None
+        if self.network_client and self.spool_dir:
+            self.spool = Spool(self.spool_dir, int(self.spool_segment_mb * 1024 * 1024),
+                               int(self.spool_max_mb * 1024 * 1024) if self.spool_max_mb else None)
+            self._spool_sender = SpoolSender(self.spool, self.network_client, self.spool_batch_size)
+        self._batcher = None
+        if self.network_client and not self.spool and self.send_batch_size > 1:
+            self._batcher = BatchSender(self.network_client.send, self.send_batch_size,
+                                        self.send_linger_ms / 1000, labels={'log_dir': self.log_dir})
+
+    @property
+    def queue_depth(self):
+        return self._queue.qsize() if self._queue else 0
 
-        # Sieć
-        self.network_client = NetworkClient(server_host, server_port)
-        self.network_client.connect()
+    def stats(self):
+        return {
+            'queue_depth': self.queue_depth,
+            'dropped_rows': self.dropped_rows,
+            'commits': self.commits,
+            'failed_batches': self._batcher.failed_batches if self._batcher else 0,
+            'spool': self._spool_sender.stats() if self._spool_sender else None,
+            'servers': self.network_client.stats() if self.network_client else None,
+            'storage': self.storage.stats() if self.storage else None,
+            'archives_pending': self._archives_pending,
+            'archive': {
+                codec: dict(totals,
+                            ratio=totals['bytes_in'] / totals['bytes_out'] if totals['bytes_out'] else None,
+                            mb_per_s=totals['bytes_in'] / 1e6 / totals['seconds'] if totals['seconds'] else None)
+                for codec, totals in self.archive_stats.items()
+            },
+        }
 
     def start(self):
-        self._rotate()
+        if self.read_only:
+            raise RuntimeError("Logger otwarty tylko do odczytu")
+        # Wznawiamy bieżący plik ze stanem rotacji z poprzedniego uruchomienia;
+        # rotujemy od razu tylko wtedy, gdy termin lub limit już minął
+        # gauge trzyma referencję do loggera - rejestrowany tylko między start() a stop()
+        metrics.gauge('logger_buffer_depth', self._labels, fn=lambda: len(self.buffer) + self.queue_depth)
+        if self.storage:
+            self.storage.open()
+        else:
+            self._open_file()
+        if self.rollups and self.rollups.needs_rebuild:
+            self._rebuild_rollups()
+        if not self.storage:
+            # Pliki po rotacji, których archiwizacja nie skończyła się przed zatrzymaniem;
+            # listujemy je przed _check_rotation(), bo plik przeniesiony przez rotację
+            # poniżej jest już wysłany do archiwizacji i nie może trafić tam drugi raz
+            archive_dir = os.path.join(self.log_dir, 'archive')
+            leftovers = [os.path.join(archive_dir, filename) for filename in sorted(os.listdir(archive_dir))
+                         if filename.endswith('.csv')]
+            self._check_rotation()
+            for pending in leftovers:
+                self._submit_archive(pending)
+        if self._queue is not None:
+            self._writer_thread = threading.Thread(target=self._writer_loop, daemon=True)
+            self._writer_thread.start()
+        if self._spool_sender:
+            self._spool_sender.start()
 
     def stop(self):
+        if self._writer_thread:
+            # Sentinel trafia na koniec kolejki, więc wątek zapisze wszystko przed nim
+            self._queue.put(_STOP)
+            self._writer_thread.join()
+            self._writer_thread = None
         self._flush_buffer()
         if self.current_file:
+            self._save_state()
             self.current_file.close()
             self.current_file = None
             self.current_filename = None
-        self.network_client.close()
+        if self.storage:
+            self.storage.close()
+        if self.rollups:
+            self.rollups.close()
+        if self._archive_pool:
+            # czekamy na rozpoczęte kompresje (razem z usunięciem plików źródłowych)
+            self._archive_pool.shutdown(wait=True)
+            self._archive_pool = None
+        if self._batcher and not self._batcher.close():
+            print(f"[Logger] Nie udało się wysłać ostatniej paczki odczytów "
+                  f"(utracone paczki: {self._batcher.failed_batches})")
+        metrics.REGISTRY.remove('logger_buffer_depth', self._labels)
+        if self._spool_sender:
+            # Niewysłane odczyty zostają w spoolu i pójdą po następnym starcie;
+            # SpoolSender zamyka też połączenie
+            self._spool_sender.close()
+            self.spool.close()
+        elif self.network_client:
+            self.network_client.close()
 
     def log_reading(self, sensor_id: str, timestamp: datetime, value: float, unit: str):
-        self.buffer.append((timestamp, sensor_id, value, unit))
-        if len(self.buffer) >= self.buffer_size:
-            self._flush_buffer()
-        self._check_rotation()
+        if self._queue is not None:
+            self._enqueue((timestamp, sensor_id, value, unit))
+            return
+        with self._write_lock:
+            self.buffer.append((timestamp, sensor_id, value, unit))
+            if len(self.buffer) >= self.buffer_size:
+                self._flush_buffer()
+            self._check_rotation()
 
     def log_and_send(self, sensor_id, timestamp, value, unit):
         self.log_reading(sensor_id, timestamp, value, unit)
+        self.send_reading(sensor_id, timestamp, value, unit)
+
+    def send_reading(self, sensor_id, timestamp, value, unit):
+        if not self.network_client:
+            return
+        reading = {
+            "timestamp": timestamp.isoformat(),
+            "sensor_id": sensor_id,
+            "value": value,
+            "unit": unit
+        }
+        if self.spool:
+            self.spool.append(reading)
+            return
+        if self._batcher:
+            self._batcher.add(reading)
+            return
+        if not self.network_client.send(reading):
+            _sampled_log.warning('send', "[Logger] Błąd wysyłania danych do serwera: żaden serwer nie jest dostępny")
+
+    def write_batch(self, entries, sync=False):
+        # Zapis gotowych wpisów (timestamp, sensor_id, value, unit) jednym flushem,
+        # z pominięciem bufora i kolejki; sync=True - dane są na dysku po powrocie,
+        # niezależnie od polityki fsync. Pusta lista wykonuje tylko zaległy fsync i rotację.
+        self.buffer.extend(entries)
         try:
-            self.network_client.send({
-                "timestamp": timestamp.isoformat(),
-                "sensor_id": sensor_id,
-                "value": value,
-                "unit": unit
-            })
-        except Exception as e:
-            print(f"[Logger] Błąd wysyłania danych do serwera: {e}")
+            self._flush_buffer()
+        except Exception:
+            self.buffer.clear()
+            raise
+        if sync and self.current_file:
+            os.fsync(self.current_file.fileno())
+            self.last_fsync = time.monotonic()
+            self.unsynced = False
+        if entries:
+            self.commits += 1
+        self._check_rotation()
+
+    def _enqueue(self, entry):
+        if self.overflow_policy == 'block':
+            self._queue.put(entry)
+            return
+        while True:
+            try:
+                self._queue.put_nowait(entry)
+                return
+            except queue.Full:
+                if self.overflow_policy == 'drop_newest':
+                    with self._drop_lock:
+                        self.dropped_rows += 1
+                    return
+            # drop_oldest: robimy miejsce, wyrzucając najstarszy wpis
+            try:
+                oldest = self._queue.get_nowait()
+            except queue.Empty:
+                continue
+            if oldest is _STOP:
+                self._queue.put(_STOP)
+                return
+            with self._drop_lock:
+                self.dropped_rows += 1
+
+    def _writer_loop(self):
+        while True:
+            try:
+                entry = self._queue.get(timeout=1.0)
+            except queue.Empty:
+                # Brak danych, ale zaległy fsync i rotacja czasowa nadal muszą się wykonać
+                try:
+                    self._sync_file()
+                    self._check_rotation()
+                except Exception as e:
+                    print(f"[Logger] Błąd zapisu w wątku zapisującym: {e}")
+                continue
+
+            # Group commit: zabieramy wszystko, co czeka w kolejce, i zapisujemy jednym flushem
+            stopping = entry is _STOP
+            if not stopping:
+                self.buffer.append(entry)
+            while not stopping:
+                try:
+                    entry = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if entry is _STOP:
+                    stopping = True
+                else:
+                    self.buffer.append(entry)
+            try:
+                self._flush_buffer()
+                self.commits += 1
+                self._check_rotation()
+            except Exception as e:
+                print(f"[Logger] Błąd zapisu w wątku zapisującym: {e}")
+            if stopping:
+                return
+
+    def _sync_file(self):
+        if self.fsync == 'never' or not self.unsynced or not self.current_file:
+            return
+        now = time.monotonic()
+        if self.fsync == 'always' or now - self.last_fsync >= self.fsync_interval_seconds:
+            os.fsync(self.current_file.fileno())
+            self.last_fsync = now
+            self.unsynced = False
 
     def _flush_buffer(self):
-        if not self.current_file:
-            self._open_file()
-        writer = csv.writer(self.current_file)
-        for entry in self.buffer:
-            writer.writerow([entry[0].isoformat(), entry[1], entry[2], entry[3]])
-            self.line_count += 1
-            self.current_size += len(f"{entry[0]},{entry[1]},{entry[2]},{entry[3]}\n".encode())
+        if self.read_only:
+            if self.buffer:
+                raise RuntimeError("Logger otwarty tylko do odczytu")
+            return
+        started = time.perf_counter()
+        rows = len(self.buffer)
+        if self.storage:
+            # cały bufor (buffer_size odczytów) to jedna transakcja w bazie
+            self.storage.write(self.buffer)
+        else:
+            if not self.current_file:
+                self._open_file()
+            if self.buffer:
+                self._write_rows([entry[0].isoformat(), entry[1], entry[2], entry[3]] for entry in self.buffer)
+                self.line_count += len(self.buffer)
+        if self.rollups:
+            # dopiero po zapisie surowych wierszy - rebuild() może na nich polegać
+            for timestamp, sensor_id, value, _ in self.buffer:
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    self.rollups.add(sensor_id, timestamp.timestamp(), value)
         self.buffer.clear()
-        self.current_file.flush()
+        if self.current_file:
+            self.current_file.flush()
+            # pusty flush (np. bezczynny write_batch([])) nie oznacza nowych danych do fsync;
+            # _sync_file() wykonuje wtedy tylko zaległy fsync wcześniejszych wierszy
+            if rows:
+                self.unsynced = True
+            self._sync_file()
+        if rows:
+            self._rows_written.inc(rows)
+            self._flush_latency.record(time.perf_counter() - started)
+
+    def _write_rows(self, rows):
+        # Wiersze formatujemy raz, a rozmiar pliku liczymy z faktycznie zapisanych bajtów
+        out = io.StringIO()
+        csv.writer(out).writerows(rows)
+        data = out.getvalue().encode('utf-8')
+        self.current_file.write(data)
+        self.current_size += len(data)
+        self._bytes_written.inc(len(data))
 
     def _open_file(self):
-        self.current_filename = datetime.now().strftime(self.filename_pattern)
+        now = datetime.now()
+        self.current_filename = now.strftime(self.filename_pattern)
         file_path = os.path.join(self.log_dir, self.current_filename)
-        file_exists = os.path.exists(file_path)
-        self.current_file = open(file_path, 'a', newline='')
-        if not file_exists:
-            writer = csv.writer(self.current_file)
-            writer.writerow(['timestamp', 'sensor_id', 'value', 'unit'])
-            self.current_size = os.path.getsize(file_path)
+        if os.path.exists(file_path):
+            removed = _truncate_partial_row(file_path)
+            if removed:
+                print(f"[Logger] Usunięto niepełny wiersz ({removed} B) z końca {file_path}")
+        self.current_file = open(file_path, 'ab')
+        self.current_size = os.fstat(self.current_file.fileno()).st_size
+        state = _load_index(self.state_path)
+        self.next_rotation_time = now + timedelta(hours=self.rotate_every_hours)
+        if not self.current_size:
+            self._write_rows([['timestamp', 'sensor_id', 'value', 'unit']])
             self.line_count = 0
+        elif (state and state.get('filename') == self.current_filename
+                and state.get('size', 0) <= self.current_size):
+            # Plik z poprzedniego uruchomienia: stan zapisany przy zatrzymaniu,
+            # doliczamy tylko wiersze dopisane później (np. przed awarią)
+            self.line_count = state['line_count'] + _count_lines(file_path, state['size'])
+            self.next_rotation_time = datetime.fromisoformat(state['next_rotation_time'])
         else:
-            self.current_size = os.path.getsize(file_path)
-            with open(file_path, 'r') as f:
-                self.line_count = sum(1 for _ in f) - 1
-        self.next_rotation_time = datetime.now() + timedelta(hours=self.rotate_every_hours)
+            self.line_count = _count_lines(file_path) - 1
+        self._save_state()
+
+    def _save_state(self):
+        _save_index(self.state_path, {
+            'filename': self.current_filename,
+            'size': self.current_size,
+            'line_count': self.line_count,
+            'next_rotation_time': self.next_rotation_time.isoformat(),
+        })
 
     def _check_rotation(self):
+        if self.storage:
+            # baza nie rotuje plików; retencję robi sam backend, usuwając partycje
+            return
         now = datetime.now()
         if (now >= self.next_rotation_time or
                 self.current_size >= self.max_size_mb * 1024 ** 2 or
@@ -123,6 +611,7 @@ class Logger:
             self._rotate()
 
     def _rotate(self):
+        started = time.perf_counter()
         self._flush_buffer()
         if self.current_file:
             self.current_file.close()
@@ -130,22 +619,267 @@ class Logger:
         if self.current_filename:
             source = os.path.join(self.log_dir, self.current_filename)
             if os.path.exists(source):
-                self._archive_file(source)
-                self._clean_old_archives()
+                # Przenosimy plik do archiwum od razu (nowy plik może mieć tę samą
+                # nazwę), a kompresja idzie w tle; do tego czasu read_logs czyta CSV
+                pending = self._pending_path(os.path.basename(source))
+                os.replace(source, pending)
+                if os.path.exists(source + INDEX_SUFFIX):
+                    os.replace(source + INDEX_SUFFIX, pending + INDEX_SUFFIX)
+                self._submit_archive(pending)
         self._open_file()
+        self._rotation_latency.record(time.perf_counter() - started)
+
+    def _archive_suffix(self):
+        if self.archive_format == 'parquet':
+            return columnar.PARQUET_SUFFIX
+        return compression.suffix(self.archive_codec)
+
+    def _pending_path(self, filename):
+        # Nazwa w archiwum, która nie nadpisze wcześniejszego pliku o tej samej nazwie
+        archive_dir = os.path.join(self.log_dir, 'archive')
+        stem, ext = os.path.splitext(filename)
+        candidate, n = filename, 0
+        while any(os.path.exists(os.path.join(archive_dir, candidate + suffix))
+                  for suffix in ('',) + ARCHIVE_SUFFIXES):
+            n += 1
+            candidate = f"{stem}-{n}{ext}"
+        return os.path.join(archive_dir, candidate)
+
+    def _submit_archive(self, pending):
+        archive_path = pending + self._archive_suffix()
+        codec = 'parquet' if self.archive_format == 'parquet' else self.archive_codec
+        args = (pending, archive_path, codec, self.archive_level, self.index_every_rows,
+                self.parquet_row_group_rows, self.parquet_compression)
+        with self._archive_lock:
+            self._archives_pending += 1
+        if not self.archive_workers:
+            try:
+                result = _archive_job(*args)
+            except Exception as e:
+                self._archive_finished(pending, archive_path, None, e)
+            else:
+                self._archive_finished(pending, archive_path, result, None)
+            return
+        if self._archive_pool is None:
+            # spawn: fork z procesu z działającymi wątkami (zapis, wysyłka, metryki)
+            # mógłby skopiować zajętą blokadę i zakleszczyć proces potomny
+            self._archive_pool = ProcessPoolExecutor(max_workers=self.archive_workers,
+                                                     mp_context=multiprocessing.get_context('spawn'))
+        future = self._archive_pool.submit(_archive_job, *args)
+        future.add_done_callback(
+            lambda f: self._archive_finished(pending, archive_path, *(
+                (None, f.exception()) if f.exception() else (f.result(), None))))
+
+    def _archive_finished(self, pending, archive_path, result, error):
+        with self._archive_lock:
+            try:
+                if error is not None:
+                    # plik źródłowy zostaje w archiwum i będzie ponowiony przy następnym starcie
+                    print(f"[Logger] Błąd archiwizacji {pending}: {error}")
+                    return
+                for path in (pending, pending + INDEX_SUFFIX):
+                    if os.path.exists(path):
+                        os.remove(path)
+                totals = self.archive_stats.setdefault(
+                    result['codec'], {'files': 0, 'bytes_in': 0, 'bytes_out': 0, 'seconds': 0.0})
+                totals['files'] += 1
+                for key in ('bytes_in', 'bytes_out', 'seconds'):
+                    totals[key] += result[key]
+                self._register_archive(archive_path)
+                self._clean_old_archives()
+            finally:
+                self._archives_pending -= 1
+                self._archives_done.notify_all()
+
+    def wait_for_archives(self, timeout=None):
+        with self._archive_lock:
+            return self._archives_done.wait_for(lambda: not self._archives_pending, timeout)
 
-    def _archive_file(self, source):
-        archive_path = os.path.join(self.log_dir, 'archive', os.path.basename(source) + '.zip')
-        with zipfile.ZipFile(archive_path, 'w') as zf:
-            zf.write(source, os.path.basename(source))
-        os.remove(source)
+    def _retention_index(self):
+        # Archiwa posortowane po czasie archiwizacji, czyli też po terminie
+        # wygaśnięcia; przy sprzątaniu zdejmujemy tylko początek listy
+        if self._retention is None:
+            archive_dir = os.path.join(self.log_dir, 'archive')
+            index = _load_index(os.path.join(archive_dir, RETENTION_FILE))
+            if index is None:
+                # pierwsze uruchomienie z indeksem - jednorazowo przeglądamy katalog
+                index = {'archives': sorted(
+                    [os.path.getmtime(os.path.join(archive_dir, name)), name]
+                    for name in os.listdir(archive_dir) if name.endswith(ARCHIVE_SUFFIXES))}
+                _save_index(os.path.join(archive_dir, RETENTION_FILE), index)
+            self._retention = index
+        return self._retention['archives']
+
+    def _register_archive(self, path):
+        name = os.path.basename(path)
+        archives = self._retention_index()
+        # archiwum o tej samej nazwie mogło zostać właśnie nadpisane
+        archives[:] = [entry for entry in archives if entry[1] != name]
+        bisect.insort(archives, [os.path.getmtime(path), name])
+        _save_index(os.path.join(self.log_dir, 'archive', RETENTION_FILE), self._retention)
 
     def _clean_old_archives(self):
-        cutoff = datetime.now() - timedelta(days=self.retention_days)
+        cutoff = (datetime.now() - timedelta(days=self.retention_days)).timestamp()
         archive_dir = os.path.join(self.log_dir, 'archive')
-        for filename in os.listdir(archive_dir):
-            if filename.endswith('.zip'):
+        archives = self._retention_index()
+        expired = 0
+        while expired < len(archives) and archives[expired][0] < cutoff:
+            path = os.path.join(archive_dir, archives[expired][1])
+            for name in (path, path + INDEX_SUFFIX):
+                if os.path.exists(name):
+                    os.remove(name)
+            expired += 1
+        if expired:
+            del archives[:expired]
+            _save_index(os.path.join(archive_dir, RETENTION_FILE), self._retention)
+
+    def query_rollups(self, sensor_id, start: datetime, end: datetime, resolution: int = 3600):
+        if not self.rollups:
+            raise RuntimeError("Agregaty są wyłączone (ustaw 'rollups': true w konfiguracji)")
+        buckets = self.rollups.query(sensor_id, start.timestamp(), end.timestamp(), resolution)
+        for bucket in buckets:
+            bucket['start'] = datetime.fromtimestamp(bucket['start'])
+        return buckets
+
+    def _rebuild_rollups(self):
+        # Po awarii (albo przy pierwszym włączeniu) przeliczamy agregaty z surowych logów
+        start = datetime.fromtimestamp(self.rollups.rebuild_from())
+        readings = ((row['sensor_id'], row['timestamp'].timestamp(), row['value'])
+                    for row in self.read_logs(start, datetime.now() + timedelta(days=1)))
+        count = self.rollups.rebuild(readings)
+        print(f"[Logger] Odtworzono agregaty z {count} odczytów od {start}")
+
+    def last_reading(self, sensor_id: str):
+        # Ostatni zapisany odczyt czujnika (albo None). W bazie to jedno wyszukanie
+        # w indeksie; pliki CSV trzeba w tym celu przeczytać w całości
+        if self.storage:
+            return self.storage.last(sensor_id)
+        last = None
+        for row in self.read_logs(datetime.fromtimestamp(0), datetime.now() + timedelta(days=1), sensor_id):
+            if last is None or row['timestamp'] >= last['timestamp']:
+                last = row
+        return last
+
+    def read_logs(self, start: datetime, end: datetime, sensor_id: str = None):
+        start_ts, end_ts = start.timestamp(), end.timestamp()
+        if self.storage:
+            yield from self.storage.read(start_ts, end_ts, sensor_id)
+            return
+        sources = []
+        for filename in os.listdir(self.log_dir):
+            if filename.endswith('.csv'):
+                path = os.path.join(self.log_dir, filename)
+                sources.append((path, self._csv_index(path)))
+        archive_dir = os.path.join(self.log_dir, 'archive')
+        if os.path.isdir(archive_dir):
+            filenames = os.listdir(archive_dir)
+            # pliki po rotacji, które czekają na kompresję; dopóki istnieją, czytamy je
+            # zamiast archiwum, które może być jeszcze w trakcie podmiany
+            pending = {filename for filename in filenames if filename.endswith('.csv')}
+            for filename in filenames:
                 path = os.path.join(archive_dir, filename)
-                mtime = datetime.fromtimestamp(os.path.getmtime(path))
-                if mtime < cutoff:
-                    os.remove(path)
+                if filename in pending:
+                    try:
+                        sources.append((path, self._csv_index(path)))
+                        continue
+                    except FileNotFoundError:
+                        # kompresja właśnie się skończyła
+                        path += self._archive_suffix()
+                        filename = os.path.basename(path)
+                elif filename.endswith(ARCHIVE_SUFFIXES) and filename[:filename.rindex('.')] in pending:
+                    continue
+                if filename.endswith(compression.SUFFIXES):
+                    sources.append((path, self._zip_index(path)))
+                elif filename.endswith(columnar.PARQUET_SUFFIX) and columnar.pa is not None:
+                    sources.append((path, self._parquet_index(path)))
+
+        # Otwieramy tylko pliki, których zakres czasu nachodzi na zapytanie
+        sources = [(path, index) for path, index in sources
+                   if index and index['blocks']
+                   and index['max_ts'] >= start_ts and index['min_ts'] <= end_ts]
+        sources.sort(key=lambda s: s[1]['min_ts'])
+
+        for path, index in sources:
+            if index.get('format') == 'parquet' or 'member' in index:
+                yield from self._read_archive(path, start_ts, end_ts, sensor_id, index)
+            else:
+                try:
+                    f = open(path, 'rb')
+                except FileNotFoundError:
+                    # plik z archiwum, skompresowany między listowaniem a odczytem
+                    archive_path = path + self._archive_suffix()
+                    if path.startswith(archive_dir) and os.path.exists(archive_path):
+                        yield from self._read_archive(archive_path, start_ts, end_ts, sensor_id)
+                    continue
+                with f:
+                    yield from _read_blocks(f, index, start_ts, end_ts, sensor_id)
+
+    def _read_archive(self, path, start_ts, end_ts, sensor_id=None, index=None):
+        if path.endswith(columnar.PARQUET_SUFFIX):
+            yield from columnar.read_parquet(path, start_ts, end_ts, sensor_id)
+            return
+        index = index or self._zip_index(path)
+        if index:
+            with compression.open_stream(path, index.get('codec', 'deflate'), index['member']) as f:
+                yield from _read_blocks(f, index, start_ts, end_ts, sensor_id)
+
+    def _csv_index(self, path):
+        index_path = path + INDEX_SUFFIX
+        size = os.path.getsize(path)
+        index = _load_index(index_path)
+        if index and index.get('size') == size and index.get('every') == self.index_every_rows:
+            return index
+
+        # Plik jest tylko dopisywany, więc wystarczy doczytać od ostatniego bloku
+        blocks, offset = [], 0
+        if (index and index.get('every') == self.index_every_rows
+                and index.get('size', 0) < size and index['blocks']):
+            blocks, offset = index['blocks'][:-1], index['blocks'][-1][0]
+        with open(path, 'rb') as f:
+            new_blocks, length = _scan_blocks(f, offset, self.index_every_rows)
+        index = _make_index(blocks + new_blocks, length, size, self.index_every_rows)
+        if not self.read_only:
+            # tylko do odczytu: indeks zostaje w pamięci (katalog może być tylko do odczytu,
+            # a plik .idx należy do Loggera, który do niego pisze)
+            _save_index(index_path, index)
+        return index
+
+    def _parquet_index(self, path):
+        # Parquet ma własne statystyki grup wierszy - z nich bierzemy tylko zakres czasu pliku
+        try:
+            time_range = columnar.parquet_time_range(path)
+        except Exception as e:
+            print(f"[Logger] Nie można odczytać archiwum {path}: {e}")
+            return None
+        if time_range is None:
+            return None
+        return {'format': 'parquet', 'blocks': [time_range], 'min_ts': time_range[0], 'max_ts': time_range[1]}
+
+    def _zip_index(self, path):
+        index_path = path + INDEX_SUFFIX
+        size = os.path.getsize(path)
+        index = _load_index(index_path)
+        if index and index.get('size') == size and 'member' in index:
+            return index
+
+        # Archiwum bez indeksu (np. sprzed wprowadzenia indeksów) - budujemy raz
+        try:
+            if path.endswith('.zip'):
+                with zipfile.ZipFile(path) as zf:
+                    member = zf.namelist()[0]
+                    codec = next(name for name, value in compression.ZIP_CODECS.items()
+                                 if value == zf.getinfo(member).compress_type)
+            else:
+                codec = next(name for name, suffix in compression.STREAM_CODECS.items()
+                             if path.endswith(suffix))
+                member = os.path.basename(path)[:-len(compression.suffix(codec))]
+            with compression.open_stream(path, codec, member) as f:
+                blocks, length = _scan_blocks(f, 0, self.index_every_rows)
+        except (zipfile.BadZipFile, IndexError, StopIteration, OSError, ImportError) as e:
+            print(f"[Logger] Nie można odczytać archiwum {path}: {e}")
+            return None
+        index = _make_index(blocks, length, size, self.index_every_rows, member=member)
+        index['codec'] = codec
+        if not self.read_only:
+            _save_index(index_path, index)
+        return index
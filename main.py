@@ -1,33 +1,90 @@
+import json
+import sys
 import time
-from datetime import datetime
+from fanout import Subscriber
 from logger import Logger
+from metrics import MetricsServer, SnapshotWriter
+from scheduler import SensorScheduler
 from sensors import TemperatureSensor, PressureSensor, LightSensor, AirQualitySensor
 
-CONFIG_PATH = "logger_config.json"
-SERVER_HOST = "localhost"
-SERVER_PORT = 9000
+SENSOR_TYPES = {
+    cls.__name__: cls for cls in (TemperatureSensor, PressureSensor, LightSensor, AirQualitySensor)
+}
 
-logger = Logger(CONFIG_PATH, SERVER_HOST, SERVER_PORT)
-logger.start()
 
-temperature_sensor = TemperatureSensor()
-pressure_sensor = PressureSensor()
-light_sensor = LightSensor()
-air_quality_sensor = AirQualitySensor()
+def main():
+    # Pod strażnikiem __main__: procesy archiwizacji (spawn) importują ten moduł ponownie
+    config_path = sys.argv[1] if len(sys.argv) > 1 else "simulation_config.json"
 
-for sensor in [temperature_sensor, pressure_sensor, light_sensor, air_quality_sensor]:
-    sensor.register_callback(logger.log_and_send)
+    with open(config_path) as f:
+        config = json.load(f)
 
-try:
-    while True:
-        now = datetime.now()
-        temperature_sensor.get_reading(now)
-        pressure_sensor.get_reading()
-        light_sensor.get_reading(now.hour)
-        air_quality_sensor.get_reading()
+    logger = Logger(config.get("logger_config", "logger_config.json"),
+                    config.get("server_host", "localhost"), config.get("server_port", 9000))
+    logger.start()
 
-        time.sleep(10)
+    # Metryki: endpoint HTTP (/metrics, /metrics.json) i okresowy snapshot do pliku JSON
+    metrics_config = config.get("metrics", {})
+    metrics_server = snapshot_writer = None
+    if metrics_config.get("port"):
+        metrics_server = MetricsServer(metrics_config["port"], metrics_config.get("host", "127.0.0.1"))
+        metrics_server.start()
+    if metrics_config.get("snapshot_file"):
+        snapshot_writer = SnapshotWriter(metrics_config["snapshot_file"], metrics_config.get("snapshot_interval", 10))
+        snapshot_writer.start()
 
-except KeyboardInterrupt:
-    print("Zatrzymywanie programu...")
-    logger.stop()
+    scheduler = SensorScheduler(config.get("dispatch", "inline"), config.get("workers", 4))
+
+    # Z sekcją "sinks" zapis CSV i wysyłka do serwera mają osobne kolejki i wątki,
+    # więc zawieszone połączenie nie wstrzymuje ani zapisu, ani próbkowania.
+    # Subskrybenci są wspólni dla wszystkich czujników.
+    sinks = config.get("sinks")
+    if sinks:
+        callbacks = [
+            Subscriber(logger.log_reading, name="csv", **sinks.get("csv", {})),
+            Subscriber(logger.send_reading, name="network", **sinks.get("network", {})),
+        ]
+    else:
+        callbacks = [logger.log_and_send]
+
+    # Każdy wpis może opisywać wiele czujników tego samego typu ("count"),
+    # wtedy dostają nazwy Typ-0, Typ-1, ... i rozłożone w czasie pierwsze odczyty
+    for entry in config["sensors"]:
+        cls = SENSOR_TYPES[entry["type"]]
+        count = entry.get("count", 1)
+        interval = entry.get("interval", 10)
+        for i in range(count):
+            name = entry.get("name", cls.__name__) if count == 1 else f"{cls.__name__}-{i}"
+            seed = entry["seed"] + i if "seed" in entry else None
+            sensor = cls(seed=seed, name=name)
+            for callback in callbacks:
+                sensor.register_callback(callback)
+            scheduler.add(sensor, interval, offset=interval * i / count)
+
+    scheduler.start()
+
+    try:
+        while True:
+            time.sleep(config.get("stats_every_seconds", 60))
+            print(f"[Scheduler] {scheduler.stats()}")
+            for callback in callbacks:
+                if isinstance(callback, Subscriber):
+                    stats = callback.stats()
+                    print(f"[{stats['name']}] dostarczono {stats['delivered']}, odrzucono {stats['dropped']}, "
+                          f"p99 kolejki {stats['queue_latency']['p99']}, p99 wywołania {stats['call_latency']['p99']}")
+
+    except KeyboardInterrupt:
+        print("Zatrzymywanie programu...")
+        scheduler.stop()
+        for callback in callbacks:
+            if isinstance(callback, Subscriber):
+                callback.close()
+        logger.stop()
+        if snapshot_writer:
+            snapshot_writer.stop()
+        if metrics_server:
+            metrics_server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,349 @@
+import json
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Metryki procesu: liczniki, wskaźniki (gauge) i histogramy opóźnień.
+# Zapis jest tani (bez blokad i alokacji na gorącej ścieżce); przy wyścigu
+# wątków licznik może zgubić pojedyncze zwiększenie, co dla metryk jest
+# akceptowalne. Odczyt - snapshot(), tekst dla /metrics albo plik JSON.
+
+
+def _key(name: str, labels: dict = None) -> str:
+    if not labels:
+        return name
+    return name + '{' + ','.join(f'{k}="{v}"' for k, v in sorted(labels.items())) + '}'
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, n=1) -> None:
+        self.value += n
+
+    def snapshot(self):
+        return self.value
+
+
+class Meter(Counter):
+    # Licznik z częstością z ostatnich `window` pełnych sekund
+    kind = 'meter'
+
+    def __init__(self, window: int = 10):
+        super().__init__()
+        self.window = window
+        self._slots = [0] * (window + 1)
+        self._second = int(time.monotonic())
+
+    def inc(self, n=1) -> None:
+        self.value += n
+        second = int(time.monotonic())
+        if second != self._second:
+            self._advance(second)
+        self._slots[second % len(self._slots)] += n
+
+    def rate(self) -> float:
+        second = int(time.monotonic())
+        if second != self._second:
+            self._advance(second)
+        # bieżąca, niepełna sekunda nie jest liczona
+        return (sum(self._slots) - self._slots[second % len(self._slots)]) / self.window
+
+    def _advance(self, second: int) -> None:
+        slots = len(self._slots)
+        for s in range(self._second + 1, min(second, self._second + slots) + 1):
+            self._slots[s % slots] = 0
+        self._second = second
+
+    def snapshot(self):
+        return {'count': self.value, 'per_second': self.rate()}
+
+
+class Gauge:
+    # Wartość ustawiana przez set() albo liczona przy odczycie przez `fn`
+    kind = 'gauge'
+
+    def __init__(self, fn=None):
+        self.value = 0
+        self.fn = fn
+
+    def set(self, value) -> None:
+        self.value = value
+
+    def snapshot(self):
+        if self.fn is not None:
+            try:
+                return self.fn()
+            except Exception:
+                return None
+        return self.value
+
+
+class Histogram:
+    # Histogram w stylu HDR: kubełki logarytmiczne (potęgi dwójki) podzielone
+    # na SUB liniowych podkubełków, czyli błąd względny percentyli ok. 1/SUB.
+    # Wartości w mikrosekundach do ~2^40 us; zapis to kilka operacji na intach.
+    kind = 'histogram'
+    SUB_BITS = 4
+    SUB = 1 << SUB_BITS
+    SIZE = 40 * SUB
+
+    def __init__(self):
+        self.counts = [0] * self.SIZE
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        value = int(seconds * 1e6)
+        if value < 32:
+            index = value if value > 0 else 0
+        else:
+            # stałe rozpisane dla SUB_BITS = 4 (gorąca ścieżka)
+            shift = value.bit_length() - 5
+            index = (shift << 4) + (value >> shift)
+            if index >= 640:
+                index = 639
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def time(self):
+        return _Timer(self)
+
+    @classmethod
+    def _upper(cls, index: int) -> float:
+        # Górna granica kubełka (w sekundach)
+        if index < 2 * cls.SUB:
+            return (index + 1) / 1e6
+        shift, sub = divmod(index, cls.SUB)
+        return ((cls.SUB + sub + 1) << (shift - 1)) / 1e6
+
+    def percentile(self, q: float):
+        if not self.count:
+            return None
+        rank = q / 100 * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                return min(self._upper(index), self.max)
+        return self.max
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else None,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'p999': self.percentile(99.9),
+            'max': self.max,
+        }
+
+
+class _Timer:
+    __slots__ = ('histogram', 'started')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.record(time.perf_counter() - self.started)
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, labels, **options):
+        key = _key(name, labels)
+        metric = self._metrics.get(key)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(key)
+                if metric is None:
+                    metric = self._metrics[key] = cls(**options)
+        elif not isinstance(metric, cls):
+            raise ValueError(f"Metryka {key} jest już zarejestrowana jako {metric.kind}")
+        return metric
+
+    def counter(self, name: str, labels: dict = None) -> Counter:
+        return self._get(Counter, name, labels)
+
+    def meter(self, name: str, labels: dict = None) -> Meter:
+        return self._get(Meter, name, labels)
+
+    def gauge(self, name: str, labels: dict = None, fn=None) -> Gauge:
+        gauge = self._get(Gauge, name, labels)
+        if fn is not None:
+            gauge.fn = fn
+        return gauge
+
+    def histogram(self, name: str, labels: dict = None) -> Histogram:
+        return self._get(Histogram, name, labels)
+
+    def remove(self, name: str, labels: dict = None) -> None:
+        with self._lock:
+            self._metrics.pop(_key(name, labels), None)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            metrics = list(self._metrics.items())
+        return {key: metric.snapshot() for key, metric in sorted(metrics)}
+
+    def render_text(self) -> str:
+        # Format tekstowy zgodny z Prometheusem (histogramy jako podsumowania z kwantylami)
+        lines = []
+        for key, value in self.snapshot().items():
+            name, _, labels = key.partition('{')
+            labels = labels.rstrip('}')
+            if isinstance(value, dict) and 'p50' in value:
+                for q in ('p50', 'p90', 'p99', 'p999'):
+                    if value[q] is not None:
+                        lines.append(_line(name, labels, value[q], f'quantile="0.{q[1:]}"'))
+                lines.append(_line(name + '_count', labels, value['count']))
+                lines.append(_line(name + '_sum', labels, value['mean'] * value['count'] if value['count'] else 0))
+            elif isinstance(value, dict):
+                lines.append(_line(name + '_total', labels, value['count']))
+                lines.append(_line(name + '_per_second', labels, value['per_second']))
+            elif isinstance(value, (int, float)):
+                lines.append(_line(name, labels, value))
+        return '\n'.join(lines) + '\n'
+
+
+def _line(name: str, labels: str, value, extra: str = None) -> str:
+    labels = ','.join(filter(None, (labels, extra)))
+    return f'{name}{{{labels}}} {value}' if labels else f'{name} {value}'
+
+
+REGISTRY = Registry()
+counter = REGISTRY.counter
+meter = REGISTRY.meter
+gauge = REGISTRY.gauge
+histogram = REGISTRY.histogram
+
+
+class SampledLog:
+    # Logowanie zdarzeń z gorącej ścieżki: dla danego klucza co najwyżej jeden
+    # wpis na `interval` sekund, z liczbą pominiętych od poprzedniego wpisu.
+    # Argumenty są formatowane tylko wtedy, gdy wpis faktycznie powstaje.
+    def __init__(self, logger: logging.Logger, interval: float = 10.0):
+        self.logger = logger
+        self.interval = interval
+        self._next = {}
+        self._suppressed = {}
+
+    def log(self, level: int, key, msg: str, *args) -> None:
+        if not self.logger.isEnabledFor(level):
+            return
+        now = time.monotonic()
+        if now < self._next.get(key, 0):
+            self._suppressed[key] = self._suppressed.get(key, 0) + 1
+            return
+        self._next[key] = now + self.interval
+        suppressed = self._suppressed.pop(key, 0)
+        if suppressed:
+            msg += f' (+{suppressed} similar in last {self.interval:g}s)'
+        self.logger.log(level, msg, *args)
+
+    def info(self, key, msg: str, *args) -> None:
+        self.log(logging.INFO, key, msg, *args)
+
+    def debug(self, key, msg: str, *args) -> None:
+        self.log(logging.DEBUG, key, msg, *args)
+
+    def warning(self, key, msg: str, *args) -> None:
+        self.log(logging.WARNING, key, msg, *args)
+
+    def error(self, key, msg: str, *args) -> None:
+        self.log(logging.ERROR, key, msg, *args)
+
+
+class MetricsServer:
+    # Lokalny endpoint HTTP: /metrics (tekst) i /metrics.json
+    def __init__(self, port: int = 9100, host: str = '127.0.0.1', registry: Registry = REGISTRY):
+        registry_ = registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == '/metrics':
+                    body, content_type = registry_.render_text().encode(), 'text/plain; version=0.0.4'
+                elif self.path == '/metrics.json':
+                    body, content_type = json.dumps(registry_.snapshot()).encode(), 'application/json'
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self._httpd.daemon_threads = True
+        self.port = self._httpd.server_address[1]
+        self._thread = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='metrics-http', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+
+class SnapshotWriter:
+    # Co `interval` sekund zapisuje snapshot metryk do pliku JSON (atomowo)
+    def __init__(self, path: str, interval: float = 10.0, registry: Registry = REGISTRY):
+        self.path = path
+        self.interval = interval
+        self.registry = registry
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name='metrics-snapshot', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self.write()
+
+    def write(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'time': time.time(), 'metrics': self.registry.snapshot()}, f, indent=1)
+        os.replace(tmp_path, self.path)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.write()
+            except OSError as e:
+                print(f"[Metrics] Błąd zapisu snapshotu {self.path}: {e}")
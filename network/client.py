@@ -1,8 +1,99 @@
 import socket
+import select
 import json
 import logging
+import threading
 import time
-from typing import Optional
+from collections import OrderedDict
+from typing import Callable, Optional
+
+import metrics
+from network.protocol import BINARY_FORMAT, JSON_FORMAT, BinaryEncoder, hello_message
+
+
+class BatchSender:
+    # Zbiera odczyty i wysyła je jako jedną wiadomość {"type": "batch", "readings": [...]}
+    # po uzbieraniu `batch_size` odczytów albo po `linger` sekundach od pierwszego z nich.
+    def __init__(
+        self,
+        send: Callable[[dict], bool],
+        batch_size: int = 500,
+        linger: float = 0.05,
+        logger: Optional[logging.Logger] = None,
+        labels: Optional[dict] = None
+    ):
+        self._send = send
+        self.batch_size = batch_size
+        self.linger = linger
+        self.logger = logger or logging.getLogger(__name__)
+        # Paczki, których nie udało się wysłać (po ponowieniach klienta), są tracone - liczymy je
+        self.failed_batches = 0
+        self.failed_readings = 0
+        self._failed_batches = metrics.counter("batch_sender_failed_batches", labels)
+        self._failed_readings = metrics.counter("batch_sender_failed_readings", labels)
+        self._batch = []
+        self._deadline = None
+        self._cond = threading.Condition()
+        self._send_lock = threading.Lock()
+        self._thread = None
+        self._closing = False
+
+    def add(self, reading: dict) -> None:
+        with self._cond:
+            self._batch.append(reading)
+            full = len(self._batch) >= self.batch_size
+            if not full and len(self._batch) == 1:
+                self._deadline = time.monotonic() + self.linger
+                if not self._thread or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, daemon=True)
+                    self._thread.start()
+                self._cond.notify()
+        if full:
+            self.flush()
+
+    def flush(self) -> bool:
+        # Blokada wysyłki obejmuje pobranie paczki, więc paczki nie zmienią kolejności
+        with self._send_lock:
+            with self._cond:
+                batch, self._batch = self._batch, []
+                self._deadline = None
+            if not batch:
+                return True
+            try:
+                if self._send({"type": "batch", "readings": batch}):
+                    return True
+                error = "no server accepted the batch"
+            except Exception as e:
+                error = e
+            self.failed_batches += 1
+            self.failed_readings += len(batch)
+            self._failed_batches.inc()
+            self._failed_readings.inc(len(batch))
+            self.logger.error(f"Batch of {len(batch)} readings lost: {error}")
+            return False
+
+    def close(self) -> bool:
+        with self._cond:
+            self._closing = True
+            self._cond.notify()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self._closing = False
+        return self.flush()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._closing and (
+                        self._deadline is None or self._deadline > time.monotonic()):
+                    timeout = None if self._deadline is None else self._deadline - time.monotonic()
+                    self._cond.wait(timeout)
+                if self._closing:
+                    return
+            # błędy wysyłki loguje i liczy flush()
+            self.flush()
+
 
 class NetworkClient:
     def __init__(
@@ -11,7 +102,14 @@ class NetworkClient:
         port: int,
         timeout: float = 5.0,
         retries: int = 3,
-        logger: Optional[logging.Logger] = None
+        logger: Optional[logging.Logger] = None,
+        window: int = 1,
+        retry_delay: float = 1.0,
+        batch_size: int = 1,
+        linger: float = 0.05,
+        wire_format: str = JSON_FORMAT,
+        nodelay: bool = True,
+        keepalive: Optional[float] = 30.0
     ):
         self.host = host
         self.port = port
@@ -20,6 +118,39 @@ class NetworkClient:
         self.sock: Optional[socket.socket] = None
         self.logger = logger or logging.getLogger(__name__)
         self.connected = False
+        # window > 1 włącza tryb potokowy: do `window` wiadomości czeka na ACK
+        self.window = window
+        self.retry_delay = retry_delay
+        self._seq = 0
+        self._inflight: "OrderedDict[int, dict]" = OrderedDict()
+        self._sent_at = {}
+        self._ack_buffer = b""
+        # wire_format="binary1" próbuje wynegocjować ramki binarne, w razie odmowy zostaje JSON
+        self.wire_format = wire_format
+        # TCP_NODELAY: małe wiadomości idą od razu, bez czekania na algorytm Nagle'a;
+        # keepalive (sekundy bezczynności, None = wyłączone) wykrywa martwe połączenia
+        self.nodelay = nodelay
+        self.keepalive = keepalive
+        self._encoder: Optional[BinaryEncoder] = None
+        self._lock = threading.RLock()
+        # Czas od wysłania do ACK; logi pojedynczych wiadomości są próbkowane
+        labels = {"server": f"{host}:{port}"}
+        self._rtt = metrics.histogram("client_ack_rtt_seconds", labels)
+        self._messages_sent = metrics.counter("client_messages_sent", labels)
+        self._bytes_sent = metrics.counter("client_bytes_sent", labels)
+        self._discarded = metrics.counter("client_messages_discarded", labels)
+        self._sampled = metrics.SampledLog(self.logger)
+        # batch_size > 1 włącza paczkowanie odczytów po stronie klienta
+        self._batcher = BatchSender(self._send_message, batch_size, linger, self.logger, labels) \
+            if batch_size > 1 else None
+
+    @property
+    def inflight(self) -> int:
+        return len(self._inflight)
+
+    @property
+    def failed_batches(self) -> int:
+        return self._batcher.failed_batches if self._batcher else 0
 
     def connect(self) -> None:
         if self.connected:
@@ -28,7 +159,10 @@ class NetworkClient:
         try:
             self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             self.sock.settimeout(self.timeout)
+            self._tune_socket()
             self.sock.connect((self.host, self.port))
+            if self.wire_format == BINARY_FORMAT:
+                self._negotiate()
             self.connected = True
             self.logger.info(f"Connected to {self.host}:{self.port}")
         except Exception as e:
@@ -39,36 +173,141 @@ class NetworkClient:
                 self.sock = None
             raise
 
+    def _tune_socket(self) -> None:
+        if self.nodelay:
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        if self.keepalive:
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            # opcje TCP_KEEP* nie są dostępne na każdej platformie
+            idle = max(1, int(self.keepalive))
+            for option, value in (("TCP_KEEPIDLE", idle), ("TCP_KEEPINTVL", max(1, idle // 3)),
+                                  ("TCP_KEEPCNT", 3)):
+                if hasattr(socket, option):
+                    self.sock.setsockopt(socket.IPPROTO_TCP, getattr(socket, option), value)
+
+    def peer_closed(self) -> bool:
+        # Wykrywa połączenie półotwarte: serwer zamknął gniazdo (EOF albo RST),
+        # a my jeszcze nic nie wysłaliśmy, więc sendall by tego nie zauważył
+        if not self.sock:
+            return True
+        try:
+            readable, _, _ = select.select([self.sock], [], [], 0)
+            if not readable:
+                return False
+            return not self.sock.recv(1, socket.MSG_PEEK)
+        except OSError:
+            return True
+
     def send(self, data: dict) -> bool:
+        if self._batcher:
+            self._batcher.add(data)
+            return True
+        return self._send_message(data)
+
+    def send_batch(self, readings: list) -> bool:
+        return self._send_message({"type": "batch", "readings": readings})
+
+    def _send_message(self, data: dict) -> bool:
+        with self._lock:
+            return self._send_one(data)
+
+    def _send_one(self, data: dict) -> bool:
+        if self.window > 1:
+            return self._send_pipelined(data)
+
+        if self.connected and self.peer_closed():
+            self.logger.warning(f"Connection to {self.host}:{self.port} closed by peer, reconnecting")
+            self._close_socket()
         if not self.connected:
             try:
                 self.connect()
             except Exception:
                 return False
 
-        serialized = self._serialize(data)
         attempts = 0
 
         while attempts < self.retries:
             try:
-                self.sock.sendall(serialized + b"\n")
-                self.logger.info(f"Sent data: {data}")
+                payload = self._encode(data)
+                started = time.perf_counter()
+                self.sock.sendall(payload)
+                self._sampled.info("sent", "Sent data: %s", data)
                 ack = self._recv_ack()
                 if ack == "ACK":
-                    self.logger.info("Received ACK")
+                    self._rtt.record(time.perf_counter() - started)
+                    self._messages_sent.inc()
+                    self._bytes_sent.inc(len(payload))
                     return True
                 else:
-                    self.logger.error(f"Unexpected response instead of ACK: {ack}")
+                    self._sampled.error("ack", "Unexpected response instead of ACK: %s", ack)
             except Exception as e:
                 self.logger.error(f"Send error (attempt {attempts+1}): {e}")
                 # reconnect on error
                 self._reconnect()
             attempts += 1
-            time.sleep(1)  # small delay before retry
+            if attempts < self.retries:
+                time.sleep(self.retry_delay)  # small delay before retry
         self.logger.error("Failed to send data after retries")
         return False
 
-    def close(self) -> None:
+    def flush(self) -> bool:
+        if self._batcher and not self._batcher.flush():
+            return False
+        with self._lock:
+            return self._flush_inflight()
+
+    def _flush_inflight(self) -> bool:
+        # Czeka, aż wszystkie wiadomości w oknie zostaną potwierdzone
+        attempts = 0
+        while self._inflight:
+            try:
+                if not self.connected:
+                    self.connect()
+                    self._resend_inflight()
+                self._read_acks(block=True)
+            except Exception as e:
+                attempts += 1
+                self.logger.error(f"Flush error (attempt {attempts}): {e}")
+                if attempts >= self.retries:
+                    self.logger.error(f"Failed to flush {len(self._inflight)} unacknowledged messages")
+                    return False
+                self._reconnect()
+                time.sleep(self.retry_delay)
+        return True
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        # Przed zamknięciem czekamy (najwyżej `timeout` sekund, domyślnie self.timeout)
+        # na ACK wiadomości z okna; niepotwierdzone są liczone i logowane
+        ok = self._batcher.close() if self._batcher else True
+        with self._lock:
+            if self._inflight and not self._drain_inflight(self.timeout if timeout is None else timeout):
+                ok = False
+            self._close_socket()
+        return ok
+
+    def _drain_inflight(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        try:
+            while self._inflight:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                if not self.connected:
+                    self.connect()
+                    self._resend_inflight()
+                self.sock.settimeout(remaining)
+                self._read_acks(block=True)
+        except Exception as e:
+            self.logger.error(f"Error waiting for acknowledgements on close: {e}")
+        if not self._inflight:
+            return True
+        self.logger.error(f"Discarding {len(self._inflight)} unacknowledged messages to {self.host}:{self.port}")
+        self._discarded.inc(len(self._inflight))
+        self._inflight.clear()
+        self._sent_at.clear()
+        return False
+
+    def _close_socket(self) -> None:
         if self.sock:
             try:
                 self.sock.close()
@@ -78,6 +317,21 @@ class NetworkClient:
             finally:
                 self.sock = None
                 self.connected = False
+                self._ack_buffer = b""
+                self._encoder = None
+
+    def _negotiate(self) -> None:
+        self.sock.sendall(hello_message())
+        reply = self._recv_ack()
+        if reply == f"HELLO {BINARY_FORMAT}":
+            self._encoder = BinaryEncoder()
+        else:
+            self.logger.warning(f"Server does not support {BINARY_FORMAT} ({reply!r}), using JSON")
+
+    def _encode(self, data: dict, seq: Optional[int] = None) -> bytes:
+        if self._encoder:
+            return self._encoder.encode(data, seq or 0)
+        return self._serialize(dict(data, seq=seq) if seq else data) + b"\n"
 
     def _serialize(self, data: dict) -> bytes:
         try:
@@ -97,19 +351,92 @@ class NetworkClient:
 
         if not self.sock:
             raise ConnectionError("Socket is not connected")
-        chunks = []
-        while True:
-            chunk = self.sock.recv(1)
+        while b"\n" not in self._ack_buffer:
+            chunk = self.sock.recv(4096)
             if not chunk:
                 break
-            if chunk == b"\n":
-                break
-            chunks.append(chunk)
-        return b"".join(chunks).decode("utf-8")
+            self._ack_buffer += chunk
+        line, _, self._ack_buffer = self._ack_buffer.partition(b"\n")
+        return line.decode("utf-8")
+
+    def _send_pipelined(self, data: dict) -> bool:
+        self._seq += 1
+        seq = self._seq
+        self._inflight[seq] = data
+        self._sent_at[seq] = time.perf_counter()
+
+        sent = False
+        for attempt in range(self.retries):
+            try:
+                if not self.connected:
+                    self.connect()
+                    self._resend_inflight()
+                elif not sent:
+                    payload = self._encode(data, seq)
+                    self.sock.sendall(payload)
+                    self._bytes_sent.inc(len(payload))
+                sent = True
+                # Zbieramy ACK-i, które już czekają, a blokujemy się tylko przy pełnym oknie
+                self._read_acks(block=False)
+                while len(self._inflight) >= self.window:
+                    self._read_acks(block=True)
+                return True
+            except Exception as e:
+                self.logger.error(f"Send error (attempt {attempt+1}): {e}")
+                # Udane ponowne połączenie wysyła już całe okno, łącznie z tą wiadomością
+                self._reconnect()
+                sent = self.connected
+                time.sleep(self.retry_delay)
+        # Starsze wiadomości zostają w oknie i pójdą ponownie po połączeniu
+        self._inflight.pop(seq, None)
+        self._sent_at.pop(seq, None)
+        self.logger.error("Failed to send data after retries")
+        return False
+
+    def _resend_inflight(self) -> None:
+        # Po ponownym połączeniu wysyłamy tylko niepotwierdzony ogon
+        if self._inflight:
+            self.logger.info(f"Retransmitting {len(self._inflight)} unacknowledged messages")
+            self.sock.sendall(b"".join(self._encode(data, seq) for seq, data in self._inflight.items()))
+
+    def _read_acks(self, block: bool) -> None:
+        if not self.sock:
+            raise ConnectionError("Socket is not connected")
+        if not block:
+            readable, _, _ = select.select([self.sock], [], [], 0)
+            if not readable:
+                return
+        chunk = self.sock.recv(4096)
+        if not chunk:
+            raise ConnectionError("Connection closed by server")
+        self._ack_buffer += chunk
+        *lines, self._ack_buffer = self._ack_buffer.split(b"\n")
+        for line in lines:
+            self._handle_ack(line.decode("utf-8"))
+
+    def _handle_ack(self, ack: str) -> None:
+        parts = ack.split()
+        if not parts or parts[0] != "ACK":
+            self._sampled.error("ack", "Unexpected response instead of ACK: %s", ack)
+            return
+        if len(parts) > 1:
+            seq = int(parts[1])
+            if self._inflight.pop(seq, None) is None:
+                return
+        elif self._inflight:
+            seq, _ = self._inflight.popitem(last=False)
+        else:
+            return
+        self._messages_sent.inc()
+        sent_at = self._sent_at.pop(seq, None)
+        if sent_at is not None:
+            self._rtt.record(time.perf_counter() - sent_at)
 
     def _reconnect(self) -> None:
-        self.close()
+        self._close_socket()
         try:
             self.connect()
+            if self.window > 1:
+                self._resend_inflight()
         except Exception as e:
             self.logger.error(f"Reconnect failed: {e}")
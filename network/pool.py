@@ -0,0 +1,175 @@
+import itertools
+import logging
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from network.client import NetworkClient
+
+Endpoint = Tuple[str, int]
+
+
+def parse_endpoint(value) -> Endpoint:
+    # "host:port", (host, port) albo [host, port]
+    if isinstance(value, str):
+        host, _, port = value.rpartition(":")
+        return host, int(port)
+    host, port = value
+    return host, int(port)
+
+
+class _EndpointState:
+    def __init__(self, client: NetworkClient):
+        self.client = client
+        self.healthy = True
+        self.failures = 0
+        self.sent = 0
+        self.last_error = None
+
+    def stats(self) -> dict:
+        return {
+            "healthy": self.healthy,
+            "connected": self.client.connected,
+            "failures": self.failures,
+            "sent": self.sent,
+            "last_error": self.last_error,
+        }
+
+
+class ConnectionManager:
+    # Wspólne połączenia do serwerów dla wszystkich loggerów w procesie.
+    #
+    # Dla każdego adresu trzymamy jeden network.client.NetworkClient, otwierany
+    # leniwie przy pierwszej wysyłce. Wiadomości rozkładamy po kolei (round-robin)
+    # na zdrowe serwery; serwer, do którego wysyłka się nie udała, jest pomijany,
+    # a wątek kontrolny co `health_interval` sekund próbuje się z nim połączyć.
+    # Samo ponowne łączenie i wykrywanie półotwartych gniazd robi NetworkClient.
+    _shared: Dict[tuple, "ConnectionManager"] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(
+        self,
+        endpoints: Sequence,
+        health_interval: float = 5.0,
+        logger: Optional[logging.Logger] = None,
+        **client_options
+    ):
+        if not endpoints:
+            raise ValueError("At least one server endpoint is required")
+        self.endpoints: List[Endpoint] = [parse_endpoint(e) for e in endpoints]
+        self.health_interval = health_interval
+        self.logger = logger or logging.getLogger(__name__)
+        # jedna próba na serwer - zamiast czekać, przechodzimy do następnego
+        client_options.setdefault("retries", 1)
+        client_options.setdefault("retry_delay", 0)
+        self._states = [
+            _EndpointState(NetworkClient(host, port, logger=self.logger, **client_options))
+            for host, port in self.endpoints
+        ]
+        self._next = itertools.count()
+        self._lock = threading.Lock()
+        self._closing = threading.Event()
+        self._health_thread = None
+        self._key = None
+        self._users = 0
+
+    @classmethod
+    def shared(cls, endpoints: Sequence, **options) -> "ConnectionManager":
+        # Jedna instancja na zestaw serwerów i opcji; każde wywołanie to jeden
+        # użytkownik, a połączenia zamyka dopiero ostatnie close()
+        key = (tuple(parse_endpoint(e) for e in endpoints), tuple(sorted(options.items())))
+        with cls._shared_lock:
+            manager = cls._shared.get(key)
+            if manager is None:
+                manager = cls._shared[key] = cls(endpoints, **options)
+                manager._key = key
+            manager._users += 1
+            return manager
+
+    @property
+    def healthy_count(self) -> int:
+        return sum(state.healthy for state in self._states)
+
+    def send(self, data: dict) -> bool:
+        return self._deliver(lambda client: client.send(data))
+
+    def send_batch(self, readings: list) -> bool:
+        return self._deliver(lambda client: client.send_batch(readings))
+
+    def flush(self) -> bool:
+        # klient rozłączony z wiadomościami w oknie też musi je dosłać i dostać ACK
+        return all(state.client.flush() for state in self._states
+                   if state.client.connected or state.client.inflight)
+
+    def close(self) -> None:
+        if self._key is not None:
+            with self._shared_lock:
+                self._users -= 1
+                if self._users > 0:
+                    return
+                self._shared.pop(self._key, None)
+        self._closing.set()
+        with self._lock:
+            thread, self._health_thread = self._health_thread, None
+        if thread:
+            thread.join()
+        for state in self._states:
+            state.client.close()
+
+    def stats(self) -> dict:
+        return {f"{host}:{port}": state.stats()
+                for (host, port), state in zip(self.endpoints, self._states)}
+
+    def _deliver(self, send) -> bool:
+        # Zaczynamy od kolejnego serwera w kolejce i próbujemy każdego zdrowego raz
+        start = next(self._next)
+        count = len(self._states)
+        for i in range(count):
+            state = self._states[(start + i) % count]
+            if not state.healthy:
+                continue
+            try:
+                delivered = send(state.client)
+            except Exception as e:
+                state.last_error = str(e)
+                delivered = False
+            if delivered:
+                state.sent += 1
+                return True
+            self._mark_unhealthy(state)
+        return False
+
+    def _mark_unhealthy(self, state: _EndpointState) -> None:
+        client = state.client
+        state.failures += 1
+        with self._lock:
+            if not state.healthy:
+                return
+            state.healthy = False
+            self.logger.warning(f"Server {client.host}:{client.port} unavailable, "
+                                f"{self.healthy_count} of {len(self._states)} left")
+            if self._health_thread is None:
+                self._health_thread = threading.Thread(target=self._health_loop, name="connection-health",
+                                                       daemon=True)
+                self._health_thread.start()
+
+    def _health_loop(self) -> None:
+        while not self._closing.wait(self.health_interval):
+            with self._lock:
+                pending = [state for state in self._states if not state.healthy]
+                if not pending:
+                    self._health_thread = None
+                    return
+            for state in pending:
+                client = state.client
+                # nie przeszkadzamy wysyłce, jeśli klient jest akurat zajęty
+                if not client._lock.acquire(blocking=False):
+                    continue
+                try:
+                    if not client.connected:
+                        client.connect()
+                    state.healthy = True
+                    self.logger.info(f"Server {client.host}:{client.port} is back")
+                except Exception as e:
+                    state.last_error = str(e)
+                finally:
+                    client._lock.release()
@@ -0,0 +1,197 @@
+import json
+import struct
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+# Negocjacja: klient wysyła linię JSON {"type": "hello", "formats": [...]},
+# serwer odpowiada "HELLO <format>\n". Po "HELLO binary1" oba końce przechodzą
+# na ramki binarne; stary serwer odpowie zwykłym "ACK" i zostajemy przy JSON.
+BINARY_FORMAT = "binary1"
+JSON_FORMAT = "json"
+
+# Ramka: [u32 długość ładunku][u8 typ][ładunek]
+HEADER = struct.Struct("<IB")
+FRAME_SENSOR = 1    # u16 id + nazwa czujnika (UTF-8), wysyłana raz na połączenie
+FRAME_UNIT = 2      # u16 id + jednostka (UTF-8), wysyłana raz na połączenie
+FRAME_READING = 3   # u32 seq + RECORD
+FRAME_JSON = 4      # u32 seq + dowolna wiadomość JSON (gdy nie da się jej spakować)
+FRAME_BATCH = 5     # u32 seq + N x RECORD
+
+ID = struct.Struct("<H")
+SEQ = struct.Struct("<I")
+# znacznik czasu w mikrosekundach od epoki (int64), wartość (float64), id czujnika, id jednostki
+RECORD = struct.Struct("<qdHH")
+
+READING_KEYS = {"timestamp", "sensor_id", "value", "unit"}
+MAX_ID = 0xFFFF
+MAX_FRAME_SIZE = 16 * 1024 * 1024
+
+
+def hello_message(formats=(BINARY_FORMAT, JSON_FORMAT)) -> bytes:
+    return json.dumps({"type": "hello", "formats": list(formats)}).encode("utf-8") + b"\n"
+
+
+def choose_format(message: dict) -> str:
+    formats = message.get("formats") or []
+    return BINARY_FORMAT if BINARY_FORMAT in formats else JSON_FORMAT
+
+
+def to_epoch_us(timestamp) -> Optional[int]:
+    if isinstance(timestamp, str):
+        try:
+            timestamp = datetime.fromisoformat(timestamp)
+        except ValueError:
+            return None
+    if not isinstance(timestamp, datetime) or timestamp.tzinfo is not None:
+        return None
+    # Liczymy na liczbach całkowitych, żeby mikrosekundy przeszły bez strat
+    return int(timestamp.replace(microsecond=0).timestamp()) * 1_000_000 + timestamp.microsecond
+
+
+def from_epoch_us(us: int) -> datetime:
+    seconds, micro = divmod(us, 1_000_000)
+    return datetime.fromtimestamp(seconds).replace(microsecond=micro)
+
+
+def _frame(frame_type: int, payload: bytes) -> bytes:
+    return HEADER.pack(len(payload), frame_type) + payload
+
+
+class BinaryEncoder:
+    # Stan po stronie nadawcy dla jednego połączenia: przy nowym połączeniu
+    # trzeba utworzyć nowy enkoder, żeby słowniki zostały wysłane ponownie.
+    def __init__(self):
+        self._sensor_ids = {}
+        self._unit_ids = {}
+
+    def encode(self, message: dict, seq: int = 0) -> bytes:
+        if message.get("type") == "batch":
+            frame_type = FRAME_BATCH
+            readings = message.get("readings") or []
+        else:
+            frame_type = FRAME_READING
+            readings = [message]
+
+        # Najpierw sprawdzamy całą wiadomość, żeby przy powrocie do JSON
+        # nie zostawić zadeklarowanych, a niewysłanych identyfikatorów
+        rows = []
+        for reading in readings:
+            row = self._validate(reading)
+            if row is None:
+                return self._json_frame(message, seq)
+            rows.append(row)
+        new_sensors = {row[2] for row in rows} - self._sensor_ids.keys()
+        new_units = {row[3] for row in rows} - self._unit_ids.keys()
+        if (len(self._sensor_ids) + len(new_sensors) > MAX_ID + 1
+                or len(self._unit_ids) + len(new_units) > MAX_ID + 1):
+            return self._json_frame(message, seq)
+
+        declarations = []
+        records = []
+        for us, value, sensor, unit in rows:
+            sensor_id = self._intern(self._sensor_ids, FRAME_SENSOR, sensor, declarations)
+            unit_id = self._intern(self._unit_ids, FRAME_UNIT, unit, declarations)
+            records.append(RECORD.pack(us, value, sensor_id, unit_id))
+        return b"".join(declarations) + _frame(frame_type, SEQ.pack(seq) + b"".join(records))
+
+    def _validate(self, reading) -> Optional[tuple]:
+        if not isinstance(reading, dict) or reading.keys() != READING_KEYS:
+            return None
+        value = reading["value"]
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return None
+        if not isinstance(reading["sensor_id"], str) or not isinstance(reading["unit"], str):
+            return None
+        us = to_epoch_us(reading["timestamp"])
+        if us is None:
+            return None
+        return us, float(value), reading["sensor_id"], reading["unit"]
+
+    def _intern(self, table: dict, frame_type: int, name: str, declarations: list) -> int:
+        ident = table.get(name)
+        if ident is None:
+            ident = table[name] = len(table)
+            declarations.append(_frame(frame_type, ID.pack(ident) + name.encode("utf-8")))
+        return ident
+
+    def _json_frame(self, message: dict, seq: int) -> bytes:
+        return _frame(FRAME_JSON, SEQ.pack(seq) + json.dumps(message).encode("utf-8"))
+
+
+class BinaryDecoder:
+    def __init__(self, max_frame_size: int = MAX_FRAME_SIZE):
+        self.max_frame_size = max_frame_size
+        self._buffer = bytearray()
+        self._sensors = {}
+        self._units = {}
+        self._iso_cache = {}
+
+    def feed(self, data) -> List[Tuple[int, object]]:
+        # Zwraca listę (seq, wiadomość): dict dla pojedynczego odczytu albo
+        # wiadomości JSON, list dla paczki odczytów
+        buffer = self._buffer
+        buffer += data
+        messages = []
+        view = memoryview(buffer)
+        pos = 0
+        try:
+            while len(buffer) - pos >= HEADER.size:
+                length, frame_type = HEADER.unpack_from(buffer, pos)
+                if length > self.max_frame_size:
+                    raise ValueError(f"Frame exceeds {self.max_frame_size} bytes")
+                end = pos + HEADER.size + length
+                if end > len(buffer):
+                    break
+                message = self._decode(frame_type, view[pos + HEADER.size:end])
+                if message is not None:
+                    messages.append(message)
+                pos = end
+        finally:
+            view.release()
+        if pos:
+            del buffer[:pos]
+        return messages
+
+    def _decode(self, frame_type: int, payload: memoryview):
+        if frame_type == FRAME_SENSOR:
+            self._sensors[ID.unpack_from(payload)[0]] = str(payload[ID.size:], "utf-8")
+            return None
+        if frame_type == FRAME_UNIT:
+            self._units[ID.unpack_from(payload)[0]] = str(payload[ID.size:], "utf-8")
+            return None
+
+        seq = SEQ.unpack_from(payload)[0]
+        body = payload[SEQ.size:]
+        if frame_type == FRAME_JSON:
+            return seq, json.loads(bytes(body))
+        if frame_type not in (FRAME_READING, FRAME_BATCH):
+            raise ValueError(f"Unknown frame type {frame_type}")
+
+        sensors, units, iso = self._sensors, self._units, self._isoformat
+        readings = [
+            {
+                "timestamp": iso(us),
+                "sensor_id": sensors[sensor_id],
+                "value": value,
+                "unit": units[unit_id],
+            }
+            for us, value, sensor_id, unit_id in RECORD.iter_unpack(body)
+        ]
+        if frame_type == FRAME_READING:
+            if len(readings) != 1:
+                raise ValueError("Reading frame must contain exactly one record")
+            return seq, readings[0]
+        return seq, readings
+
+    def _isoformat(self, us: int) -> str:
+        # Odczyty z jednej sekundy dzielą prefiks "RRRR-MM-DDTGG:MM:SS", więc go pamiętamy
+        seconds, micro = divmod(us, 1_000_000)
+        prefix = self._iso_cache.get(seconds)
+        if prefix is None:
+            if len(self._iso_cache) >= 4096:
+                self._iso_cache.clear()
+            prefix = self._iso_cache[seconds] = datetime.fromtimestamp(seconds).isoformat()
+        return f"{prefix}.{micro:06d}" if micro else prefix
+
+    def pending(self) -> int:
+        return len(self._buffer)
@@ -0,0 +1,268 @@
+import bisect
+import json
+import logging
+import os
+import random
+import threading
+from typing import List, Optional, Tuple
+
+SEGMENT_SUFFIX = ".log"
+CHECKPOINT_FILE = "committed.json"
+
+
+class Spool:
+    # Trwała kolejka odczytów na dysku (store-and-forward).
+    #
+    # Odczyty są dopisywane jako linie JSON do plików segmentów nazwanych
+    # przesunięciem pierwszego bajtu (segment-<offset>.log). Pozycja w spoolu
+    # to globalne przesunięcie w bajtach, a potwierdzona pozycja jest trzymana
+    # w pliku committed.json (zapis atomowy przez os.replace). Segmenty, które
+    # w całości leżą przed potwierdzoną pozycją, są usuwane, więc na dysku
+    # zostaje tylko niewysłany ogon, a w pamięci nie trzymamy odczytów wcale.
+    def __init__(
+        self,
+        directory: str,
+        segment_bytes: int = 16 * 1024 * 1024,
+        max_bytes: Optional[int] = None,
+        fsync: bool = False,
+        logger: Optional[logging.Logger] = None
+    ):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_bytes = max_bytes
+        self.fsync = fsync
+        self.logger = logger or logging.getLogger(__name__)
+        self.dropped_segments = 0
+        self._cond = threading.Condition()
+        os.makedirs(directory, exist_ok=True)
+
+        self._bases = sorted(
+            int(name[len("segment-"):-len(SEGMENT_SUFFIX)])
+            for name in os.listdir(directory)
+            if name.startswith("segment-") and name.endswith(SEGMENT_SUFFIX)
+        )
+        if not self._bases:
+            self._bases = [self._load_committed()]
+        self.committed = max(self._load_committed(), self._bases[0])
+        self._file = open(self._segment_path(self._bases[-1]), "ab")
+        self._repair_tail()
+        self.end = self._bases[-1] + self._file.tell()
+
+    @property
+    def backlog_bytes(self) -> int:
+        return self.end - self.committed
+
+    @property
+    def disk_bytes(self) -> int:
+        return self.end - self._bases[0]
+
+    def append(self, record: dict) -> int:
+        line = json.dumps(record).encode("utf-8") + b"\n"
+        with self._cond:
+            if self._file.tell() >= self.segment_bytes:
+                self._roll()
+            self._file.write(line)
+            # flush do systemu - odczyt przetrwa awarię procesu; fsync także awarię zasilania
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self.end += len(line)
+            self._cond.notify_all()
+            return self.end
+
+    def read(self, offset: int, limit: int = 500) -> Tuple[List[dict], int]:
+        # Do `limit` pełnych rekordów od pozycji `offset`; zwraca je razem z pozycją
+        # następnego rekordu (tę pozycję przekazuje się później do commit()).
+        with self._cond:
+            bases = list(self._bases)
+            end = self.end
+        offset = max(offset, bases[0])
+        records = []
+        index = bisect.bisect_right(bases, offset) - 1
+        while index < len(bases) and len(records) < limit and offset < end:
+            base = bases[index]
+            try:
+                f = open(self._segment_path(base), "rb")
+            except FileNotFoundError:
+                # segment usunięty w międzyczasie (max_bytes) - przechodzimy dalej
+                index += 1
+                offset = bases[index] if index < len(bases) else end
+                continue
+            with f:
+                f.seek(offset - base)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        self.logger.error(f"Skipping corrupt spool record at {offset}")
+                    offset += len(line)
+                    if len(records) >= limit or offset >= end:
+                        break
+            index += 1
+            if index < len(bases) and offset >= bases[index]:
+                offset = bases[index]
+        return records, offset
+
+    def commit(self, offset: int) -> None:
+        with self._cond:
+            if offset <= self.committed:
+                return
+            self.committed = min(offset, self.end)
+            self._save_committed()
+            # usuwamy segmenty, które w całości zostały już wysłane (poza bieżącym)
+            while len(self._bases) > 1 and self._bases[1] <= self.committed:
+                self._remove_segment(self._bases.pop(0))
+
+    def wait(self, timeout: float = None) -> bool:
+        # Czeka na nowe dane (albo na notify() przy zamykaniu)
+        with self._cond:
+            if self.end > self.committed:
+                return True
+            return self._cond.wait(timeout)
+
+    def notify(self) -> None:
+        with self._cond:
+            self._cond.notify_all()
+
+    def close(self) -> None:
+        with self._cond:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+    def _roll(self) -> None:
+        self._file.close()
+        base = self.end
+        self._bases.append(base)
+        self._file = open(self._segment_path(base), "ab")
+        if self.max_bytes:
+            # limit miejsca: porzucamy najstarsze niewysłane segmenty
+            while len(self._bases) > 1 and self.end - self._bases[0] > self.max_bytes:
+                self._remove_segment(self._bases.pop(0))
+                self.dropped_segments += 1
+                self.logger.warning(f"Spool over {self.max_bytes} bytes, dropped oldest segment")
+            if self.committed < self._bases[0]:
+                self.committed = self._bases[0]
+                self._save_committed()
+
+    def _repair_tail(self) -> None:
+        # Po awarii ostatni rekord mógł zostać zapisany tylko częściowo
+        size = self._file.tell()
+        if not size:
+            return
+        with open(self._file.name, "rb") as f:
+            f.seek(max(0, size - self.segment_bytes))
+            data = f.read()
+        if data.endswith(b"\n"):
+            return
+        keep = size - len(data) + data.rfind(b"\n") + 1
+        self.logger.warning(f"Truncating partial record at the end of {self._file.name}")
+        self._file.truncate(keep)
+        self._file.seek(keep)
+
+    def _segment_path(self, base: int) -> str:
+        return os.path.join(self.directory, f"segment-{base:020d}{SEGMENT_SUFFIX}")
+
+    def _remove_segment(self, base: int) -> None:
+        try:
+            os.remove(self._segment_path(base))
+        except FileNotFoundError:
+            pass
+
+    def _load_committed(self) -> int:
+        try:
+            with open(os.path.join(self.directory, CHECKPOINT_FILE)) as f:
+                return int(json.load(f)["offset"])
+        except (FileNotFoundError, ValueError, KeyError):
+            return 0
+
+    def _save_committed(self) -> None:
+        path = os.path.join(self.directory, CHECKPOINT_FILE)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"offset": self.committed}, f)
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+
+class SpoolSender:
+    # Wątek opróżniający spool do serwera. Paczka jest potwierdzana w spoolu
+    # dopiero po ACK, więc po awarii część odczytów może przyjść drugi raz
+    # (at-least-once). Przy braku połączenia czeka coraz dłużej (wykładniczo,
+    # z losowym rozrzutem), zamiast blokować wywołującego.
+    def __init__(
+        self,
+        spool: Spool,
+        client,
+        batch_size: int = 500,
+        initial_backoff: float = 0.5,
+        max_backoff: float = 60.0,
+        logger: Optional[logging.Logger] = None
+    ):
+        self.spool = spool
+        self.client = client
+        self.batch_size = batch_size
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.logger = logger or logging.getLogger(__name__)
+        self.sent = 0
+        self.failures = 0
+        self._backoff = initial_backoff
+        self._closing = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._closing.clear()
+        self._thread = threading.Thread(target=self._run, name="spool-sender", daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        self._closing.set()
+        self.spool.notify()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self.client.close()
+
+    def stats(self) -> dict:
+        return {
+            "sent": self.sent,
+            "failures": self.failures,
+            "backlog_bytes": self.spool.backlog_bytes,
+            "dropped_segments": self.spool.dropped_segments,
+        }
+
+    def _run(self) -> None:
+        while not self._closing.is_set():
+            records, next_offset = self.spool.read(self.spool.committed, self.batch_size)
+            if not records:
+                if next_offset > self.spool.committed:
+                    # same uszkodzone rekordy - przeskakujemy
+                    self.spool.commit(next_offset)
+                else:
+                    self.spool.wait(1.0)
+                continue
+            try:
+                # Klient potokowy (window > 1) kończy send_batch po zapisaniu bajtów;
+                # commit dopiero po ACK całego okna, inaczej niepotwierdzone rekordy
+                # zniknęłyby ze spoolu
+                delivered = self.client.send_batch(records) and self.client.flush()
+            except Exception as e:
+                self.logger.error(f"Spool send error: {e}")
+                delivered = False
+            if delivered:
+                self.spool.commit(next_offset)
+                self.sent += len(records)
+                self._backoff = self.initial_backoff
+                continue
+            self.failures += 1
+            delay = self._backoff * random.uniform(0.5, 1.0)
+            self._backoff = min(self._backoff * 2, self.max_backoff)
+            self.logger.warning(f"Server unavailable, {self.spool.backlog_bytes} bytes spooled, retry in {delay:.1f}s")
+            self._closing.wait(delay)
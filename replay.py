@@ -0,0 +1,151 @@
+"""Ponowne wysłanie zapisanych odczytów do serwera (backfill, testy obciążeniowe).
+
+    python replay.py --config logger_config.json --port 9000 --speed 10
+    python replay.py --config logger_config.json --port 9000 --max-speed --batch-size 100
+"""
+import argparse
+import logging
+import sys
+import time
+from datetime import datetime, timedelta
+
+import metrics
+from logger import Logger
+from network.client import NetworkClient
+
+
+class Replayer:
+    # Odczyty z read_logs() Loggera (bieżące CSV, archiwa zip/gzip/zstd/parquet
+    # i baza SQLite) są czytane strumieniowo, blok po bloku, i wysyłane przez
+    # NetworkClient w trybie potokowym - do `window` wiadomości czeka na ACK,
+    # więc gniazdo nie stoi w miejscu w oczekiwaniu na potwierdzenia.
+    #
+    # speed: 1 - oryginalne odstępy między odczytami, 10 - dziesięć razy
+    # szybciej, 0 - bez czekania. Harmonogram liczony jest od pierwszego
+    # odczytu: odczyt z czasem ts ma wyjść w chwili start + (ts - ts0) / speed.
+    # Opóźnienie względem tego terminu (lag) trafia do histogramu.
+    #
+    # retime=True podmienia znaczniki czasu na bieżące (test obciążeniowy
+    # zamiast uzupełniania historii).
+    def __init__(self, readings, client: NetworkClient, speed: float = 1.0, retime: bool = False,
+                 report_interval: float = 5.0):
+        if speed < 0:
+            raise ValueError("Mnożnik prędkości nie może być ujemny")
+        self.readings = readings
+        self.client = client
+        self.speed = speed
+        self.retime = retime
+        self.report_interval = report_interval
+        self.sent = 0
+        self.first_ts = None
+        self.last_ts = None
+        self.elapsed = 0.0
+        self.failed = False
+        self.lag = metrics.Histogram()
+
+    def run(self) -> dict:
+        started = time.monotonic()
+        next_report = started + self.report_interval
+        try:
+            for row in self.readings:
+                ts = row['timestamp'].timestamp()
+                if self.first_ts is None:
+                    self.first_ts = ts
+                self.last_ts = ts
+                if self.speed:
+                    target = started + (ts - self.first_ts) / self.speed
+                    delay = target - time.monotonic()
+                    if delay > 0.0005:
+                        time.sleep(delay)
+                    lag = time.monotonic() - target
+                    self.lag.record(lag if lag > 0 else 0.0)
+                timestamp = datetime.now() if self.retime else row['timestamp']
+                if not self.client.send({
+                    'timestamp': timestamp.isoformat(),
+                    'sensor_id': row['sensor_id'],
+                    'value': row['value'],
+                    'unit': row['unit'],
+                }):
+                    self.failed = True
+                    print(f"[Replay] Błąd wysyłania - przerwano po {self.sent} odczytach")
+                    break
+                self.sent += 1
+                if self.report_interval and time.monotonic() >= next_report:
+                    self.elapsed = time.monotonic() - started
+                    print(self.report())
+                    next_report += self.report_interval
+        finally:
+            # czekamy na ACK wszystkich wiadomości z okna
+            if not self.client.flush():
+                self.failed = True
+            self.elapsed = time.monotonic() - started
+        return self.stats()
+
+    def stats(self) -> dict:
+        span = self.last_ts - self.first_ts if self.first_ts is not None else 0.0
+        lag = self.lag.snapshot()
+        # przy --batch-size paczki idą w tle; utracona paczka oznacza nieudane odtworzenie
+        failed = self.failed or getattr(self.client, 'failed_batches', 0) > 0
+        return {
+            'sent': self.sent,
+            'failed': failed,
+            'elapsed': self.elapsed,
+            'rate': self.sent / self.elapsed if self.elapsed else None,
+            # tempo wynikające z harmonogramu (przy speed=0 - brak)
+            'target_rate': self.sent / span * self.speed if self.speed and span else None,
+            'span': span,
+            'lag': {q: lag[q] for q in ('p50', 'p99', 'max')} if self.speed else None,
+        }
+
+    def report(self) -> str:
+        stats = self.stats()
+        line = f"[Replay] wysłano {stats['sent']} odczytów w {stats['elapsed']:.1f} s ({stats['rate'] or 0:.0f}/s"
+        if stats['target_rate']:
+            line += f", cel {stats['target_rate']:.0f}/s"
+        line += ")"
+        if stats['lag'] and stats['lag']['max'] is not None:
+            line += (f", opóźnienie p50 {stats['lag']['p50'] * 1000:.1f} ms, p99 {stats['lag']['p99'] * 1000:.1f} ms, "
+                     f"max {stats['lag']['max'] * 1000:.1f} ms")
+        return line
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay logged readings to the ingestion server")
+    parser.add_argument("--config", default="logger_config.json", help="konfiguracja Loggera, którego logi wysyłamy")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--start", type=datetime.fromisoformat, help="początek zakresu (ISO 8601)")
+    parser.add_argument("--end", type=datetime.fromisoformat, help="koniec zakresu (ISO 8601)")
+    parser.add_argument("--sensor", help="tylko jeden czujnik")
+    parser.add_argument("--speed", type=float, default=1.0, help="mnożnik tempa względem oryginału")
+    parser.add_argument("--max-speed", action="store_true", help="wysyłaj bez czekania (jak --speed 0)")
+    parser.add_argument("--retime", action="store_true", help="bieżące znaczniki czasu zamiast oryginalnych")
+    parser.add_argument("--window", type=int, default=256, help="wiadomości bez ACK w locie")
+    parser.add_argument("--batch-size", type=int, default=1, help="odczyty w jednej paczce")
+    parser.add_argument("--wire-format", default="json")
+    parser.add_argument("--report-interval", type=float, default=5.0)
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s %(levelname)s %(message)s")
+    # tylko odczyt: bez agregatów, sieci i zmian w log_dir Loggera, który może właśnie pisać
+    source = Logger(args.config, read_only=True)
+    readings = source.read_logs(args.start or datetime.fromtimestamp(0),
+                                args.end or datetime.now() + timedelta(days=1), args.sensor)
+    client = NetworkClient(args.host, args.port, window=args.window, batch_size=args.batch_size,
+                           wire_format=args.wire_format)
+    replayer = Replayer(readings, client, 0 if args.max_speed else args.speed, args.retime, args.report_interval)
+    try:
+        replayer.run()
+    except KeyboardInterrupt:
+        print("[Replay] Przerwano")
+    finally:
+        if not client.close():
+            replayer.failed = True
+        source.stop()
+    print(replayer.report())
+    sys.exit(1 if replayer.stats()['failed'] else 0)
+
+
+if __name__ == "__main__":
+    main()
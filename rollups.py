@@ -0,0 +1,251 @@
+import csv
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+
+# Rozdzielczość (sekundy) -> podział plików na dysku (wg czasu UTC początku kubełka)
+RESOLUTIONS = {60: '%Y%m%d', 3600: '%Y%m', 86400: '%Y'}
+STATE_FILE = 'state.json'
+
+
+class Bucket:
+    __slots__ = ('start', 'count', 'total', 'min', 'max', 'last', 'last_ts')
+
+    def __init__(self, start: int, count=0, total=0.0, min=None, max=None, last=None, last_ts=None):
+        self.start = start
+        self.count = count
+        self.total = total
+        self.min = min
+        self.max = max
+        self.last = last
+        self.last_ts = last_ts
+
+    def add(self, timestamp: float, value: float) -> None:
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+        if self.last_ts is None or timestamp >= self.last_ts:
+            self.last, self.last_ts = value, timestamp
+
+    def merge(self, other: "Bucket") -> None:
+        # Ten sam kubełek może być zapisany w kilku częściach (np. spóźnione
+        # odczyty albo restart w środku kubełka) - części łączą się bez strat
+        if not other.count:
+            return
+        self.count += other.count
+        self.total += other.total
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+        if self.last_ts is None or other.last_ts >= self.last_ts:
+            self.last, self.last_ts = other.last, other.last_ts
+
+    def as_dict(self, sensor_id: str, resolution: int) -> dict:
+        return {
+            'sensor_id': sensor_id,
+            'start': self.start,
+            'resolution': resolution,
+            'count': self.count,
+            'sum': self.total,
+            'mean': self.total / self.count if self.count else None,
+            'min': self.min,
+            'max': self.max,
+            'last': self.last,
+        }
+
+
+class RollupStore:
+    # Agregaty odczytów w kubełkach czasu (domyślnie 1 min, 1 h, 1 dzień) per czujnik:
+    # liczba, suma, min, max i ostatnia wartość.
+    #
+    # Otwarte kubełki są w pamięci; kubełek jest dopisywany do pliku CSV swojej
+    # rozdzielczości, gdy czas odczytów minie jego koniec. Dla każdej rozdzielczości
+    # trzymamy znacznik (watermark): wszystkie odczyty sprzed niego są już na dysku.
+    # Po awarii (brak czystego close()) rebuild() usuwa wiersze od znacznika
+    # i przelicza je z surowych logów.
+    def __init__(self, directory: str, resolutions=tuple(RESOLUTIONS)):
+        self.directory = directory
+        self.resolutions = tuple(resolutions)
+        for resolution in self.resolutions:
+            if resolution not in RESOLUTIONS:
+                raise ValueError(f"Nieobsługiwana rozdzielczość agregatów: {resolution}")
+            os.makedirs(os.path.join(directory, str(resolution)), exist_ok=True)
+        self._lock = threading.RLock()
+        self._open = {r: {} for r in self.resolutions}
+        self._replay_from = None
+        self._max_ts = None
+
+        state = self._load_state()
+        watermarks = (state or {}).get('watermarks', {})
+        self.watermarks = {r: watermarks.get(str(r)) for r in self.resolutions}
+        # bez stanu albo bez czystego zamknięcia agregaty trzeba odtworzyć z logów
+        self.needs_rebuild = not state or not state.get('clean')
+        self._save_state(clean=False)
+
+    def add(self, sensor_id: str, timestamp: float, value: float) -> None:
+        with self._lock:
+            for resolution in self.resolutions:
+                if self._replay_from and timestamp < self._replay_from[resolution]:
+                    continue
+                start = int(timestamp // resolution) * resolution
+                buckets = self._open[resolution]
+                bucket = buckets.get((sensor_id, start))
+                if bucket is None:
+                    bucket = buckets[(sensor_id, start)] = Bucket(start)
+                bucket.add(timestamp, value)
+            if self._max_ts is None or timestamp > self._max_ts:
+                self._max_ts = timestamp
+                self._advance()
+
+    def query(self, sensor_id, start: float, end: float, resolution: int = 3600) -> list:
+        # Kubełki z [start, end) (wg początku kubełka), z dysku i z pamięci
+        if resolution not in self.resolutions:
+            raise ValueError(f"Brak agregatów o rozdzielczości {resolution}")
+        merged = {}
+        with self._lock:
+            for key, bucket in self._read(resolution, start, end, sensor_id):
+                merged.setdefault(key, Bucket(bucket.start)).merge(bucket)
+            for (bucket_sensor, bucket_start), bucket in self._open[resolution].items():
+                if (sensor_id is None or bucket_sensor == sensor_id) and start <= bucket_start < end:
+                    merged.setdefault((bucket_sensor, bucket_start), Bucket(bucket_start)).merge(bucket)
+        return [merged[key].as_dict(key[0], resolution) for key in sorted(merged, key=lambda k: (k[1], k[0]))]
+
+    def summary(self, sensor_id: str, start: float, end: float, resolution: int = 3600) -> dict:
+        total = Bucket(int(start))
+        for row in self.query(sensor_id, start, end, resolution):
+            total.merge(Bucket(row['start'], row['count'], row['sum'], row['min'], row['max'],
+                               row['last'], row['start']))
+        return total.as_dict(sensor_id, resolution)
+
+    def rebuild(self, readings) -> int:
+        # `readings` - iterator (sensor_id, timestamp, value) z surowych logów,
+        # co najmniej od rebuild_from(). Wiersze od znacznika są usuwane i liczone od nowa.
+        with self._lock:
+            for resolution in self.resolutions:
+                self._truncate(resolution, self.watermarks[resolution])
+            self._open = {r: {} for r in self.resolutions}
+            self._max_ts = None
+            self._replay_from = {r: self.watermarks[r] or 0 for r in self.resolutions}
+            count = 0
+            try:
+                for sensor_id, timestamp, value in readings:
+                    self.add(sensor_id, timestamp, value)
+                    count += 1
+            finally:
+                self._replay_from = None
+            self.needs_rebuild = False
+            return count
+
+    def rebuild_from(self) -> float:
+        # Od kiedy trzeba ponownie przeczytać surowe logi (0 = od początku)
+        if any(self.watermarks[r] is None for r in self.resolutions):
+            return 0
+        return min(self.watermarks.values())
+
+    def close(self) -> None:
+        # Zapisuje też niepełne kubełki; późniejsze odczyty do tego samego
+        # kubełka trafią do osobnego wiersza i zostaną scalone przy zapytaniu.
+        # Znaczników nie przesuwamy: gdyby kolejne uruchomienie skończyło się
+        # awarią, rebuild() usunie te części i przeliczy cały kubełek z logów.
+        with self._lock:
+            for resolution in self.resolutions:
+                if self._open[resolution]:
+                    self._flush(resolution, list(self._open[resolution]))
+            self._save_state(clean=True)
+
+    def _advance(self) -> None:
+        changed = False
+        for resolution in self.resolutions:
+            boundary = int(self._max_ts // resolution) * resolution
+            watermark = self.watermarks[resolution]
+            if watermark is not None and boundary <= watermark:
+                continue
+            self.watermarks[resolution] = boundary
+            changed = True
+        if not changed:
+            return
+        for resolution in self.resolutions:
+            # zamknięte kubełki (także spóźnione części starszych kubełków)
+            limit = self.watermarks[resolution]
+            closed = [key for key in self._open[resolution] if key[1] + resolution <= limit]
+            if closed:
+                self._flush(resolution, closed)
+        self._save_state(clean=False)
+
+    def _flush(self, resolution: int, keys) -> None:
+        buckets = self._open[resolution]
+        rows = defaultdict(list)
+        for key in keys:
+            bucket = buckets.pop(key)
+            rows[self._partition(resolution, bucket.start)].append(
+                [bucket.start, key[0], bucket.count, repr(bucket.total), bucket.min, bucket.max,
+                 bucket.last, bucket.last_ts])
+        for partition, partition_rows in rows.items():
+            with open(self._path(resolution, partition), 'a', newline='', encoding='utf-8') as f:
+                csv.writer(f).writerows(partition_rows)
+
+    def _read(self, resolution: int, start: float, end: float, sensor_id=None):
+        first, last = self._partition(resolution, start), self._partition(resolution, end)
+        directory = os.path.join(self.directory, str(resolution))
+        for filename in sorted(os.listdir(directory)):
+            partition = filename[:-len('.csv')]
+            if not filename.endswith('.csv') or not first <= partition <= last:
+                continue
+            with open(os.path.join(directory, filename), newline='', encoding='utf-8') as f:
+                for row in csv.reader(f):
+                    bucket = self._parse(row)
+                    if bucket is None or not start <= bucket.start < end:
+                        continue
+                    if sensor_id is not None and row[1] != sensor_id:
+                        continue
+                    yield (row[1], bucket.start), bucket
+
+    def _truncate(self, resolution: int, watermark) -> None:
+        # Usuwa wiersze kubełków zaczynających się od `watermark` (None = wszystkie)
+        directory = os.path.join(self.directory, str(resolution))
+        for filename in os.listdir(directory):
+            path = os.path.join(directory, filename)
+            if watermark is None:
+                os.remove(path)
+                continue
+            if filename[:-len('.csv')] < self._partition(resolution, watermark):
+                continue
+            with open(path, newline='', encoding='utf-8') as f:
+                rows = [row for row in csv.reader(f)
+                        if (bucket := self._parse(row)) is not None and bucket.start < watermark]
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+                csv.writer(f).writerows(rows)
+            os.replace(tmp_path, path)
+
+    @staticmethod
+    def _parse(row):
+        try:
+            return Bucket(int(row[0]), int(row[2]), float(row[3]), float(row[4]), float(row[5]),
+                          float(row[6]), float(row[7]))
+        except (IndexError, ValueError):
+            return None
+
+    def _partition(self, resolution: int, timestamp: float) -> str:
+        return time.strftime(RESOLUTIONS[resolution], time.gmtime(max(0, timestamp)))
+
+    def _path(self, resolution: int, partition: str) -> str:
+        return os.path.join(self.directory, str(resolution), partition + '.csv')
+
+    def _load_state(self):
+        try:
+            with open(os.path.join(self.directory, STATE_FILE)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save_state(self, clean: bool) -> None:
+        path = os.path.join(self.directory, STATE_FILE)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'clean': clean, 'watermarks': {str(r): w for r, w in self.watermarks.items()}}, f)
+        os.replace(tmp_path, path)
@@ -0,0 +1,189 @@
+import asyncio
+import concurrent.futures
+import heapq
+import inspect
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+DISPATCH_MODES = ('inline', 'threads', 'asyncio')
+
+
+class ScheduledSensor:
+    def __init__(self, sensor, interval: float):
+        self.sensor = sensor
+        self.interval = interval
+        self.runs = 0
+        self.missed = 0
+        self.overruns = 0
+        self.errors = 0
+        self.total_lateness = 0.0
+        self.max_lateness = 0.0
+        self.running = False
+
+    def run(self):
+        try:
+            self.sensor.sample(datetime.now())
+        except Exception as e:
+            self._failed(e)
+        finally:
+            self.running = False
+
+    async def run_async(self, loop, executor):
+        # Czujnik z `async def sample` czeka na pętli (np. na I/O), nie zajmując wątku;
+        # zwykły, blokujący sample idzie do puli wątków, żeby nie wstrzymywać pętli
+        try:
+            if inspect.iscoroutinefunction(self.sensor.sample):
+                await self.sensor.sample(datetime.now())
+            else:
+                await loop.run_in_executor(executor, self.sensor.sample, datetime.now())
+        except Exception as e:
+            self._failed(e)
+        finally:
+            self.running = False
+
+    def _failed(self, error):
+        self.errors += 1
+        print(f"[Scheduler] Błąd odczytu {self.sensor}: {error}")
+
+    def stats(self) -> dict:
+        return {
+            'interval': self.interval,
+            'runs': self.runs,
+            'missed': self.missed,
+            'overruns': self.overruns,
+            'errors': self.errors,
+            'mean_lateness': self.total_lateness / self.runs if self.runs else 0.0,
+            'max_lateness': self.max_lateness,
+        }
+
+
+class SensorScheduler:
+    # Harmonogram oparty na kopcu terminów: każdy czujnik ma własny interwał,
+    # kolejny termin liczymy od poprzedniego terminu (a nie od "teraz"), więc
+    # czas przetwarzania nie powoduje dryfu. Odczyty mogą być wykonywane
+    # w wątku harmonogramu, w puli wątków albo w pętli asyncio (czujniki
+    # z `async def sample` współbieżnie na pętli, pozostałe w puli wątków).
+    def __init__(self, dispatch: str = 'inline', workers: int = 4, lateness_samples: int = 10000):
+        if dispatch not in DISPATCH_MODES:
+            raise ValueError(f"Nieznany tryb wykonywania: {dispatch}")
+        self.dispatch = dispatch
+        self.workers = workers
+        self.jobs = []
+        self._heap = []
+        self._counter = itertools.count()
+        self._lateness = deque(maxlen=lateness_samples)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._running = False
+        self._thread = None
+        self._executor = None
+        self._loop = None
+        self._loop_thread = None
+        self._pending = set()
+
+    def add(self, sensor, interval: float, offset: float = 0.0) -> ScheduledSensor:
+        job = ScheduledSensor(sensor, interval)
+        with self._lock:
+            self.jobs.append(job)
+            heapq.heappush(self._heap, (time.monotonic() + offset, next(self._counter), job))
+        self._wakeup.set()
+        return job
+
+    def start(self) -> None:
+        if self._running:
+            return
+        self._running = True
+        if self.dispatch != 'inline':
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='sensor')
+        if self.dispatch == 'asyncio':
+            self._loop = asyncio.new_event_loop()
+            self._loop_thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+            self._loop_thread.start()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._running = False
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        if self._loop:
+            # czekamy na rozpoczęte odczyty, zanim zatrzymamy pętlę
+            concurrent.futures.wait(list(self._pending))
+        if self._executor:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        if self._loop:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop_thread.join()
+            self._loop.close()
+            self._loop = None
+
+    def _run(self) -> None:
+        heap = self._heap
+        while self._running:
+            with self._lock:
+                deadline, _, job = heap[0] if heap else (None, None, None)
+                delay = deadline - time.monotonic() if heap else None
+                if delay is not None and delay <= 0:
+                    heapq.heappop(heap)
+            if delay is None or delay > 0:
+                # add()/stop() budzą pętlę, gdy pojawi się wcześniejszy termin
+                if self._wakeup.wait(delay):
+                    self._wakeup.clear()
+                continue
+
+            now = time.monotonic()
+            lateness = now - deadline
+            self._dispatch(job, lateness)
+
+            next_deadline = deadline + job.interval
+            if next_deadline <= now:
+                # Nie nadrabiamy zaległych odczytów seriami - pomijamy je i liczymy
+                skipped = int((now - next_deadline) // job.interval) + 1
+                job.missed += skipped
+                next_deadline += skipped * job.interval
+            with self._lock:
+                heapq.heappush(heap, (next_deadline, next(self._counter), job))
+
+    def _dispatch(self, job: ScheduledSensor, lateness: float) -> None:
+        if job.running:
+            # poprzedni odczyt tego czujnika jeszcze trwa
+            job.overruns += 1
+            return
+        job.runs += 1
+        job.total_lateness += lateness
+        job.max_lateness = max(job.max_lateness, lateness)
+        self._lateness.append(lateness)
+        if self.dispatch == 'inline':
+            job.run()
+            return
+        job.running = True
+        if self.dispatch == 'threads':
+            self._executor.submit(job.run)
+        else:
+            future = asyncio.run_coroutine_threadsafe(job.run_async(self._loop, self._executor), self._loop)
+            self._pending.add(future)
+            future.add_done_callback(self._pending.discard)
+
+    def stats(self) -> dict:
+        lateness = sorted(self._lateness)
+
+        def percentile(q):
+            return lateness[min(len(lateness) - 1, int(len(lateness) * q))] if lateness else 0.0
+
+        return {
+            'sensors': len(self.jobs),
+            'runs': sum(job.runs for job in self.jobs),
+            'missed': sum(job.missed for job in self.jobs),
+            'overruns': sum(job.overruns for job in self.jobs),
+            'errors': sum(job.errors for job in self.jobs),
+            'jitter_p50': percentile(0.50),
+            'jitter_p99': percentile(0.99),
+            'jitter_max': lateness[-1] if lateness else 0.0,
+        }
@@ -1,20 +1,123 @@
+import abc
 import math
 import random
+import threading
 from datetime import datetime, time
+from time import perf_counter
 
-class Sensor:
-    def __init__(self):
+import numpy as np
+
+import metrics
+from fanout import Subscriber
+
+# Czas wywołania callbacków odczytu (dla Subscriberów to tylko wstawienie do kolejki;
+# pełne opóźnienie do odbiorcy mierzy subscriber_delivery_seconds)
+_CALLBACK_LATENCY = metrics.histogram('sensor_callback_seconds')
+
+# Subscribery z register_callback(queue_size=...) są wspólne dla czujników:
+# (callback, queue_size, overflow_policy) -> [Subscriber, liczba czujników].
+# 1000 czujników z tym samym callbackiem to jedna kolejka i jeden wątek.
+_SHARED_SUBSCRIBERS = {}
+_SHARED_LOCK = threading.Lock()
+
+
+def _as_datetime64(timestamps):
+    # Akceptujemy listę datetime albo tablicę datetime64; czas lokalny bez strefy
+    return np.asarray(timestamps, dtype='datetime64[us]')
+
+
+def _months_and_hours(timestamps):
+    months = timestamps.astype('datetime64[M]').astype(np.int64) % 12 + 1
+    hours = (timestamps - timestamps.astype('datetime64[D]')).astype('timedelta64[h]').astype(np.int64)
+    return months, hours
+
+
+class Sensor(abc.ABC):
+    unit = None
+
+    def __init__(self, seed=None, name=None):
+        self.name = name or self.__class__.__name__
         self.callbacks = []
+        self.batch_callbacks = []
+        self.subscribers = []
+        # Osobne generatory na instancję: ten sam seed daje te same odczyty
+        self.random = random.Random(seed)
+        self.rng = np.random.default_rng(seed)
 
-    def register_callback(self, callback):
+    def register_callback(self, callback, queue_size=0, overflow_policy='drop_oldest'):
+        # queue_size > 0: callback dostaje własną kolejkę i wątek (Subscriber),
+        # więc jego opóźnienia nie wstrzymują odczytów ani innych callbacków
+        # Ten sam callback u wielu czujników dzieli jeden Subscriber
+        if queue_size:
+            key = (callback, queue_size, overflow_policy)
+            with _SHARED_LOCK:
+                entry = _SHARED_SUBSCRIBERS.get(key)
+                if entry is None:
+                    entry = _SHARED_SUBSCRIBERS[key] = [Subscriber(callback, queue_size, overflow_policy), 0]
+                entry[1] += 1
+            callback = entry[0]
+            self.subscribers.append(key)
         self.callbacks.append(callback)
+        return callback
+
+    def register_batch_callback(self, callback):
+        self.batch_callbacks.append(callback)
 
     def _notify_callbacks(self, timestamp, value, unit):
         for callback in self.callbacks:
-            callback(self.__class__.__name__, timestamp, value, unit)
+            started = perf_counter()
+            callback(self.name, timestamp, value, unit)
+            _CALLBACK_LATENCY.record(perf_counter() - started)
+
+    def _notify_batch_callbacks(self, timestamps, values, unit):
+        # Callbacki paczkowe dostają całe tablice jednym wywołaniem; callbacki
+        # pojedynczych odczytów (np. Logger.log_and_send) - każdy odczyt osobno,
+        # tak samo jak przy get_reading(). Konwersja tablic tylko wtedy, gdy są.
+        for callback in self.batch_callbacks:
+            callback(self.name, timestamps, values, unit)
+        if self.callbacks:
+            for timestamp, value in zip(timestamps.astype('datetime64[us]').tolist(), values.tolist()):
+                self._notify_callbacks(timestamp, value, unit)
+
+    def close(self):
+        # Wspólny Subscriber zamyka ostatni korzystający z niego czujnik
+        for key in self.subscribers:
+            with _SHARED_LOCK:
+                entry = _SHARED_SUBSCRIBERS[key]
+                entry[1] -= 1
+                if entry[1]:
+                    continue
+                del _SHARED_SUBSCRIBERS[key]
+            entry[0].close()
+        self.subscribers = []
+
+    def get_readings(self, timestamps):
+        timestamps = _as_datetime64(timestamps)
+        values = self._generate(timestamps)
+        self._notify_batch_callbacks(timestamps, values, self.unit)
+        return values
+
+    def generate(self, n, start=None, step=1.0):
+        start = np.datetime64(start or datetime.now(), 'us')
+        timestamps = start + np.round(np.arange(n) * step * 1e6).astype('timedelta64[us]')
+        return timestamps, self.get_readings(timestamps)
+
+    @abc.abstractmethod
+    def sample(self, now):
+        # Jednolity sposób pobrania odczytu (używany przez harmonogram)
+        ...
+
+    @abc.abstractmethod
+    def _generate(self, timestamps):
+        # Wektorowe odczyty dla tablicy znaczników czasu (get_readings/generate)
+        ...
+
+    def __str__(self):
+        return f"{self.__class__.__name__}(name={self.name})"
 
 
 class TemperatureSensor(Sensor):
+    unit = "°C"
     monthly_avg = {
         1: -3.6, 2: -1.7, 3: 3.3, 4: 8.8, 5: 13.5, 6: 16.4,
         7: 17.9, 8: 17.5, 9: 14.1, 10: 9.4, 11: 3.7, 12: -1.2
@@ -28,35 +131,83 @@ class TemperatureSensor(Sensor):
         variation = 6 * math.cos(phase)
         temp = base_temp + variation
         value = round(max(-12, min(32, temp)), 1)
-        self._notify_callbacks(current_datetime, value, "°C")
+        self._notify_callbacks(current_datetime, value, self.unit)
         return value
 
+    def sample(self, now):
+        return self.get_reading(now)
+
+    def _generate(self, timestamps):
+        months, hours = _months_and_hours(timestamps)
+        monthly = np.array([self.monthly_avg[m] for m in range(1, 13)])
+        temp = monthly[months - 1] + 6 * np.cos((hours - 15) * (2 * math.pi / 24))
+        return np.round(np.clip(temp, -12, 32), 1)
+
 
 class PressureSensor(Sensor):
+    unit = "hPa"
+
     def get_reading(self):
-        pressure = random.gauss(1017.8, 10)
+        pressure = self.random.gauss(1017.8, 10)
         value = round(max(986.8, min(1041.6, pressure)), 1)
-        self._notify_callbacks(datetime.now(), value, "hPa")
+        self._notify_callbacks(datetime.now(), value, self.unit)
         return value
 
+    def sample(self, now):
+        return self.get_reading()
+
+    def _generate(self, timestamps):
+        pressure = self.rng.normal(1017.8, 10, len(timestamps))
+        return np.round(np.clip(pressure, 986.8, 1041.6), 1)
+
 
 class LightSensor(Sensor):
+    unit = "lux"
+
     def get_reading(self, hour):
         if 6 <= hour < 18:
-            value = round(random.uniform(10000, 25000), 1) if random.random() < 0.7 else 107.0
+            value = round(self.random.uniform(10000, 25000), 1) if self.random.random() < 0.7 else 107.0
         elif 4 <= hour < 6 or 18 <= hour < 20:
-            value = round(random.uniform(1.8, 10.8), 1)
+            value = round(self.random.uniform(1.8, 10.8), 1)
         else:
             choices = {'pochmurna': 0.0001, 'rozgwiezdzone': 0.0011, 'księżyc': 0.108,
-                       'uliczne': round(random.uniform(5, 10), 1)}
-            value = choices[random.choices(list(choices.keys()), weights=[0.3, 0.3, 0.2, 0.2])[0]]
-        self._notify_callbacks(datetime.now(), value, "lux")
+                       'uliczne': round(self.random.uniform(5, 10), 1)}
+            value = choices[self.random.choices(list(choices.keys()), weights=[0.3, 0.3, 0.2, 0.2])[0]]
+        self._notify_callbacks(datetime.now(), value, self.unit)
         return value
 
+    def sample(self, now):
+        return self.get_reading(now.hour)
+
+    def _generate(self, timestamps):
+        _, hours = _months_and_hours(timestamps)
+        n = len(timestamps)
+        rng = self.rng
+
+        day = np.where(rng.random(n) < 0.7, np.round(rng.uniform(10000, 25000, n), 1), 107.0)
+        dusk = np.round(rng.uniform(1.8, 10.8, n), 1)
+        # noc: pochmurna / rozgwieżdżona / księżyc / oświetlenie uliczne
+        night_choice = rng.choice(4, size=n, p=[0.3, 0.3, 0.2, 0.2])
+        night = np.array([0.0001, 0.0011, 0.108, 0.0])[night_choice]
+        night = np.where(night_choice == 3, np.round(rng.uniform(5, 10, n), 1), night)
+
+        is_day = (hours >= 6) & (hours < 18)
+        is_dusk = ((hours >= 4) & (hours < 6)) | ((hours >= 18) & (hours < 20))
+        return np.where(is_day, day, np.where(is_dusk, dusk, night))
+
 
 class AirQualitySensor(Sensor):
+    unit = "AQI"
+
     def get_reading(self):
-        aq = random.gauss(15.2, 3)
+        aq = self.random.gauss(15.2, 3)
         value = round(max(11.1, min(29.9, aq)), 1)
-        self._notify_callbacks(datetime.now(), value, "AQI")
-        return value
\ No newline at end of file
+        self._notify_callbacks(datetime.now(), value, self.unit)
+        return value
+
+    def sample(self, now):
+        return self.get_reading()
+
+    def _generate(self, timestamps):
+        aq = self.rng.normal(15.2, 3, len(timestamps))
+        return np.round(np.clip(aq, 11.1, 29.9), 1)
@@ -0,0 +1,172 @@
+"""Serwer odczytów bez GUI (bez PyQt6).
+
+    python -m server --port 9000
+"""
+import argparse
+import logging
+import signal
+import threading
+import time
+from datetime import datetime
+
+from metrics import MetricsServer, SnapshotWriter
+from network.config import load_config
+from server.core import IngestServer
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless sensor ingestion server")
+    parser.add_argument("--config", help="ścieżka do config.yaml")
+    parser.add_argument("--port", type=int, help="port TCP (domyślnie network_server.port z konfiguracji)")
+    parser.add_argument("--max-connections", type=int, default=10000)
+    parser.add_argument("--recv-buffer-size", type=int, default=65536)
+    parser.add_argument("--history-hours", type=float, default=0,
+                        help="trzymaj historię odczytów w pamięci (0 = wyłączone)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="liczba procesów nasłuchujących na porcie (SO_REUSEPORT); >1 = tryb wieloprocesowy")
+    parser.add_argument("--sink-config",
+                        help="konfiguracja loggera (JSON) do trwałego zapisu wszystkich odczytów po stronie serwera "
+                             "(domyślnie network_server.sink.config z konfiguracji)")
+    parser.add_argument("--durable-ack", action="store_true",
+                        help="ACK dopiero po zapisie odczytów na dysk (wymaga sinka; "
+                             "domyślnie network_server.sink.durable_ack)")
+    parser.add_argument("--stats-interval", type=float, default=10.0)
+    parser.add_argument("--metrics-port", type=int, default=0,
+                        help="port HTTP z metrykami (/metrics, /metrics.json); 0 = wyłączone")
+    parser.add_argument("--metrics-file", help="plik JSON z okresowym snapshotem metryk")
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s %(levelname)s %(message)s")
+    log = logging.getLogger("server")
+
+    # Te same ustawienia co serwer w GUI (network_server w config.yaml); opcje z wiersza poleceń mają pierwszeństwo
+    server_config = load_config(args.config).get("network_server") or {}
+    port = args.port if args.port is not None else server_config.get("port", 9000)
+    sink_config = server_config.get("sink") or {}
+    args.sink_config = args.sink_config or sink_config.get("config")
+    args.durable_ack = args.durable_ack or sink_config.get("durable_ack", False)
+
+    if args.durable_ack and not args.sink_config:
+        parser.error("--durable-ack wymaga --sink-config")
+    if args.workers > 1:
+        if args.history_hours > 0:
+            parser.error("--history-hours nie działa z --workers > 1 (procesy przekazują tylko agregaty)")
+        if args.sink_config:
+            parser.error("--sink-config (także network_server.sink) nie działa z --workers > 1")
+        from server.sharded import ShardedIngestServer
+        server = ShardedIngestServer(port, args.workers, max_connections=args.max_connections,
+                                     recv_buffer_size=args.recv_buffer_size)
+        _serve_sharded(server, args, log)
+        return
+
+    sink = None
+    if args.sink_config:
+        from server.sink import PersistenceSink
+        sink = PersistenceSink(args.sink_config, durable=args.durable_ack)
+
+    server = IngestServer(port, max_connections=args.max_connections,
+                          recv_buffer_size=args.recv_buffer_size, sink=sink)
+
+    history = None
+    if args.history_hours > 0:
+        from timeseries import SeriesStore
+        history = SeriesStore(retention=args.history_hours * 3600)
+
+    counter = {"readings": 0}
+
+    def on_reading(data):
+        counter["readings"] += 1
+        if history is not None:
+            _store(history, data)
+
+    def on_batch(readings):
+        counter["readings"] += len(readings)
+        if history is not None:
+            for data in readings:
+                _store(history, data)
+
+    server.new_data.connect(on_reading)
+    server.new_batch.connect(on_batch)
+    server.status_update.connect(lambda message: log.info(message))
+
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopping.set())
+    signal.signal(signal.SIGINT, lambda *_: stopping.set())
+
+    server.start()
+    print(f"Serwer nasłuchuje na porcie {port}", flush=True)
+    metrics_server, snapshot_writer = _start_metrics(args)
+
+    last_count, last_time = 0, time.monotonic()
+    while not stopping.wait(args.stats_interval):
+        now = time.monotonic()
+        count = counter["readings"]
+        rate = (count - last_count) / (now - last_time)
+        line = f"{server.connection_count} połączeń, {rate:.0f} odczytów/s"
+        if sink is not None:
+            sink_stats = sink.stats()
+            line += f", zapisane {sink_stats['rows_written']}, w kolejce {sink_stats['queue_depth']}"
+        print(line, flush=True)
+        if history is not None:
+            history.expire()
+        last_count, last_time = count, now
+
+    server.stop()
+    _stop_metrics(metrics_server, snapshot_writer)
+
+
+def _serve_sharded(server, args, log):
+    server.status_update.connect(lambda message: log.info(message))
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopping.set())
+    signal.signal(signal.SIGINT, lambda *_: stopping.set())
+
+    server.start()
+    print(f"Serwer nasłuchuje na porcie {server.port} ({server.workers} procesów)", flush=True)
+    metrics_server, snapshot_writer = _start_metrics(args)
+
+    last_count, last_time = 0, time.monotonic()
+    while not stopping.wait(args.stats_interval):
+        now = time.monotonic()
+        stats = server.stats()
+        rate = (stats["messages"] - last_count) / (now - last_time)
+        print(f"{stats['connections']} połączeń, {rate:.0f} odczytów/s, "
+              f"{stats['sensors']} czujników, per proces {stats['worker_messages']}", flush=True)
+        last_count, last_time = stats["messages"], now
+
+    server.stop()
+    _stop_metrics(metrics_server, snapshot_writer)
+
+
+def _start_metrics(args):
+    metrics_server = snapshot_writer = None
+    if args.metrics_port:
+        metrics_server = MetricsServer(args.metrics_port)
+        metrics_server.start()
+    if args.metrics_file:
+        snapshot_writer = SnapshotWriter(args.metrics_file, args.stats_interval)
+        snapshot_writer.start()
+    return metrics_server, snapshot_writer
+
+
+def _stop_metrics(metrics_server, snapshot_writer):
+    if snapshot_writer:
+        snapshot_writer.stop()
+    if metrics_server:
+        metrics_server.stop()
+
+
+def _store(history, data):
+    value = data.get("value")
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return
+    try:
+        timestamp = datetime.fromisoformat(data.get("timestamp")).timestamp()
+    except (TypeError, ValueError):
+        timestamp = time.time()
+    history.add(data.get("sensor_id") or "UNKNOWN", timestamp, value, data.get("unit"))
+
+
+if __name__ == "__main__":
+    main()
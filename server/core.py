@@ -0,0 +1,415 @@
+import selectors
+import socket
+import threading
+import json
+import logging
+import struct
+from collections import deque
+
+import metrics
+from network.protocol import BINARY_FORMAT, BinaryDecoder, choose_format
+
+
+class Signal:
+    # Prosty odpowiednik pyqtSignal bez zależności od Qt: subskrybenci są
+    # wywoływani synchronicznie w wątku, który emituje sygnał.
+    def __init__(self):
+        self._subscribers = []
+
+    def connect(self, callback) -> None:
+        self._subscribers.append(callback)
+
+    def disconnect(self, callback) -> None:
+        self._subscribers.remove(callback)
+
+    def emit(self, *args) -> None:
+        for callback in list(self._subscribers):
+            callback(*args)
+
+
+class LineFramer:
+    def __init__(self, max_line_size: int = 1024 * 1024):
+        self.max_line_size = max_line_size
+        self._buffer = bytearray()
+        self._scan_from = 0
+
+    def feed(self, data) -> list:
+        # Szukamy '\n' tylko w nowych bajtach, a przetworzony prefiks usuwamy
+        # raz na porcję danych - koszt jest liniowy względem liczby bajtów.
+        buffer = self._buffer
+        buffer += data
+        view = memoryview(buffer)
+        lines = []
+        start = 0
+        try:
+            while True:
+                end = buffer.find(b"\n", max(start, self._scan_from))
+                if end < 0:
+                    break
+                lines.append(bytes(view[start:end]))
+                start = end + 1
+        finally:
+            view.release()
+        if start:
+            del buffer[:start]
+        self._scan_from = len(buffer)
+        if len(buffer) > self.max_line_size:
+            raise ValueError(f"Line exceeds {self.max_line_size} bytes")
+        return lines
+
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    def take_pending(self) -> bytes:
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        self._scan_from = 0
+        return data
+
+
+class _Connection:
+    __slots__ = ("sock", "addr", "framer", "decoder", "outbuf", "writing")
+
+    def __init__(self, sock: socket.socket, addr, max_line_size: int):
+        self.sock = sock
+        self.addr = addr
+        self.framer = LineFramer(max_line_size)
+        self.decoder = None
+        self.outbuf = bytearray()
+        self.writing = False
+
+
+_WAKEUP = object()
+
+
+class IngestServer:
+
+    def __init__(
+        self,
+        port: int,
+        logger: logging.Logger = None,
+        recv_buffer_size: int = 65536,
+        max_connections: int = 10000,
+        max_line_size: int = 1024 * 1024,
+        backlog: int = 1024,
+        reuse_port: bool = False,
+        sink=None
+    ):
+        self.new_data = Signal()
+        self.new_batch = Signal()
+        self.status_update = Signal()
+        self.port = port
+        self.logger = logger or logging.getLogger(__name__)
+        self.recv_buffer_size = recv_buffer_size
+        self.max_connections = max_connections
+        self.max_line_size = max_line_size
+        self.backlog = backlog
+        # SO_REUSEPORT: kilka procesów nasłuchuje na tym samym porcie, a jądro
+        # rozdziela między nie nowe połączenia (server.sharded)
+        self.reuse_port = reuse_port
+        # Zapis odczytów po stronie serwera (server.sink.PersistenceSink albo obiekt
+        # z tym samym interfejsem: start, stop, submit(readings, done), durable).
+        # Przy sink.durable ACK idzie dopiero po zapisie paczki na dysk: wątek
+        # zapisu odkłada potwierdzenia do _acks i budzi selektor przez socketpair.
+        self.sink = sink
+        self._acks = deque()
+        self._wakeup = None
+        self._sock = None
+        self._selector = None
+        self._connections = {}
+        self._running = False
+        self._thread = None
+        # Metryki serwera; pojedyncze wiadomości logujemy tylko z próbkowaniem
+        self._labels = {"port": str(port)}
+        self._messages = metrics.meter("server_messages", self._labels)
+        self._bytes_received = metrics.counter("server_bytes_received", self._labels)
+        self._parse_errors = metrics.counter("server_parse_errors", self._labels)
+        self._sampled = metrics.SampledLog(self.logger)
+
+    @property
+    def connection_count(self) -> int:
+        return len(self._connections)
+
+    def start(self) -> None:
+        if self._running:
+            self.logger.info("Server is already running")
+            return
+
+        try:
+            self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            if self.reuse_port:
+                self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+            self._sock.bind(('', self.port))
+            self._sock.listen(self.backlog)
+            self._sock.setblocking(False)
+            self._selector = selectors.DefaultSelector()
+            self._selector.register(self._sock, selectors.EVENT_READ, None)
+            if self.sink is not None:
+                self._wakeup = socket.socketpair()
+                for sock in self._wakeup:
+                    sock.setblocking(False)
+                self._selector.register(self._wakeup[0], selectors.EVENT_READ, _WAKEUP)
+                self.sink.start()
+            # gauge trzyma referencję do serwera - usuwany w stop()
+            metrics.gauge("server_connections", self._labels, fn=lambda: len(self._connections))
+            self._running = True
+            self.logger.info(f"Server listening on port {self.port}")
+            self.status_update.emit(f"Serwer nasłuchuje na porcie {self.port}")
+
+            self._thread = threading.Thread(target=self._serve, daemon=True)
+            self._thread.start()
+        except Exception as e:
+            self.logger.error(f"Failed to start server: {e}")
+            self.status_update.emit(f"Błąd uruchamiania serwera: {e}")
+            self._running = False
+            self._close_all()
+            raise
+
+    def stop(self) -> None:
+        self._running = False
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=2)
+            self.logger.info("Server thread stopped")
+        self._close_all()
+        metrics.REGISTRY.remove("server_connections", self._labels)
+        if self.sink is not None:
+            # odczyty z kolejki zostają zapisane; potwierdzeń nie ma już komu wysłać
+            self.sink.stop()
+            self._acks.clear()
+        self.status_update.emit("Serwer zatrzymany")
+
+    def _close_all(self) -> None:
+        for conn in list(self._connections.values()):
+            self._close_connection(conn)
+        if self._selector:
+            self._selector.close()
+            self._selector = None
+        if self._wakeup:
+            for sock in self._wakeup:
+                sock.close()
+            self._wakeup = None
+        if self._sock:
+            try:
+                self._sock.close()
+                self.logger.info("Server socket closed")
+            except Exception as e:
+                self.logger.error(f"Error closing server socket: {e}")
+            finally:
+                self._sock = None
+
+    def _serve(self) -> None:
+        # Jeden wątek i selektor obsługują wszystkie połączenia
+        selector = self._selector
+        while self._running:
+            try:
+                events = selector.select(timeout=0.2)
+            except OSError:
+                break
+            for key, mask in events:
+                conn = key.data
+                if conn is None:
+                    self._accept_clients()
+                    continue
+                if conn is _WAKEUP:
+                    self._send_durable_acks()
+                    continue
+                try:
+                    if mask & selectors.EVENT_READ:
+                        self._handle_client(conn)
+                    if mask & selectors.EVENT_WRITE and conn.sock.fileno() != -1:
+                        self._flush(conn)
+                except Exception as e:
+                    # błąd obsługi (np. w subskrybencie sygnału) zamyka tylko to połączenie
+                    self.logger.exception(f"Error handling client {conn.addr}: {e}")
+                    self.status_update.emit(f"Błąd obsługi klienta {conn.addr}: {e}")
+                    self._close_connection(conn)
+
+    def _accept_clients(self) -> None:
+        while True:
+            try:
+                client_sock, addr = self._sock.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as e:
+                self.logger.error(f"Error accepting client: {e}")
+                self.status_update.emit(f"Błąd połączenia klienta: {e}")
+                return
+
+            if len(self._connections) >= self.max_connections:
+                self.logger.warning(f"Connection limit reached, rejecting {addr}")
+                client_sock.close()
+                continue
+
+            client_sock.setblocking(False)
+            client_sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.recv_buffer_size)
+            conn = _Connection(client_sock, addr, self.max_line_size)
+            self._connections[client_sock.fileno()] = conn
+            self._selector.register(client_sock, selectors.EVENT_READ, conn)
+            # zaległość połączenia: bajty czekające na pełną ramkę + niewysłane ACK-i
+            metrics.gauge("server_connection_backlog_bytes", self._connection_labels(conn),
+                          fn=lambda conn=conn: (conn.decoder or conn.framer).pending() + len(conn.outbuf))
+            self.logger.info(f"Connection from {addr}")
+            self.status_update.emit(f"Połączono z {addr}")
+
+    def _handle_client(self, conn: _Connection) -> None:
+        addr = conn.addr
+        try:
+            chunk = conn.sock.recv(self.recv_buffer_size)
+        except (BlockingIOError, InterruptedError):
+            return
+        except ConnectionResetError:
+            self._close_connection(conn)
+            return
+        except OSError as e:
+            self.logger.error(f"Error handling client {addr}: {e}")
+            self.status_update.emit(f"Błąd obsługi klienta {addr}: {e}")
+            self._close_connection(conn)
+            return
+        if not chunk:
+            self._close_connection(conn)
+            return
+        self._bytes_received.inc(len(chunk))
+
+        try:
+            if conn.decoder:
+                messages = conn.decoder.feed(chunk)
+            else:
+                messages = self._parse_lines(conn, conn.framer.feed(chunk))
+        except (ValueError, KeyError, struct.error) as e:
+            self._parse_errors.inc()
+            self.logger.error(f"Error handling client {addr}: {e}")
+            self.status_update.emit(f"Błąd obsługi klienta {addr}: {e}")
+            self._close_connection(conn)
+            return
+
+        for seq, message in messages:
+            self._dispatch(conn, message, seq)
+        if conn.outbuf:
+            self._flush(conn)
+
+    def _parse_lines(self, conn: _Connection, lines: list) -> list:
+        messages = []
+        for i, line in enumerate(lines):
+            try:
+                message = json.loads(line)
+            except (json.JSONDecodeError, UnicodeDecodeError) as e:
+                self._parse_errors.inc()
+                self._sampled.error(("json", conn.addr), "JSON error from %s: %s", conn.addr, e)
+                self.status_update.emit(f"Błąd dekodowania JSON od {conn.addr}")
+                continue
+            if isinstance(message, dict) and message.get("type") == "hello":
+                wire_format = choose_format(message)
+                conn.outbuf += f"HELLO {wire_format}\n".encode()
+                self.logger.info(f"Client {conn.addr} uses {wire_format} format")
+                if wire_format == BINARY_FORMAT:
+                    # Reszta strumienia to już ramki binarne
+                    conn.decoder = BinaryDecoder()
+                    rest = b"".join(line + b"\n" for line in lines[i + 1:]) + conn.framer.take_pending()
+                    messages.extend(conn.decoder.feed(rest))
+                    break
+                continue
+            # Klient w trybie potokowym numeruje wiadomości - odsyłamy numer w ACK
+            seq = message.pop("seq", None) if isinstance(message, dict) else None
+            messages.append((seq, message))
+        return messages
+
+    def _dispatch(self, conn: _Connection, message, seq) -> None:
+        if isinstance(message, dict) and message.get("type") == "batch":
+            message = message.get("readings") or []
+        # Subskrybenci dostają wyłącznie obiekty JSON; inne wartości (liczby,
+        # napisy, listy w paczce) są odrzucane jak błędy parsowania, bez ACK
+        if isinstance(message, list):
+            readings = [data for data in message if isinstance(data, dict)]
+            if len(readings) != len(message):
+                self._parse_errors.inc(len(message) - len(readings))
+                self._sampled.error(("type", conn.addr), "Dropped %d non-object readings from %s",
+                                    len(message) - len(readings), conn.addr)
+            message = readings
+            # Cała paczka to jeden sygnał i jedno potwierdzenie
+            self._sampled.info("batch", "Received batch of %d readings from %s", len(message), conn.addr)
+            self._messages.inc(len(message))
+            self.new_batch.emit(message)
+        elif isinstance(message, dict):
+            self._sampled.info("message", "Received from %s: %s", conn.addr, message)
+            self._messages.inc()
+            self.new_data.emit(message)
+        else:
+            self._parse_errors.inc()
+            self._sampled.error(("type", conn.addr), "Dropped non-object message from %s: %r", conn.addr, message)
+            return
+        ack = b"ACK\n" if not seq else f"ACK {seq}\n".encode()
+        if self.sink is not None:
+            readings = message if isinstance(message, list) else [message]
+            if self.sink.durable:
+                self.sink.submit(readings, lambda: self._durable_ack(conn, ack))
+                return
+            self.sink.submit(readings)
+        conn.outbuf += ack
+
+    def _durable_ack(self, conn: _Connection, ack: bytes) -> None:
+        # Wołane w wątku zapisu po trwałym zapisie paczki
+        self._acks.append((conn, ack))
+        wakeup = self._wakeup
+        if wakeup is None:
+            return
+        try:
+            wakeup[1].send(b"\0")
+        except (BlockingIOError, InterruptedError):
+            # bufor pełny - selektor i tak jest już obudzony
+            pass
+        except OSError:
+            pass
+
+    def _send_durable_acks(self) -> None:
+        try:
+            while self._wakeup[0].recv(4096):
+                pass
+        except (BlockingIOError, InterruptedError):
+            pass
+        pending = set()
+        while self._acks:
+            conn, ack = self._acks.popleft()
+            if conn.sock.fileno() == -1:
+                continue
+            conn.outbuf += ack
+            pending.add(conn)
+        for conn in pending:
+            if conn.sock.fileno() != -1:
+                self._flush(conn)
+
+    def _flush(self, conn: _Connection) -> None:
+        # Potwierdzenia z całej porcji danych wysyłamy jednym send()
+        try:
+            sent = conn.sock.send(conn.outbuf)
+            del conn.outbuf[:sent]
+        except (BlockingIOError, InterruptedError):
+            pass
+        except OSError as e:
+            self.logger.error(f"Error handling client {conn.addr}: {e}")
+            self._close_connection(conn)
+            return
+
+        if conn.outbuf and not conn.writing:
+            self._selector.modify(conn.sock, selectors.EVENT_READ | selectors.EVENT_WRITE, conn)
+            conn.writing = True
+        elif not conn.outbuf and conn.writing:
+            self._selector.modify(conn.sock, selectors.EVENT_READ, conn)
+            conn.writing = False
+
+    def _connection_labels(self, conn: _Connection) -> dict:
+        host, port = conn.addr[:2]
+        return dict(self._labels, conn=f"{host}:{port}")
+
+    def _close_connection(self, conn: _Connection) -> None:
+        fileno = conn.sock.fileno()
+        if fileno == -1:
+            return
+        self._connections.pop(fileno, None)
+        metrics.REGISTRY.remove("server_connection_backlog_bytes", self._connection_labels(conn))
+        try:
+            if self._selector:
+                self._selector.unregister(conn.sock)
+        except (KeyError, ValueError):
+            pass
+        conn.sock.close()
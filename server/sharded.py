@@ -0,0 +1,245 @@
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from datetime import datetime
+from multiprocessing.connection import wait
+
+import metrics
+from rollups import Bucket
+from server.core import IngestServer, Signal
+
+
+def _worker_main(index: int, port: int, conn, flush_interval: float, options: dict) -> None:
+    # Proces roboczy: własny IngestServer na wspólnym porcie (SO_REUSEPORT).
+    # Odczyty są tylko agregowane lokalnie per czujnik; co `flush_interval`
+    # sekund częściowe agregaty idą rurą do procesu nadrzędnego, więc koszt
+    # przesyłu zależy od liczby czujników, a nie od liczby wiadomości.
+    logging.basicConfig(level=options.pop("log_level", logging.WARNING))
+    server = IngestServer(port, reuse_port=True, **options)
+    lock = threading.Lock()
+    state = {"partial": {}, "messages": 0}
+
+    def on_reading(data):
+        with lock:
+            _aggregate(state, data)
+
+    def on_batch(readings):
+        with lock:
+            for data in readings:
+                _aggregate(state, data)
+
+    server.new_data.connect(on_reading)
+    server.new_batch.connect(on_batch)
+    try:
+        server.start()
+    except Exception as e:
+        conn.send(("error", index, str(e)))
+        return
+    conn.send(("ready", index, os.getpid()))
+
+    def flush():
+        with lock:
+            partial, state["partial"] = state["partial"], {}
+            messages, state["messages"] = state["messages"], 0
+        conn.send(("stats", index, messages, server.connection_count, partial))
+
+    try:
+        while not conn.poll(flush_interval):
+            flush()
+    except (EOFError, OSError, KeyboardInterrupt):
+        # proces nadrzędny zniknął albo przerwanie z terminala - kończymy
+        pass
+    server.stop()
+    try:
+        flush()
+        conn.send(("stopped", index))
+    except (OSError, EOFError):
+        pass
+
+
+def _aggregate(state: dict, data) -> None:
+    state["messages"] += 1
+    if not isinstance(data, dict):
+        return
+    value = data.get("value")
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return
+    try:
+        timestamp = datetime.fromisoformat(data.get("timestamp")).timestamp()
+    except (TypeError, ValueError):
+        timestamp = time.time()
+    sensor_id = data.get("sensor_id") or data.get("Sensor") or "UNKNOWN"
+    entry = state["partial"].get(sensor_id)
+    if entry is None:
+        # [count, sum, min, max, last, last_ts, unit] - tak samo jak rollups.Bucket
+        state["partial"][sensor_id] = [1, value, value, value, value, timestamp, data.get("unit")]
+        return
+    entry[0] += 1
+    entry[1] += value
+    if value < entry[2]:
+        entry[2] = value
+    if value > entry[3]:
+        entry[3] = value
+    if timestamp >= entry[5]:
+        entry[4], entry[5], entry[6] = value, timestamp, data.get("unit")
+
+
+class ShardedIngestServer:
+    # Serwer w N procesach: każdy proces roboczy nasłuchuje na tym samym porcie
+    # (SO_REUSEPORT, jądro rozkłada połączenia), sam parsuje wiadomości i liczy
+    # agregaty, więc parsowanie nie dzieli jednego GIL-a. Proces nadrzędny
+    # scala częściowe agregaty (rollups.Bucket) w stan per czujnik: liczba,
+    # suma, min, max i ostatnia wartość (wg znacznika czasu, bo odczyty jednego
+    # czujnika mogą przyjść różnymi połączeniami do różnych procesów).
+    #
+    # Sygnały: new_aggregates(dict sensor_id -> Bucket) z częściowymi
+    # agregatami od ostatniego przekazania, status_update(str) jak w IngestServer.
+    def __init__(
+        self,
+        port: int,
+        workers: int = None,
+        flush_interval: float = 0.2,
+        logger: logging.Logger = None,
+        **options
+    ):
+        if not port:
+            raise ValueError("Tryb wieloprocesowy wymaga stałego numeru portu")
+        self.port = port
+        self.workers = workers or os.cpu_count() or 1
+        self.flush_interval = flush_interval
+        self.logger = logger or logging.getLogger(__name__)
+        self.options = dict(options, log_level=self.logger.getEffectiveLevel())
+        self.new_aggregates = Signal()
+        self.status_update = Signal()
+        self.sensors = {}
+        self.units = {}
+        self.messages = 0
+        self._worker_messages = [0] * self.workers
+        self._worker_connections = [0] * self.workers
+        self._processes = []
+        self._conns = []
+        self._lock = threading.Lock()
+        self._thread = None
+        self._running = False
+        self._labels = {"port": str(port), "mode": "sharded"}
+        self._meter = metrics.meter("server_messages", self._labels)
+
+    @property
+    def connection_count(self) -> int:
+        return sum(self._worker_connections)
+
+    def start(self, timeout: float = 10.0) -> None:
+        if self._running:
+            self.logger.info("Server is already running")
+            return
+        # spawn: proces nadrzędny może mieć już wątki (np. GUI), których fork nie powinien kopiować
+        context = multiprocessing.get_context("spawn")
+        for index in range(self.workers):
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(target=_worker_main, name=f"ingest-worker-{index}", daemon=True,
+                                      args=(index, self.port, child_conn, self.flush_interval, self.options))
+            process.start()
+            child_conn.close()
+            self._processes.append(process)
+            self._conns.append(parent_conn)
+
+        deadline = time.monotonic() + timeout
+        for conn in self._conns:
+            if not conn.poll(max(0.0, deadline - time.monotonic())):
+                self._terminate()
+                raise TimeoutError("Proces roboczy serwera nie wystartował")
+            message = conn.recv()
+            if message[0] == "error":
+                self._terminate()
+                raise OSError(f"Proces roboczy {message[1]}: {message[2]}")
+
+        # gauge trzyma referencję do serwera - usuwany w stop()
+        metrics.gauge("server_connections", self._labels, fn=lambda: self.connection_count)
+        self._running = True
+        self._thread = threading.Thread(target=self._receive, name="ingest-merge", daemon=True)
+        self._thread.start()
+        self.logger.info(f"Server listening on port {self.port} ({self.workers} processes)")
+        self.status_update.emit(f"Serwer nasłuchuje na porcie {self.port} ({self.workers} procesów)")
+
+    def stop(self, timeout: float = 5.0) -> None:
+        if not self._running:
+            return
+        for conn in self._conns:
+            try:
+                conn.send("stop")
+            except OSError:
+                pass
+        # wątek scalający odbiera jeszcze ostatnie agregaty i kończy po "stopped" od wszystkich
+        self._thread.join(timeout)
+        self._running = False
+        self._thread = None
+        self._terminate(timeout)
+        metrics.REGISTRY.remove("server_connections", self._labels)
+        self.status_update.emit("Serwer zatrzymany")
+
+    def snapshot(self) -> dict:
+        # Stan per czujnik scalony ze wszystkich procesów
+        with self._lock:
+            return {sensor_id: dict(bucket.as_dict(sensor_id, 0), unit=self.units.get(sensor_id),
+                                    last_timestamp=bucket.last_ts)
+                    for sensor_id, bucket in self.sensors.items()}
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "messages": self.messages,
+            "messages_per_s": self._meter.rate(),
+            "worker_messages": list(self._worker_messages),
+            "connections": self.connection_count,
+            "sensors": len(self.sensors),
+        }
+
+    def _receive(self) -> None:
+        active = set(self._conns)
+        while active:
+            for conn in wait(list(active), timeout=1.0):
+                try:
+                    message = conn.recv()
+                except (EOFError, OSError):
+                    active.discard(conn)
+                    continue
+                if message[0] == "stats":
+                    self._merge(*message[1:])
+                elif message[0] == "stopped":
+                    active.discard(conn)
+            if not any(process.is_alive() for process in self._processes):
+                break
+
+    def _merge(self, index: int, messages: int, connections: int, partial: dict) -> None:
+        self._worker_messages[index] += messages
+        self._worker_connections[index] = connections
+        self.messages += messages
+        if messages:
+            self._meter.inc(messages)
+        if not partial:
+            return
+        update = {}
+        with self._lock:
+            for sensor_id, (count, total, low, high, last, last_ts, unit) in partial.items():
+                bucket = Bucket(0, count, total, low, high, last, last_ts)
+                total_bucket = self.sensors.get(sensor_id)
+                if total_bucket is None:
+                    total_bucket = self.sensors[sensor_id] = Bucket(0)
+                if total_bucket.last_ts is None or last_ts >= total_bucket.last_ts:
+                    self.units[sensor_id] = unit
+                total_bucket.merge(bucket)
+                update[sensor_id] = bucket
+        self.new_aggregates.emit(update)
+
+    def _terminate(self, timeout: float = 1.0) -> None:
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        for conn in self._conns:
+            conn.close()
+        self._processes = []
+        self._conns = []
@@ -0,0 +1,111 @@
+import queue
+import threading
+from datetime import datetime
+
+import metrics
+from logger import Logger
+
+_STOP = object()
+
+
+class PersistenceSink:
+    # Trwały zapis wszystkich odczytów przyjętych przez IngestServer.
+    # Zapis robi Logger bez sieci (ten sam plik konfiguracyjny: log_dir,
+    # filename_pattern, max_size_mb, retention_days, storage, fsync...), więc
+    # rotacja, archiwa i retencja działają tak samo jak po stronie czujników.
+    #
+    # Write-behind: submit() tylko wrzuca paczkę do kolejki, a osobny wątek
+    # zabiera wszystko, co czeka, i zapisuje jednym flushem (group commit).
+    # Wątek serwera czeka na dysk jedynie przy pełnej kolejce (queue_size).
+    #
+    # durable=True: po zapisie paczki robimy fsync (SQLite: synchronous=FULL)
+    # i dopiero wtedy wołamy `done` przekazane do submit() - serwer wysyła
+    # wtedy ACK, więc potwierdzony odczyt przeżywa awarię procesu i zasilania.
+    # Przy błędzie zapisu `done` nie jest wołane: klient nie dostaje ACK
+    # i wyśle odczyty ponownie.
+    def __init__(self, config_path: str, durable: bool = False, queue_size: int = 100000):
+        self.logger = Logger(config_path)
+        self.durable = durable
+        if durable and self.logger.storage:
+            self.logger.storage.synchronous = 'FULL'
+        self.rows_written = 0
+        self.errors = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._labels = {'log_dir': self.logger.log_dir}
+
+    def start(self) -> None:
+        if self._thread:
+            return
+        self.logger.start()
+        # gauge trzyma referencję do kolejki - usuwany w stop()
+        metrics.gauge('server_sink_queue_depth', self._labels, fn=self._queue.qsize)
+        self._thread = threading.Thread(target=self._run, name='server-sink', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if not self._thread:
+            return
+        # sentinel na końcu kolejki - wszystko, co przed nim, zostanie zapisane
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._thread = None
+        metrics.REGISTRY.remove('server_sink_queue_depth', self._labels)
+        self.logger.stop()
+
+    def submit(self, readings: list, done=None) -> None:
+        self._queue.put((readings, done))
+
+    def stats(self) -> dict:
+        return {
+            'queue_depth': self._queue.qsize(),
+            'rows_written': self.rows_written,
+            'commits': self.logger.commits,
+            'errors': self.errors,
+        }
+
+    def _run(self) -> None:
+        while True:
+            try:
+                item = self._queue.get(timeout=1.0)
+            except queue.Empty:
+                # brak odczytów, ale zaległy fsync i rotacja czasowa nadal muszą się wykonać
+                self._commit([], [])
+                continue
+            entries, callbacks = [], []
+            stopping = False
+            while True:
+                if item is _STOP:
+                    stopping = True
+                    break
+                readings, done = item
+                entries.extend(_entry(data) for data in readings if isinstance(data, dict))
+                if done is not None:
+                    callbacks.append(done)
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            self._commit(entries, callbacks)
+            if stopping:
+                return
+
+    def _commit(self, entries: list, callbacks: list) -> None:
+        try:
+            self.logger.write_batch(entries, sync=self.durable and bool(entries))
+        except Exception as e:
+            self.errors += 1
+            print(f"[Sink] Błąd zapisu {len(entries)} odczytów: {e}")
+            return
+        self.rows_written += len(entries)
+        for done in callbacks:
+            done()
+
+
+def _entry(data: dict) -> tuple:
+    try:
+        timestamp = datetime.fromisoformat(data.get("timestamp"))
+    except (TypeError, ValueError):
+        timestamp = datetime.now()
+    sensor_id = data.get("sensor_id") or data.get("Sensor") or "UNKNOWN"
+    return timestamp, sensor_id, data.get("value"), data.get("unit")
@@ -0,0 +1,191 @@
+import abc
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+STORAGE_BACKENDS = ('csv', 'sqlite')
+
+
+class StorageBackend(abc.ABC):
+    # Magazyn odczytów Loggera zamiast plików CSV. Domyślny backend CSV
+    # (pliki, rotacja, archiwa) jest wbudowany w Logger; inne backendy
+    # implementują metody abstrakcyjne, a Logger woła je z _flush_buffer,
+    # read_logs i last_reading.
+    def open(self) -> None:
+        pass
+
+    @abc.abstractmethod
+    def write(self, entries) -> None:
+        # entries: krotki (timestamp: datetime, sensor_id, value, unit)
+        ...
+
+    @abc.abstractmethod
+    def read(self, start_ts: float, end_ts: float, sensor_id: str = None):
+        ...
+
+    @abc.abstractmethod
+    def last(self, sensor_id: str):
+        ...
+
+    def close(self) -> None:
+        pass
+
+    def stats(self) -> dict:
+        return {}
+
+
+class SQLiteStorage(StorageBackend):
+    # Odczyty w bazie SQLite (tryb WAL: zapis nie blokuje czytelników).
+    #
+    # Dane są podzielone na tabele po `partition_hours` (wg czasu UTC odczytu),
+    # każda z indeksem (sensor_id, timestamp). Tabela `partitions` trzyma
+    # zakres czasu każdej z nich, więc zapytania otwierają tylko pasujące
+    # tabele, a retencja to DROP TABLE całej partycji zamiast usuwania wierszy.
+    # Znacznik czasu to liczba mikrosekund od epoki (jak w archiwach Parquet).
+    def __init__(self, path: str, partition_hours: float = 24, retention_days: float = 30,
+                 synchronous: str = 'NORMAL'):
+        if partition_hours <= 0:
+            raise ValueError(f"Nieprawidłowy rozmiar partycji: {partition_hours} h")
+        self.path = path
+        self.partition_seconds = int(partition_hours * 3600)
+        self.retention_days = retention_days
+        self.synchronous = synchronous
+        self.rows_written = 0
+        self.partitions_dropped = 0
+        self._conn = None
+        self._partitions = {}
+        self._lock = threading.Lock()
+
+    def open(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                return
+            # zapis może iść z wątku zapisującego Loggera, stąd check_same_thread=False
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute(f'PRAGMA synchronous={self.synchronous}')
+            self._conn.execute('CREATE TABLE IF NOT EXISTS partitions '
+                               '(name TEXT PRIMARY KEY, start INTEGER NOT NULL, end INTEGER NOT NULL)')
+            self._partitions = {start: name for name, start in
+                                self._conn.execute('SELECT name, start FROM partitions')}
+            self._expire()
+
+    def write(self, entries) -> None:
+        if not entries:
+            return
+        by_partition = {}
+        for timestamp, sensor_id, value, unit in entries:
+            ts = timestamp.timestamp()
+            start = int(ts // self.partition_seconds) * self.partition_seconds
+            by_partition.setdefault(start, []).append((round(ts * 1e6), sensor_id, value, unit))
+        with self._lock:
+            conn = self._conn
+            created = False
+            # jedna transakcja na cały bufor, executemany na partycję
+            conn.execute('BEGIN')
+            try:
+                for start, rows in by_partition.items():
+                    name = self._partitions.get(start)
+                    if name is None:
+                        name = self._create_partition(start)
+                        created = True
+                    conn.executemany(f'INSERT INTO {name} VALUES (?, ?, ?, ?)', rows)
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                # nowe partycje zniknęły razem z transakcją
+                self._partitions = {start: name for name, start in
+                                    conn.execute('SELECT name, start FROM partitions')}
+                raise
+            self.rows_written += len(entries)
+            if created:
+                self._expire()
+
+    def read(self, start_ts: float, end_ts: float, sensor_id: str = None):
+        # Osobne połączenie tylko do odczytu - w trybie WAL nie czeka na zapis
+        conn = sqlite3.connect(f'file:{self.path}?mode=ro', uri=True)
+        try:
+            names = [name for name, in conn.execute(
+                'SELECT name FROM partitions WHERE end > ? AND start <= ? ORDER BY start',
+                (start_ts, end_ts))]
+            bounds = (int(start_ts * 1e6), int(end_ts * 1e6))
+            for name in names:
+                try:
+                    if sensor_id is None:
+                        rows = conn.execute(f'SELECT * FROM {name} WHERE timestamp BETWEEN ? AND ? '
+                                            'ORDER BY rowid', bounds)
+                    else:
+                        rows = conn.execute(f'SELECT * FROM {name} WHERE sensor_id = ? '
+                                            'AND timestamp BETWEEN ? AND ? ORDER BY timestamp',
+                                            (sensor_id,) + bounds)
+                except sqlite3.OperationalError:
+                    # partycja usunięta przez retencję w trakcie zapytania
+                    continue
+                for row in rows:
+                    yield self._row(row)
+        finally:
+            conn.close()
+
+    def last(self, sensor_id: str):
+        # Najnowszy odczyt czujnika: partycje od najnowszej, w każdej jedno
+        # przejście po indeksie (sensor_id, timestamp)
+        conn = sqlite3.connect(f'file:{self.path}?mode=ro', uri=True)
+        try:
+            for name, in conn.execute('SELECT name FROM partitions ORDER BY start DESC').fetchall():
+                row = conn.execute(f'SELECT * FROM {name} WHERE sensor_id = ? ORDER BY timestamp DESC LIMIT 1',
+                                   (sensor_id,)).fetchone()
+                if row:
+                    return self._row(row)
+            return None
+        finally:
+            conn.close()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def stats(self) -> dict:
+        return {
+            'partitions': len(self._partitions),
+            'rows_written': self.rows_written,
+            'partitions_dropped': self.partitions_dropped,
+        }
+
+    def _create_partition(self, start: int) -> str:
+        name = f'readings_{start}'
+        self._conn.execute(f'CREATE TABLE IF NOT EXISTS {name} '
+                           '(timestamp INTEGER NOT NULL, sensor_id TEXT NOT NULL, value REAL, unit TEXT)')
+        self._conn.execute(f'CREATE INDEX IF NOT EXISTS {name}_sensor_ts ON {name} (sensor_id, timestamp)')
+        self._conn.execute('INSERT OR IGNORE INTO partitions VALUES (?, ?, ?)',
+                           (name, start, start + self.partition_seconds))
+        self._partitions[start] = name
+        return name
+
+    def _expire(self) -> None:
+        # Retencja: usuwamy całe partycje, których koniec jest starszy niż retention_days
+        cutoff = time.time() - self.retention_days * 86400
+        expired = [(start, name) for start, name in self._partitions.items()
+                   if start + self.partition_seconds <= cutoff]
+        if not expired:
+            return
+        self._conn.execute('BEGIN')
+        for start, name in expired:
+            self._conn.execute(f'DROP TABLE IF EXISTS {name}')
+            self._conn.execute('DELETE FROM partitions WHERE name = ?', (name,))
+        self._conn.execute('COMMIT')
+        for start, name in expired:
+            del self._partitions[start]
+        self.partitions_dropped += len(expired)
+
+    @staticmethod
+    def _row(row) -> dict:
+        hour, micros = divmod(row[0], 3_600_000_000)
+        return {
+            'timestamp': datetime.fromtimestamp(hour * 3600) + timedelta(microseconds=micros),
+            'sensor_id': row[1],
+            'value': row[2],
+            'unit': row[3],
+        }
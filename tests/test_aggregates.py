@@ -0,0 +1,33 @@
+from aggregates import HOUR, RollingWindow, SensorAggregate
+
+
+def test_rolling_window_expires_sum_min_max():
+    window = RollingWindow(10)
+    for ts, value in [(0, 5.0), (1, 1.0), (2, 7.0), (3, 3.0), (12, 4.0)]:
+        window.add(ts, value)
+
+    window.expire(12)
+    # zostają odczyty z [2, 12]
+    assert window.count == 3
+    assert window.mean == (7.0 + 3.0 + 4.0) / 3
+    assert window.min == 3.0
+    assert window.max == 7.0
+
+    window.expire(100)
+    assert window.count == 0
+    assert window.mean is None and window.min is None and window.max is None
+
+
+def test_sensor_aggregate_hour_and_half_day_means():
+    aggregate = SensorAggregate()
+    now = 100 * HOUR
+    aggregate.add(now - 11 * HOUR, 10.0, "°C")
+    aggregate.add(now - 30 * 60, 20.0, "°C")
+    aggregate.add(now, 30.0, "°C")
+    aggregate.add(now, None, "°C")
+    aggregate.expire(now)
+
+    assert aggregate.mean(HOUR) == 25.0
+    assert aggregate.mean(12 * HOUR) == 20.0
+    assert aggregate.last_value is None
+    assert aggregate.unit == "°C"
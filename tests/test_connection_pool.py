@@ -0,0 +1,69 @@
+import json
+import time
+from datetime import datetime
+
+from logger import Logger
+from network.pool import ConnectionManager
+from server.core import IngestServer
+
+
+def test_shared_manager_fails_over_and_recovers():
+    down, up = 9011, 9012
+    received = []
+    server = IngestServer(port=up)
+    server.new_data.connect(received.append)
+    server.start()
+
+    manager = ConnectionManager.shared([f"127.0.0.1:{down}", ("127.0.0.1", up)], health_interval=0.1)
+    other = ConnectionManager.shared([("127.0.0.1", down), ("127.0.0.1", up)], health_interval=0.1)
+    try:
+        assert other is manager
+        # połączenia otwierają się dopiero przy wysyłce
+        assert not any(state["connected"] for state in manager.stats().values())
+
+        assert all(manager.send({"sensor_id": "Temp", "value": i}) for i in range(4))
+        stats = manager.stats()
+        assert not stats[f"127.0.0.1:{down}"]["healthy"]
+        assert stats[f"127.0.0.1:{up}"]["sent"] == 4
+
+        # serwer zamyka połączenia i startuje ponownie - klient wykrywa zamknięte gniazdo
+        server.stop()
+        server = IngestServer(port=up)
+        server.new_data.connect(received.append)
+        server.start()
+        time.sleep(0.1)
+        assert manager.send({"sensor_id": "Temp", "value": 4})
+    finally:
+        other.close()
+        assert manager.stats()[f"127.0.0.1:{up}"]["connected"]
+        manager.close()
+        server.stop()
+
+    assert [r["value"] for r in received] == [0, 1, 2, 3, 4]
+    assert not manager.stats()[f"127.0.0.1:{up}"]["connected"]
+
+
+def test_logger_starts_without_server_and_sends_through_other_endpoint(tmp_path):
+    config = {
+        "log_dir": str(tmp_path),
+        "filename_pattern": "test_%Y%m%d_%H%M.csv",
+        "buffer_size": 1,
+        "servers": ["127.0.0.1:9014"],
+    }
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps(config))
+
+    # pierwszy serwer nie działa - konstruktor nie może rzucić wyjątku
+    logger = Logger(str(config_path), "127.0.0.1", 9013)
+    received = []
+    server = IngestServer(port=9014)
+    server.new_data.connect(received.append)
+    server.start()
+    try:
+        logger.start()
+        logger.log_and_send("Temp", datetime.now(), 21.5, "°C")
+        logger.stop()
+    finally:
+        server.stop()
+
+    assert [r["value"] for r in received] == [21.5]
@@ -0,0 +1,82 @@
+import threading
+import time
+from datetime import datetime
+
+import metrics
+from fanout import Subscriber
+from sensors import PressureSensor
+
+
+def test_slow_subscriber_does_not_block_sampling_or_other_subscribers():
+    release = threading.Event()
+    fast_readings = []
+
+    sensor = PressureSensor(seed=1)
+    slow = sensor.register_callback(lambda *args: release.wait(), queue_size=10, overflow_policy='drop_oldest')
+    fast = sensor.register_callback(lambda *args: fast_readings.append(args), queue_size=1000)
+
+    started = time.perf_counter()
+    for _ in range(100):
+        sensor.get_reading()
+    assert time.perf_counter() - started < 0.5
+
+    fast.close(timeout=2)
+    assert len(fast_readings) == 100
+    assert fast_readings[0][0] == "PressureSensor"
+
+    release.set()
+    slow.close(timeout=2)
+    # w kolejce zostało 10 najnowszych odczytów (+ ewentualnie ten, który wątek już pobrał)
+    assert slow.delivered + slow.dropped == 100
+    assert slow.delivered in (10, 11)
+    assert slow.call_latency.count == slow.delivered
+
+
+def test_subscriber_drop_newest_and_error_counting():
+    release = threading.Event()
+
+    def callback(value):
+        release.wait()
+        if value == 0:
+            raise ValueError("zły odczyt")
+
+    subscriber = Subscriber(callback, queue_size=2, overflow_policy='drop_newest')
+    for value in range(5):
+        subscriber(value)
+    release.set()
+    subscriber.close(timeout=2)
+
+    stats = subscriber.stats()
+    assert stats['delivered'] + stats['dropped'] == 5
+    assert stats['delivered'] in (2, 3)
+    assert stats['errors'] == 1
+
+
+def test_subscriber_metrics_are_unique_and_removed_on_close():
+    first = Subscriber(print, queue_size=1, name="same")
+    second = Subscriber(print, queue_size=1, name="same")
+    keys = [key for key in metrics.REGISTRY.snapshot() if key.startswith('subscriber_queue_depth{') and '"same"' in key]
+    assert len(keys) == 2
+    first.close(timeout=2)
+    second.close(timeout=2)
+    assert not any('"same"' in key for key in metrics.REGISTRY.snapshot())
+
+
+def test_sensors_share_one_subscriber_per_callback():
+    readings = []
+
+    def callback(*args):
+        readings.append(args[0])
+
+    sensors = [PressureSensor(seed=i, name=f"Pressure-{i}") for i in range(50)]
+    subscribers = {id(sensor.register_callback(callback, queue_size=100)) for sensor in sensors}
+    assert len(subscribers) == 1
+
+    for sensor in sensors:
+        sensor.get_reading()
+    for sensor in sensors[:-1]:
+        sensor.close()
+    sensors[-1].get_reading()
+    sensors[-1].close()
+    # ostatni czujnik zamyka wspólny Subscriber, który dostarcza wszystko z kolejki
+    assert len(readings) == 51
@@ -32,3 +32,392 @@ def test_logger_write_and_read():
     assert logs[0]["value"] == 12.3
 
     shutil.rmtree(temp_dir)
+
+
+def test_logger_read_logs_from_archive():
+    temp_dir = tempfile.mkdtemp()
+    config = {
+        "log_dir": temp_dir,
+        "filename_pattern": "test_%Y%m%d_%H%M.csv",
+        "buffer_size": 10,
+        "rotate_every_hours": 1,
+        "max_size_mb": 1,
+        "retention_days": 1,
+        "index_every_rows": 5
+    }
+    config_path = os.path.join(temp_dir, "config.json")
+    with open(config_path, "w") as f:
+        import json
+        json.dump(config, f)
+
+    logger = Logger(config_path)
+    logger.start()
+
+    base = datetime(2025, 5, 13, 12, 0)
+    for i in range(50):
+        logger.log_reading("Sensor%d" % (i % 2), base + timedelta(minutes=i), float(i), "unit")
+    logger._rotate()
+    logger.stop()
+
+    archive_dir = os.path.join(temp_dir, "archive")
+    assert any(name.endswith(".zip.idx") for name in os.listdir(archive_dir))
+
+    logs = list(logger.read_logs(base + timedelta(minutes=10), base + timedelta(minutes=19)))
+    assert [entry["value"] for entry in logs] == [float(i) for i in range(10, 20)]
+
+    logs = list(logger.read_logs(base, base + timedelta(minutes=9), sensor_id="Sensor1"))
+    assert [entry["value"] for entry in logs] == [1.0, 3.0, 5.0, 7.0, 9.0]
+
+    assert list(logger.read_logs(base - timedelta(days=1), base - timedelta(hours=1))) == []
+
+    shutil.rmtree(temp_dir)
+
+
+def test_logger_async_writer_and_overflow():
+    temp_dir = tempfile.mkdtemp()
+    config = {
+        "log_dir": temp_dir,
+        "filename_pattern": "test_%Y%m%d_%H%M.csv",
+        "buffer_size": 100,
+        "rotate_every_hours": 1,
+        "max_size_mb": 1,
+        "retention_days": 1,
+        "async_write": True,
+        "queue_size": 5,
+        "overflow_policy": "drop_newest",
+        "fsync": "always"
+    }
+    config_path = os.path.join(temp_dir, "config.json")
+    with open(config_path, "w") as f:
+        import json
+        json.dump(config, f)
+
+    logger = Logger(config_path)
+    now = datetime.now()
+    # Wątek zapisujący jeszcze nie działa, więc kolejka się zapełni
+    for i in range(8):
+        logger.log_reading("TestSensor", now, float(i), "unit")
+    assert logger.queue_depth == 5
+    assert logger.dropped_rows == 3
+
+    logger.start()
+    logger.stop()
+    assert logger.queue_depth == 0
+
+    logs = list(logger.read_logs(now - timedelta(minutes=1), now + timedelta(minutes=1)))
+    assert [entry["value"] for entry in logs] == [0.0, 1.0, 2.0, 3.0, 4.0]
+
+    shutil.rmtree(temp_dir)
+
+
+def test_logger_parquet_archive():
+    import pytest
+    pytest.importorskip("pyarrow")
+    temp_dir = tempfile.mkdtemp()
+    config = {
+        "log_dir": temp_dir,
+        "filename_pattern": "test_%Y%m%d_%H%M.csv",
+        "buffer_size": 10,
+        "rotate_every_hours": 1,
+        "max_size_mb": 1,
+        "retention_days": 1,
+        "archive_format": "parquet",
+        "parquet_row_group_rows": 10
+    }
+    config_path = os.path.join(temp_dir, "config.json")
+    with open(config_path, "w") as f:
+        import json
+        json.dump(config, f)
+
+    logger = Logger(config_path)
+    logger.start()
+
+    base = datetime(2025, 5, 13, 12, 0, 0, 123456)
+    for i in range(50):
+        logger.log_reading("Sensor%d" % (i % 2), base + timedelta(minutes=i), float(i), "unit")
+    logger._rotate()
+    logger.stop()
+
+    archive_dir = os.path.join(temp_dir, "archive")
+    assert any(name.endswith(".parquet") for name in os.listdir(archive_dir))
+    assert not any(name.endswith(".zip") for name in os.listdir(archive_dir))
+    # zapis strumieniowy: jedna grupa wierszy na parquet_row_group_rows
+    import pyarrow.parquet as pq
+    parquet_name = next(name for name in os.listdir(archive_dir) if name.endswith(".parquet"))
+    assert pq.ParquetFile(os.path.join(archive_dir, parquet_name)).metadata.num_row_groups == 5
+
+    logs = list(logger.read_logs(base + timedelta(minutes=10), base + timedelta(minutes=19)))
+    assert [entry["value"] for entry in logs] == [float(i) for i in range(10, 20)]
+    assert logs[0]["timestamp"] == base + timedelta(minutes=10)
+
+    logs = list(logger.read_logs(base, base + timedelta(minutes=9), sensor_id="Sensor1"))
+    assert [entry["value"] for entry in logs] == [1.0, 3.0, 5.0, 7.0, 9.0]
+    assert logs[0]["sensor_id"] == "Sensor1" and logs[0]["unit"] == "unit"
+
+    shutil.rmtree(temp_dir)
+
+
+def test_logger_persists_rotation_state_and_retention_index():
+    import json
+    temp_dir = tempfile.mkdtemp()
+    config = {
+        "log_dir": temp_dir,
+        "filename_pattern": "test_%Y%m%d.csv",
+        "buffer_size": 100,
+        "rotate_every_hours": 1,
+        "retention_days": 1
+    }
+    config_path = os.path.join(temp_dir, "config.json")
+    with open(config_path, "w") as f:
+        json.dump(config, f)
+
+    logger = Logger(config_path)
+    logger.start()
+    for i in range(7):
+        logger.log_reading("TestSensor", datetime.now(), i + 0.5, "°C")
+    logger.stop()
+    path = os.path.join(temp_dir, datetime.now().strftime("test_%Y%m%d.csv"))
+    assert os.path.getsize(path) == logger.current_size
+    rotation_time = logger.next_rotation_time
+
+    # Po restarcie stan pochodzi z pliku stanu, a wiersze dopisane poza loggerem są doliczane
+    with open(path, "a", newline="") as f:
+        f.write("2025-05-13T12:00:00,Other,1.0,unit\r\n")
+    logger = Logger(config_path)
+    logger.start()
+    assert logger.line_count == 8
+    assert logger.current_size == os.path.getsize(path)
+    assert logger.next_rotation_time == rotation_time
+
+    # Archiwum starsze niż retencja jest usuwane na podstawie indeksu
+    logger._rotate()
+    assert logger.wait_for_archives(timeout=30)
+    archive_dir = os.path.join(temp_dir, "archive")
+    with open(os.path.join(archive_dir, "retention.json")) as f:
+        archives = json.load(f)["archives"]
+    assert [name for _, name in archives] == [os.path.basename(path) + ".zip"]
+    logger._retention["archives"][0][0] -= 2 * 86400
+    logger._clean_old_archives()
+    logger.stop()
+    assert not any(name.endswith(".zip") for name in os.listdir(archive_dir))
+
+    shutil.rmtree(temp_dir)
+
+
+def test_logger_compresses_archives_in_background():
+    import json
+    import zipfile
+    temp_dir = tempfile.mkdtemp()
+    config = {
+        "log_dir": temp_dir,
+        "filename_pattern": "test_%Y%m%d.csv",
+        "buffer_size": 100,
+        "index_every_rows": 10,
+        "archive_codec": "gzip",
+        "archive_level": 9,
+        "archive_workers": 2
+    }
+    config_path = os.path.join(temp_dir, "config.json")
+    with open(config_path, "w") as f:
+        json.dump(config, f)
+
+    logger = Logger(config_path)
+    logger.start()
+    base = datetime(2025, 5, 13, 12, 0)
+    for rotation in range(3):
+        for i in range(100):
+            minute = rotation * 100 + i
+            logger.log_reading("Sensor%d" % (i % 2), base + timedelta(minutes=minute), float(minute), "unit")
+        logger._rotate()
+    # dane z plików czekających na kompresję są nadal widoczne
+    assert len(list(logger.read_logs(base, base + timedelta(days=1)))) == 300
+    logger.stop()
+
+    archive_dir = os.path.join(temp_dir, "archive")
+    archives = {name for name in os.listdir(archive_dir) if name.endswith(".gz")}
+    assert archives == {"test_%s%s.csv.gz" % (datetime.now().strftime("%Y%m%d"), suffix)
+                        for suffix in ("", "-1", "-2")}
+    assert not any(name.endswith(".csv") for name in os.listdir(archive_dir))
+
+    stats = logger.stats()["archive"]["gzip"]
+    assert stats["files"] == 3 and stats["ratio"] > 2
+
+    logs = list(logger.read_logs(base + timedelta(minutes=150), base + timedelta(minutes=159), sensor_id="Sensor0"))
+    assert [entry["value"] for entry in logs] == [150.0, 152.0, 154.0, 156.0, 158.0]
+
+    # archiwa zip są teraz faktycznie kompresowane
+    config.update(archive_codec="deflate", archive_workers=0)
+    with open(config_path, "w") as f:
+        json.dump(config, f)
+    logger = Logger(config_path)
+    logger.start()
+    logger.log_reading("Sensor0", base, 1.0, "unit")
+    logger._rotate()
+    logger.stop()
+    zip_name = next(name for name in os.listdir(archive_dir) if name.endswith(".zip"))
+    with zipfile.ZipFile(os.path.join(archive_dir, zip_name)) as zf:
+        assert zf.infolist()[0].compress_type == zipfile.ZIP_DEFLATED
+
+    shutil.rmtree(temp_dir)
+
+
+def test_logger_sqlite_storage():
+    import json
+    import sqlite3
+    temp_dir = tempfile.mkdtemp()
+    config = {
+        "log_dir": temp_dir,
+        "filename_pattern": "test.csv",
+        "buffer_size": 25,
+        "retention_days": 30,
+        "storage": "sqlite",
+        "sqlite_partition_hours": 1
+    }
+    config_path = os.path.join(temp_dir, "config.json")
+    with open(config_path, "w") as f:
+        json.dump(config, f)
+
+    # partycje są wyrównane do godzin UTC
+    base = datetime.fromtimestamp((int(datetime.now().timestamp()) // 3600 - 3) * 3600)
+    logger = Logger(config_path)
+    logger.start()
+    for i in range(180):
+        logger.log_reading("Sensor%d" % (i % 3), base + timedelta(minutes=i), float(i), "unit")
+    logger.stop()
+    assert not any(name.endswith(".csv") for name in os.listdir(temp_dir))
+
+    # po restarcie dane są w bazie; partycja sprzed retencji jest usuwana w całości
+    logger = Logger(config_path)
+    logger.start()
+    logger.log_reading("Sensor0", base - timedelta(days=40), -1.0, "unit")
+    logger.log_reading("Sensor1", base + timedelta(minutes=200), 200.0, "unit")
+    logger.stop()
+
+    logs = list(logger.read_logs(base + timedelta(minutes=30), base + timedelta(minutes=90)))
+    assert [row["value"] for row in logs] == [float(i) for i in range(30, 91)]
+    assert logs[0]["timestamp"] == base + timedelta(minutes=30)
+    logs = list(logger.read_logs(base - timedelta(days=50), base + timedelta(hours=4), sensor_id="Sensor1"))
+    assert [row["value"] for row in logs] == [float(i) for i in range(1, 180, 3)] + [200.0]
+    assert logger.last_reading("Sensor1")["value"] == 200.0
+    assert logger.last_reading("Sensor2")["value"] == 179.0
+    assert logger.last_reading("Missing") is None
+
+    with sqlite3.connect(os.path.join(temp_dir, "readings.db")) as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        partitions = conn.execute("SELECT count(*) FROM partitions").fetchone()[0]
+    assert partitions == 4
+    assert logger.stats()["storage"]["partitions_dropped"] == 1
+
+    shutil.rmtree(temp_dir)
+
+
+def test_logger_drops_torn_row_after_crash():
+    import json
+    temp_dir = tempfile.mkdtemp()
+    config_path = os.path.join(temp_dir, "config.json")
+    with open(config_path, "w") as f:
+        json.dump({"log_dir": temp_dir, "filename_pattern": "test_%Y%m%d.csv", "buffer_size": 1}, f)
+
+    now = datetime.now()
+    logger = Logger(config_path)
+    logger.write_batch([(now, "TestSensor", 1.0, "unit")], sync=True)
+    # awaria w trakcie zapisu: drugi wiersz ucięty w połowie
+    logger.current_file.write(now.isoformat().encode() + b",TestSen")
+    logger.current_file.close()
+    logger.current_file = None
+
+    logger = Logger(config_path)
+    logger.start()
+    logger.log_reading("TestSensor", now, 2.0, "unit")
+    logger.stop()
+
+    logs = list(logger.read_logs(now - timedelta(minutes=1), now + timedelta(minutes=1)))
+    assert [row["value"] for row in logs] == [1.0, 2.0]
+    shutil.rmtree(temp_dir)
+
+
+def test_logger_empty_flush_does_not_fsync(mocker):
+    import json
+    temp_dir = tempfile.mkdtemp()
+    config_path = os.path.join(temp_dir, "config.json")
+    with open(config_path, "w") as f:
+        json.dump({"log_dir": temp_dir, "filename_pattern": "test_%Y%m%d.csv", "buffer_size": 1,
+                   "fsync": "always"}, f)
+
+    logger = Logger(config_path)
+    fsync = mocker.patch("logger.os.fsync")
+    logger.write_batch([(datetime.now(), "TestSensor", 1.0, "unit")])
+    assert fsync.call_count == 1
+    # bezczynny sink woła write_batch([]) co sekundę - bez nowych wierszy nie ma fsync
+    logger.write_batch([])
+    logger.write_batch([])
+    assert fsync.call_count == 1
+    logger.stop()
+    shutil.rmtree(temp_dir)
+
+
+def test_logger_rotation_on_start_archives_file_once(mocker):
+    import json
+    temp_dir = tempfile.mkdtemp()
+    config_path = os.path.join(temp_dir, "config.json")
+    with open(config_path, "w") as f:
+        json.dump({"log_dir": temp_dir, "filename_pattern": "t_%Y%m%d.csv", "buffer_size": 1}, f)
+
+    now = datetime.now()
+    logger = Logger(config_path)
+    logger.start()
+    logger.log_reading("TestSensor", now, 1.0, "unit")
+    logger.stop()
+    # termin rotacji minął, gdy logger był zatrzymany
+    state_path = os.path.join(temp_dir, ".logger_state.json")
+    with open(state_path) as f:
+        state = json.load(f)
+    state["next_rotation_time"] = (now - timedelta(hours=1)).isoformat()
+    with open(state_path, "w") as f:
+        json.dump(state, f)
+
+    logger = Logger(config_path)
+    submit = mocker.spy(logger, "_submit_archive")
+    errors = mocker.spy(logger, "_archive_finished")
+    logger.start()
+    logger.stop()
+
+    assert submit.call_count == 1
+    assert errors.call_count == 1 and errors.call_args[0][3] is None
+    archives = os.listdir(os.path.join(temp_dir, "archive"))
+    assert not any(name.endswith(".csv") for name in archives)
+    logs = list(logger.read_logs(now - timedelta(minutes=1), now + timedelta(minutes=1)))
+    assert [row["value"] for row in logs] == [1.0]
+    shutil.rmtree(temp_dir)
+
+
+def test_logger_concurrent_sync_logging_writes_each_row_once():
+    import json
+    import threading
+    temp_dir = tempfile.mkdtemp()
+    config_path = os.path.join(temp_dir, "config.json")
+    with open(config_path, "w") as f:
+        json.dump({"log_dir": temp_dir, "filename_pattern": "test_%Y%m%d.csv", "buffer_size": 5}, f)
+
+    logger = Logger(config_path)
+    logger.start()
+    now = datetime.now()
+
+    def worker(n):
+        for i in range(5000):
+            logger.log_reading(f"Sensor{n}", now, float(i), "unit")
+
+    # jak SensorScheduler z dispatch "threads": kilka wątków woła log_reading jednocześnie
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    logger.stop()
+
+    logs = list(logger.read_logs(now - timedelta(minutes=1), now + timedelta(minutes=1)))
+    assert len(logs) == 20000
+    for n in range(4):
+        assert sorted(row["value"] for row in logs if row["sensor_id"] == f"Sensor{n}") == \
+            [float(i) for i in range(5000)]
+    shutil.rmtree(temp_dir)
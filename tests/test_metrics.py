@@ -0,0 +1,79 @@
+import json
+import logging
+import os
+import tempfile
+import urllib.request
+
+import metrics
+
+
+def test_histogram_percentiles_and_sampled_log(caplog):
+    histogram = metrics.Histogram()
+    for us in range(1, 10001):
+        histogram.record(us / 1e6)
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == 10000
+    # kubełki HDR: błąd względny percentyli poniżej 1/16
+    for q, expected in (("p50", 5000e-6), ("p99", 9900e-6), ("p999", 9990e-6)):
+        assert expected <= snapshot[q] <= expected * (1 + 1 / 16)
+    assert snapshot["max"] == 10000e-6
+
+    sampled = metrics.SampledLog(logging.getLogger("test_metrics"), interval=60)
+    with caplog.at_level(logging.INFO, logger="test_metrics"):
+        for i in range(1000):
+            sampled.info("message", "message %d", i)
+        sampled._next["message"] = 0
+        sampled.info("message", "message %d", 1000)
+    assert [record.getMessage() for record in caplog.records] == [
+        "message 0", "message 1000 (+999 similar in last 60s)"]
+
+
+def test_metrics_endpoint_and_snapshot_file():
+    registry = metrics.Registry()
+    registry.counter("rows_written", {"log_dir": "logs"}).inc(3)
+    registry.meter("messages").inc(5)
+    registry.gauge("buffer_depth", fn=lambda: 7)
+    with registry.histogram("flush_seconds").time():
+        pass
+
+    server = metrics.MetricsServer(0, registry=registry)
+    server.start()
+    try:
+        base = f"http://127.0.0.1:{server.port}"
+        text = urllib.request.urlopen(base + "/metrics").read().decode()
+        snapshot = json.loads(urllib.request.urlopen(base + "/metrics.json").read())
+    finally:
+        server.stop()
+    assert 'rows_written{log_dir="logs"} 3' in text
+    assert "messages_total 5" in text
+    assert "buffer_depth 7" in text
+    assert "flush_seconds_count 1" in text
+    assert snapshot["buffer_depth"] == 7 and snapshot["messages"]["count"] == 5
+
+    path = os.path.join(tempfile.mkdtemp(), "metrics", "snapshot.json")
+    writer = metrics.SnapshotWriter(path, interval=60, registry=registry)
+    writer.start()
+    writer.stop()
+    with open(path) as f:
+        assert json.load(f)["metrics"]["flush_seconds"]["count"] == 1
+
+
+def test_gauges_are_removed_when_components_stop(tmp_path):
+    from logger import Logger
+    from server.core import IngestServer
+
+    server = IngestServer(port=9023)
+    server.start()
+    assert 'server_connections{port="9023"}' in metrics.REGISTRY.snapshot()
+    server.stop()
+    assert 'server_connections{port="9023"}' not in metrics.REGISTRY.snapshot()
+
+    config_path = tmp_path / "logger.json"
+    config_path.write_text(json.dumps({"log_dir": str(tmp_path / "logs"), "filename_pattern": "log.csv",
+                                       "buffer_size": 1}))
+    logger = Logger(str(config_path))
+    logger.start()
+    key = 'logger_buffer_depth{log_dir="%s"}' % (tmp_path / "logs")
+    assert key in metrics.REGISTRY.snapshot()
+    logger.stop()
+    assert key not in metrics.REGISTRY.snapshot()
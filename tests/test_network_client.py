@@ -1,3 +1,4 @@
+import json
 import socket
 import threading
 from network.client import NetworkClient
@@ -27,3 +28,128 @@ def test_network_client_send():
 
     assert result is True
     server.close()
+
+
+def seq_ack_server(host, port, ack_first, received):
+    # Pierwsze połączenie potwierdza tylko `ack_first` wiadomości i zostaje zerwane,
+    # drugie potwierdza wszystko, co dostanie.
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    server.bind((host, port))
+    server.listen(1)
+
+    def serve():
+        for limit in (ack_first, None):
+            conn, _ = server.accept()
+            reader = conn.makefile("rb")
+            acked = 0
+            while limit is None or acked < limit:
+                line = reader.readline()
+                if not line:
+                    break
+                seq = json.loads(line)["seq"]
+                received.append(seq)
+                conn.sendall(f"ACK {seq}\n".encode())
+                acked += 1
+            if limit is not None:
+                # dociągamy resztę okna, której nie potwierdzimy
+                conn.settimeout(0.5)
+                try:
+                    while reader.readline():
+                        pass
+                except OSError:
+                    pass
+            reader.close()
+            conn.close()
+
+    threading.Thread(target=serve, daemon=True).start()
+    return server
+
+
+def test_network_client_pipelined_retransmits_unacked_tail():
+    host, port = "127.0.0.1", 9004
+    received = []
+    server = seq_ack_server(host, port, 2, received)
+
+    client = NetworkClient(host, port, window=8, retry_delay=0.05)
+    for i in range(5):
+        assert client.send({"sensor_id": "Test", "value": i}) is True
+    assert client.flush() is True
+    client.close()
+    server.close()
+
+    assert client.inflight == 0
+    # 1 i 2 potwierdzone na pierwszym połączeniu, po ponownym połączeniu tylko ogon 3..5
+    assert received == [1, 2, 3, 4, 5]
+
+
+def test_network_client_batches_by_size_and_linger():
+    host, port = "127.0.0.1", 9006
+    frames = []
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    server.bind((host, port))
+    server.listen(1)
+
+    def serve():
+        conn, _ = server.accept()
+        with conn, conn.makefile("rb") as reader:
+            for line in reader:
+                frames.append(json.loads(line))
+                conn.sendall(b"ACK\n")
+
+    threading.Thread(target=serve, daemon=True).start()
+
+    client = NetworkClient(host, port, batch_size=3, linger=0.05)
+    for i in range(7):
+        assert client.send({"sensor_id": "Test", "value": i}) is True
+    import time
+    time.sleep(0.3)
+    client.close()
+    server.close()
+
+    assert all(frame["type"] == "batch" for frame in frames)
+    assert [[r["value"] for r in frame["readings"]] for frame in frames] == [[0, 1, 2], [3, 4, 5], [6]]
+
+
+def test_network_client_close_waits_for_inflight_acks():
+    from server.core import IngestServer
+
+    received = []
+    server = IngestServer(port=9020)
+    server.new_data.connect(received.append)
+    server.start()
+    try:
+        client = NetworkClient("127.0.0.1", 9020, window=64)
+        for i in range(50):
+            assert client.send({"sensor_id": "Light", "value": i}) is True
+        assert client.close() is True
+        assert client.inflight == 0
+    finally:
+        server.stop()
+    assert len(received) == 50
+
+    # serwer, który nigdy nie potwierdza - po czasie oczekiwania wiadomości są odrzucane
+    silent = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    silent.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    silent.bind(("127.0.0.1", 9021))
+    silent.listen(1)
+    try:
+        client = NetworkClient("127.0.0.1", 9021, window=64)
+        assert client.send({"sensor_id": "Light", "value": 1}) is True
+        assert client.close(timeout=0.2) is False
+        assert client.inflight == 0
+        assert client._discarded.value >= 1
+    finally:
+        silent.close()
+
+
+def test_batch_sender_counts_lost_batches():
+    from network.client import BatchSender
+
+    sender = BatchSender(lambda message: False, batch_size=2, linger=10)
+    sender.add({"value": 1})
+    sender.add({"value": 2})
+    sender.add({"value": 3})
+    assert sender.close() is False
+    assert (sender.failed_batches, sender.failed_readings) == (2, 3)
@@ -0,0 +1,32 @@
+from datetime import datetime
+from network.protocol import BinaryEncoder, BinaryDecoder, RECORD
+
+
+def test_binary_round_trip_interns_names_once():
+    encoder = BinaryEncoder()
+    decoder = BinaryDecoder()
+    reading = {
+        "timestamp": datetime(2025, 5, 13, 23, 0, 13, 227401).isoformat(),
+        "sensor_id": "TemperatureSensor",
+        "value": 10.5,
+        "unit": "°C"
+    }
+    first = encoder.encode(reading, seq=1)
+    batch = encoder.encode({"type": "batch", "readings": [reading] * 3}, seq=2)
+    fallback = encoder.encode({"sensor_id": "Light", "value": "n/a"}, seq=3)
+
+    # nazwy zadeklarowane w pierwszej wiadomości nie są wysyłane ponownie
+    assert len(batch) < 3 * len(first)
+    assert len(batch) == 5 + 4 + 3 * RECORD.size
+
+    stream = first + batch + fallback
+    messages = []
+    for i in range(0, len(stream), 7):
+        messages.extend(decoder.feed(stream[i:i + 7]))
+
+    assert messages == [
+        (1, reading),
+        (2, [reading] * 3),
+        (3, {"sensor_id": "Light", "value": "n/a"}),
+    ]
+    assert decoder.pending() == 0
@@ -25,3 +25,180 @@ def test_server_receives_ack(monkeypatch):
     client_send()
 
     assert responses[0] == b"ACK"
+
+
+def test_line_framer_splits_bursts_and_partial_lines():
+    from server.core import LineFramer
+
+    framer = LineFramer()
+    assert framer.feed(b'{"a": 1}\n{"b"') == [b'{"a": 1}']
+    assert framer.feed(b': 2}\n{"c": 3}\n{') == [b'{"b": 2}', b'{"c": 3}']
+    assert framer.pending() == 1
+
+
+def test_server_acks_every_message_in_burst():
+    server = NetworkServer(port=9003)
+    server.start()
+    try:
+        with socket.create_connection(("127.0.0.1", 9003), timeout=5) as sock:
+            burst = b"".join(json.dumps({"sensor_id": "Light", "value": i}).encode() + b"\n"
+                             for i in range(100))
+            sock.sendall(burst)
+            acks = b""
+            while acks.count(b"\n") < 100:
+                acks += sock.recv(1024)
+        assert acks == b"ACK\n" * 100
+    finally:
+        server.stop()
+
+
+def test_server_echoes_sequence_numbers():
+    server = NetworkServer(port=9005)
+    server.start()
+    try:
+        with socket.create_connection(("127.0.0.1", 9005), timeout=5) as sock:
+            sock.sendall(b'{"sensor_id": "Light", "value": 1, "seq": 41}\n'
+                         b'{"sensor_id": "Light", "value": 2, "seq": 42}\n')
+            acks = b""
+            while acks.count(b"\n") < 2:
+                acks += sock.recv(1024)
+        assert acks == b"ACK 41\nACK 42\n"
+    finally:
+        server.stop()
+
+
+def test_server_acks_batch_once():
+    server = NetworkServer(port=9007)
+    server.start()
+    try:
+        with socket.create_connection(("127.0.0.1", 9007), timeout=5) as sock:
+            batch = {"type": "batch", "readings": [{"sensor_id": "Light", "value": i} for i in range(500)]}
+            sock.sendall(json.dumps(batch).encode() + b"\n")
+            assert sock.recv(1024) == b"ACK\n"
+    finally:
+        server.stop()
+
+
+def test_server_negotiates_binary_format():
+    from PyQt6.QtCore import Qt
+    from network.client import NetworkClient
+
+    received = []
+    server = NetworkServer(port=9008)
+    server.new_data.connect(received.append, Qt.ConnectionType.DirectConnection)
+    server.start()
+    try:
+        client = NetworkClient("127.0.0.1", 9008, window=4, wire_format="binary1")
+        for i in range(10):
+            assert client.send({"timestamp": "2025-05-13T23:00:13", "sensor_id": "Light",
+                                "value": float(i), "unit": "lux"}) is True
+        assert client.flush() is True
+        assert client._encoder is not None
+        client.close()
+    finally:
+        server.stop()
+
+    assert [m["value"] for m in received] == [float(i) for i in range(10)]
+    assert received[0] == {"timestamp": "2025-05-13T23:00:13", "sensor_id": "Light",
+                           "value": 0.0, "unit": "lux"}
+
+
+def test_ingest_server_runs_without_qt():
+    from server.core import IngestServer
+
+    batches = []
+    server = IngestServer(port=9009)
+    server.new_batch.connect(batches.append)
+    server.start()
+    try:
+        with socket.create_connection(("127.0.0.1", 9009), timeout=5) as sock:
+            batch = {"type": "batch", "readings": [{"sensor_id": "Light", "value": i} for i in range(3)]}
+            sock.sendall(json.dumps(batch).encode() + b"\n")
+            assert sock.recv(1024) == b"ACK\n"
+    finally:
+        server.stop()
+
+    assert [[r["value"] for r in b] for b in batches] == [[0, 1, 2]]
+
+def test_sharded_server_merges_worker_aggregates():
+    from server.sharded import ShardedIngestServer
+
+    server = ShardedIngestServer(9015, workers=2, flush_interval=0.05)
+    server.start()
+    try:
+        for c in range(4):
+            with socket.create_connection(("127.0.0.1", 9015), timeout=5) as sock:
+                sock.sendall(b"".join(json.dumps({"sensor_id": "Light", "value": c * 10 + i, "unit": "lux",
+                                                  "timestamp": f"2025-05-13T23:00:{c * 10 + i:02d}"}).encode() + b"\n"
+                                      for i in range(10)))
+                acks = b""
+                while acks.count(b"\n") < 10:
+                    acks += sock.recv(1024)
+    finally:
+        server.stop()
+
+    assert server.messages == 40
+    assert sum(server.stats()["worker_messages"]) == 40
+    light = server.snapshot()["Light"]
+    assert (light["count"], light["min"], light["max"], light["last"]) == (40, 0, 39, 39)
+    assert light["unit"] == "lux"
+
+
+def test_durable_ack_survives_server_crash(tmp_path):
+    import os
+    import signal
+    import subprocess
+    import sys
+    from datetime import datetime, timedelta
+    from logger import Logger
+
+    config_path = tmp_path / "sink.json"
+    config_path.write_text(json.dumps({"log_dir": str(tmp_path / "logs"), "filename_pattern": "server_%Y%m%d.csv",
+                                       "buffer_size": 1000, "max_size_mb": 1, "retention_days": 1}))
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    server = subprocess.Popen([sys.executable, "-m", "server", "--port", "9016", "--sink-config", str(config_path),
+                               "--durable-ack"], cwd=root, stdout=subprocess.PIPE, text=True)
+    now = datetime.now()
+    try:
+        assert "9016" in server.stdout.readline()
+        with socket.create_connection(("127.0.0.1", 9016), timeout=5) as sock:
+            sock.sendall(b"".join(json.dumps({"sensor_id": "Light", "value": i, "unit": "lux", "seq": i + 1,
+                                              "timestamp": now.isoformat()}).encode() + b"\n"
+                                  for i in range(200)))
+            acks = b""
+            while acks.count(b"\n") < 200:
+                acks += sock.recv(4096)
+        # awaria bez zatrzymania: nic nie jest dopisywane przy zamykaniu
+        server.send_signal(signal.SIGKILL)
+        server.wait()
+    finally:
+        if server.poll() is None:
+            server.kill()
+
+    assert acks.split() == [x for i in range(200) for x in (b"ACK", str(i + 1).encode())]
+    logger = Logger(str(config_path))
+    logger.start()
+    values = [row["value"] for row in logger.read_logs(now - timedelta(minutes=1), now + timedelta(minutes=1))]
+    logger.stop()
+    assert sorted(values) == list(range(200))
+
+
+def test_non_object_message_does_not_stop_server():
+    from server.core import IngestServer
+
+    received = []
+    server = IngestServer(port=9019)
+    server.new_data.connect(lambda data: received.append(data["value"]))
+    server.new_batch.connect(lambda readings: received.extend(data["value"] for data in readings))
+    server.start()
+    try:
+        with socket.create_connection(("127.0.0.1", 9019), timeout=5) as bad:
+            bad.sendall(b'5\n"x"\n{"type": "batch", "readings": [1, {"sensor_id": "Light", "value": 2}]}\n')
+            assert bad.recv(1024) == b"ACK\n"
+        with socket.create_connection(("127.0.0.1", 9019), timeout=5) as sock:
+            sock.sendall(b'{"sensor_id": "Light", "value": 3}\n')
+            assert sock.recv(1024) == b"ACK\n"
+    finally:
+        server.stop()
+
+    assert received == [2, 3]
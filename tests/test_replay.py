@@ -0,0 +1,113 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from logger import Logger
+from network.client import NetworkClient
+from replay import Replayer
+from server.core import IngestServer
+
+
+def _write_logs(temp_dir, base, count):
+    config_path = os.path.join(temp_dir, "config.json")
+    with open(config_path, "w") as f:
+        json.dump({"log_dir": temp_dir, "filename_pattern": "test_%Y%m%d.csv", "buffer_size": 10,
+                   "index_every_rows": 5, "archive_workers": 0}, f)
+    logger = Logger(config_path)
+    logger.start()
+    for i in range(count):
+        if i == count // 2:
+            # pierwsza połowa trafia do archiwum zip, druga zostaje w bieżącym CSV
+            logger._rotate()
+        logger.log_reading("Sensor%d" % (i % 2), base + timedelta(milliseconds=20 * i), float(i), "unit")
+    logger.stop()
+    return Logger(config_path, read_only=True)
+
+
+def test_replay_streams_archive_and_csv_in_order():
+    temp_dir = tempfile.mkdtemp()
+    received = []
+    server = IngestServer(port=9017)
+    server.new_data.connect(received.append)
+    server.new_batch.connect(received.extend)
+    server.start()
+    try:
+        base = datetime(2025, 5, 13, 12, 0)
+        logger = _write_logs(temp_dir, base, 100)
+        assert any(name.endswith(".zip") for name in os.listdir(os.path.join(temp_dir, "archive")))
+
+        client = NetworkClient("127.0.0.1", 9017, window=16, batch_size=8)
+        stats = Replayer(logger.read_logs(base, base + timedelta(hours=1)), client, speed=0).run()
+        client.close()
+    finally:
+        server.stop()
+        shutil.rmtree(temp_dir)
+
+    assert stats["sent"] == 100 and not stats["failed"]
+    assert [r["value"] for r in received] == [float(i) for i in range(100)]
+    assert received[0] == {"timestamp": base.isoformat(), "sensor_id": "Sensor0", "value": 0.0, "unit": "unit"}
+
+
+def test_replay_follows_schedule_at_speed_multiplier():
+    temp_dir = tempfile.mkdtemp()
+    server = IngestServer(port=9018)
+    server.start()
+    try:
+        # 50 odczytów co 20 ms = ~1 s historii, odtwarzane 4x szybciej
+        base = datetime(2025, 5, 13, 12, 0)
+        logger = _write_logs(temp_dir, base, 50)
+        client = NetworkClient("127.0.0.1", 9018, window=16)
+        started = time.monotonic()
+        stats = Replayer(logger.read_logs(base, base + timedelta(hours=1)), client, speed=4).run()
+        elapsed = time.monotonic() - started
+        client.close()
+    finally:
+        server.stop()
+        shutil.rmtree(temp_dir)
+
+    assert stats["sent"] == 50
+    assert 0.2 <= elapsed < 1.0
+    assert stats["target_rate"] > 0 and stats["lag"]["max"] < 0.2
+
+
+def test_read_only_logger_leaves_log_dir_untouched():
+    temp_dir = tempfile.mkdtemp()
+    config_path = os.path.join(temp_dir, "config.json")
+    with open(config_path, "w") as f:
+        json.dump({"log_dir": temp_dir, "filename_pattern": "test_%Y%m%d.csv", "buffer_size": 10,
+                   "rollups": True, "servers": ["127.0.0.1:9024"]}, f)
+    base = datetime.now()
+    logger = Logger(config_path)
+    logger.start()
+    for i in range(20):
+        logger.log_reading("Sensor", base + timedelta(seconds=i), float(i), "unit")
+    logger.stop()
+    # indeksy .idx powstają przy zapisie leniwie - usuwamy je, żeby odczyt musiał je zbudować
+    for name in os.listdir(temp_dir):
+        if name.endswith(".idx"):
+            os.remove(os.path.join(temp_dir, name))
+    state_path = os.path.join(temp_dir, "rollups", "state.json")
+    with open(state_path) as f:
+        state = f.read()
+    before = sorted(os.path.relpath(os.path.join(root, name), temp_dir)
+                    for root, _, names in os.walk(temp_dir) for name in names)
+
+    source = Logger(config_path, read_only=True)
+    assert source.rollups is None and source.network_client is None
+    rows = list(source.read_logs(base - timedelta(minutes=1), base + timedelta(minutes=1)))
+    assert len(rows) == 20
+    with pytest.raises(RuntimeError):
+        source.start()
+    source.stop()
+    after = sorted(os.path.relpath(os.path.join(root, name), temp_dir)
+                   for root, _, names in os.walk(temp_dir) for name in names)
+    assert after == before
+    # stan agregatów nadal "czysty" - Logger piszący do log_dir nie musi ich odtwarzać
+    with open(state_path) as f:
+        assert f.read() == state
+    shutil.rmtree(temp_dir)
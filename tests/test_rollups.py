@@ -0,0 +1,90 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+
+from logger import Logger
+
+
+def make_logger(temp_dir):
+    config = {
+        "log_dir": temp_dir,
+        "filename_pattern": "test.csv",
+        "buffer_size": 10,
+        "rollups": True
+    }
+    config_path = os.path.join(temp_dir, "config.json")
+    with open(config_path, "w") as f:
+        json.dump(config, f)
+    return Logger(config_path)
+
+
+def log_hour(logger, base, offset, count):
+    # odczyty co 30 s; wartość = numer odczytu
+    for i in range(offset, offset + count):
+        logger.log_reading("Sensor-%d" % (i % 2), base + timedelta(seconds=30 * i), float(i), "unit")
+
+
+def expected(base, total, sensor, start, end):
+    values = [float(i) for i in range(total) if i % 2 == sensor
+              and start <= base + timedelta(seconds=30 * i) < end]
+    return len(values), sum(values), min(values), max(values), values[-1]
+
+
+def check(logger, base, total):
+    end = base + timedelta(hours=4)
+    for sensor in (0, 1):
+        hours = logger.query_rollups("Sensor-%d" % sensor, base, end, resolution=3600)
+        assert [bucket["start"] for bucket in hours] == [base + timedelta(hours=h) for h in range(len(hours))]
+        for bucket in hours:
+            count, total_sum, low, high, last = expected(base, total, sensor, bucket["start"],
+                                                         bucket["start"] + timedelta(hours=1))
+            assert (bucket["count"], bucket["sum"], bucket["min"], bucket["max"], bucket["last"]) == \
+                (count, total_sum, low, high, last)
+        minutes = logger.query_rollups("Sensor-%d" % sensor, base, end, resolution=60)
+        assert sum(bucket["count"] for bucket in minutes) == sum(bucket["count"] for bucket in hours)
+        assert all(bucket["count"] == 1 for bucket in minutes)
+
+
+def test_rollups_survive_clean_restart():
+    temp_dir = tempfile.mkdtemp()
+    # kubełki są wyrównane do UTC, a godzina lokalna może mieć przesunięcie niepełnogodzinne
+    base = datetime.fromtimestamp(1747137600)
+    try:
+        logger = make_logger(temp_dir)
+        logger.start()
+        log_hour(logger, base, 0, 150)
+        logger.stop()
+
+        # restart w środku kubełka: część zapisana przy stop() łączy się z resztą
+        logger = make_logger(temp_dir)
+        logger.start()
+        assert not logger.rollups.needs_rebuild
+        log_hour(logger, base, 150, 150)
+        check(logger, base, 300)
+        logger.stop()
+        check(logger, base, 300)
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def test_rollups_rebuilt_after_crash():
+    temp_dir = tempfile.mkdtemp()
+    base = datetime.fromtimestamp(1747137600)
+    try:
+        logger = make_logger(temp_dir)
+        logger.start()
+        log_hour(logger, base, 0, 250)
+        # awaria: surowe wiersze są na dysku, otwarte kubełki i stan agregatów nie
+        logger._flush_buffer()
+        logger.current_file.close()
+
+        logger = make_logger(temp_dir)
+        assert logger.rollups.needs_rebuild
+        logger.start()
+        log_hour(logger, base, 250, 50)
+        logger.stop()
+        check(logger, base, 300)
+    finally:
+        shutil.rmtree(temp_dir)
@@ -0,0 +1,76 @@
+import asyncio
+import time
+
+from scheduler import SensorScheduler
+
+
+class CountingSensor:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.samples = []
+
+    def sample(self, now):
+        self.samples.append(time.monotonic())
+        if self.delay:
+            time.sleep(self.delay)
+
+
+def test_scheduler_runs_each_sensor_at_its_own_rate():
+    scheduler = SensorScheduler()
+    fast, slow = CountingSensor(), CountingSensor()
+    scheduler.add(fast, 0.01)
+    scheduler.add(slow, 0.05)
+    scheduler.start()
+    time.sleep(0.5)
+    scheduler.stop()
+
+    assert 40 <= len(fast.samples) <= 52
+    assert 8 <= len(slow.samples) <= 11
+    stats = scheduler.stats()
+    assert stats["sensors"] == 2
+    assert stats["runs"] == len(fast.samples) + len(slow.samples)
+
+
+def test_slow_sensor_does_not_delay_others_in_thread_pool():
+    scheduler = SensorScheduler(dispatch="threads", workers=4)
+    fast, slow = CountingSensor(), CountingSensor(delay=0.2)
+    fast_job = scheduler.add(fast, 0.01)
+    slow_job = scheduler.add(slow, 0.01)
+    scheduler.start()
+    time.sleep(0.5)
+    scheduler.stop()
+
+    assert len(fast.samples) >= 40
+    assert fast_job.overruns == 0
+    # nowe odczyty wolnego czujnika są pomijane, dopóki poprzedni trwa
+    assert len(slow.samples) <= 3
+    assert slow_job.overruns > 0
+
+
+class AsyncSensor:
+    def __init__(self, delay):
+        self.delay = delay
+        self.samples = []
+
+    async def sample(self, now):
+        self.samples.append(time.monotonic())
+        await asyncio.sleep(self.delay)
+
+
+def test_asyncio_dispatch_awaits_async_sensors_concurrently():
+    scheduler = SensorScheduler(dispatch="asyncio", workers=1)
+    async_sensors = [AsyncSensor(delay=0.1) for _ in range(20)]
+    for sensor in async_sensors:
+        scheduler.add(sensor, 0.05)
+    blocking = CountingSensor(delay=0.2)
+    blocking_job = scheduler.add(blocking, 0.01)
+    scheduler.start()
+    time.sleep(0.5)
+    scheduler.stop()
+
+    # szeregowo 20 czujników po 0.1 s to 2 s na rundę; na pętli czekają jednocześnie,
+    # a blokujący czujnik w puli wątków ich nie wstrzymuje
+    assert all(len(sensor.samples) >= 3 for sensor in async_sensors)
+    assert len(blocking.samples) <= 3
+    assert blocking_job.overruns > 0
+    assert scheduler.stats()["errors"] == 0
@@ -0,0 +1,45 @@
+import time
+from datetime import datetime
+
+from PyQt6.QtCore import Qt
+
+from gui.sensor_model import ReadingCoalescer, SensorTableModel
+
+
+def reading(sensor_id, value, timestamp):
+    return {"sensor_id": sensor_id, "value": value, "unit": "°C",
+            "timestamp": datetime.fromtimestamp(timestamp).isoformat()}
+
+
+def test_model_emits_only_changed_cells():
+    now = time.time()
+    model = SensorTableModel()
+    coalescer = ReadingCoalescer()
+    changes = []
+    model.dataChanged.connect(lambda first, last, roles: changes.append(
+        (first.row(), first.column(), last.row(), last.column())))
+
+    coalescer.add_batch([reading("Sensor-%d" % i, float(i), now) for i in range(5)])
+    coalescer.add_batch([5, "x"])
+    assert coalescer.rejected == 2
+    assert model.apply(coalescer.drain())
+    model.refresh(now)
+    assert model.rowCount() == 5 and model.columnCount() == 6
+    assert model.data(model.index(2, 1), Qt.ItemDataRole.DisplayRole) == "2.0"
+    assert model.data(model.index(2, 4), Qt.ItemDataRole.DisplayRole) == "2.0"
+    assert changes == []
+
+    # kilka odczytów tego samego czujnika w jednej klatce - jedna zmiana komórki
+    coalescer.add(reading("Sensor-1", 10.0, now))
+    coalescer.add(reading("Sensor-1", 11.0, now))
+    coalescer.add(reading("Sensor-2", 2.0, now))
+    coalescer.add(reading("Sensor-3", 13.0, now))
+    assert not model.apply(coalescer.drain())
+    assert changes == [(1, 1, 1, 1), (3, 1, 3, 1)]
+    assert model.data(model.index(1, 1), Qt.ItemDataRole.DisplayRole) == "11.0"
+    # średnie odświeża dopiero refresh(), tutaj dla co drugiego wiersza
+    assert model.data(model.index(1, 4), Qt.ItemDataRole.DisplayRole) == "1.0"
+    changes.clear()
+    model.refresh(now, part=1, parts=2)
+    assert changes == [(1, 4, 1, 5), (3, 4, 3, 5)]
+    assert model.data(model.index(1, 4), Qt.ItemDataRole.DisplayRole) == "7.33"
@@ -1,3 +1,4 @@
+import pytest
 from sensors import TemperatureSensor
 from datetime import datetime
 
@@ -16,3 +17,57 @@ def test_temperature_sensor_callback_called(mocker):
     assert isinstance(called_args[1], datetime)
     assert isinstance(called_args[2], float)
     assert called_args[3] == "°C"
+
+
+def test_vectorized_generation_matches_scalar_rules():
+    import numpy as np
+    from sensors import AirQualitySensor, LightSensor, PressureSensor
+
+    timestamps, values = TemperatureSensor().generate(48, start=datetime(2023, 5, 1), step=3600)
+    expected = [TemperatureSensor().get_reading(ts.astype(datetime)) for ts in timestamps]
+    assert values.tolist() == expected
+
+    pressure = PressureSensor(seed=1).generate(10000)[1]
+    assert pressure.min() >= 986.8 and pressure.max() <= 1041.6
+    assert abs(pressure.mean() - 1017.8) < 1
+    assert np.array_equal(pressure, PressureSensor(seed=1).generate(10000)[1])
+
+    aqi = AirQualitySensor(seed=2).generate(10000)[1]
+    assert aqi.min() >= 11.1 and aqi.max() <= 29.9
+
+    light = LightSensor(seed=3).generate(24 * 100, start=datetime(2023, 5, 1), step=36)[1].reshape(24, 100)
+    assert ((light[6:18] >= 10000) | (light[6:18] == 107.0)).all()
+    assert ((light[4:6] >= 1.8) & (light[4:6] <= 10.8)).all()
+    assert (light[:4] <= 10).all() and (light[20:] <= 10).all()
+
+
+def test_batch_callback_receives_whole_batch(mocker):
+    sensor = TemperatureSensor()
+    batch_callback = mocker.Mock()
+    single_callback = mocker.Mock()
+    sensor.register_batch_callback(batch_callback)
+    sensor.register_callback(single_callback)
+
+    sensor.generate(1000, start=datetime(2023, 5, 1), step=1.0)
+
+    batch_callback.assert_called_once()
+    name, timestamps, values, unit = batch_callback.call_args[0]
+    assert name == "TemperatureSensor"
+    assert len(timestamps) == len(values) == 1000
+    assert unit == "°C"
+    # pojedyncze callbacki (np. Logger.log_and_send) dostają każdy odczyt paczki
+    assert single_callback.call_count == 1000
+    name, timestamp, value, unit = single_callback.call_args_list[1][0]
+    assert (name, timestamp, unit) == ("TemperatureSensor", datetime(2023, 5, 1, 0, 0, 1), "°C")
+    assert value == values[1] and isinstance(value, float)
+
+
+def test_sensor_without_sample_fails_at_instantiation():
+    from sensors import Sensor
+
+    class IncompleteSensor(Sensor):
+        def _generate(self, timestamps):
+            return timestamps
+
+    with pytest.raises(TypeError):
+        IncompleteSensor()
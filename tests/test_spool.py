@@ -0,0 +1,89 @@
+import os
+import time
+
+from network.client import NetworkClient
+from network.spool import Spool, SpoolSender
+from server.core import IngestServer
+
+
+def test_spool_survives_reopen_and_drops_consumed_segments(tmp_path):
+    spool = Spool(str(tmp_path), segment_bytes=200)
+    for i in range(20):
+        spool.append({"sensor_id": "Temp", "value": i})
+
+    records, offset = spool.read(spool.committed, limit=5)
+    assert [r["value"] for r in records] == [0, 1, 2, 3, 4]
+    spool.commit(offset)
+    segments_before = len(os.listdir(tmp_path))
+    spool.close()
+
+    # po ponownym otwarciu czytamy od potwierdzonej pozycji; niedokończony rekord jest obcinany
+    segments = sorted(name for name in os.listdir(tmp_path) if name.endswith(".log"))
+    with open(tmp_path / segments[-1], "ab") as f:
+        f.write(b'{"sensor_id": "Te')
+    spool = Spool(str(tmp_path), segment_bytes=200)
+    records, offset = spool.read(spool.committed, limit=100)
+    assert [r["value"] for r in records] == list(range(5, 20))
+
+    spool.commit(offset)
+    assert spool.backlog_bytes == 0
+    assert len(os.listdir(tmp_path)) < segments_before
+    spool.append({"sensor_id": "Temp", "value": 20})
+    assert [r["value"] for r in spool.read(spool.committed)[0]] == [20]
+    spool.close()
+
+
+def test_spool_sender_delivers_after_server_comes_up(tmp_path):
+    port = 9010
+    spool = Spool(str(tmp_path))
+    client = NetworkClient("127.0.0.1", port, timeout=1.0, retries=1, retry_delay=0)
+    sender = SpoolSender(spool, client, batch_size=10, initial_backoff=0.05, max_backoff=0.2)
+    sender.start()
+
+    # serwer jeszcze nie działa - dopisywanie nie blokuje, odczyty czekają na dysku
+    started = time.perf_counter()
+    for i in range(25):
+        spool.append({"sensor_id": "Temp", "value": i})
+    assert time.perf_counter() - started < 0.5
+    time.sleep(0.3)
+    assert sender.failures > 0
+
+    batches = []
+    server = IngestServer(port=port)
+    server.new_batch.connect(batches.append)
+    server.start()
+    try:
+        deadline = time.monotonic() + 5
+        while spool.backlog_bytes and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        sender.close()
+        server.stop()
+        spool.close()
+
+    assert spool.backlog_bytes == 0
+    assert [r["value"] for batch in batches for r in batch] == list(range(25))
+
+
+def test_spool_sender_commits_only_acknowledged_records(tmp_path):
+    import socket
+    from network.pool import ConnectionManager
+
+    # serwer przyjmuje połączenie, ale nigdy nie wysyła ACK
+    silent = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    silent.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    silent.bind(("127.0.0.1", 9022))
+    silent.listen(1)
+    spool = Spool(str(tmp_path / "spool"))
+    client = ConnectionManager([("127.0.0.1", 9022)], window=64, timeout=0.2)
+    sender = SpoolSender(spool, client, batch_size=10, initial_backoff=0.05, max_backoff=0.1)
+    try:
+        for i in range(5):
+            spool.append({"sensor_id": "Light", "value": i})
+        sender.start()
+        time.sleep(0.8)
+        assert sender.sent == 0 and spool.committed == 0
+    finally:
+        sender.close()
+        spool.close()
+        silent.close()
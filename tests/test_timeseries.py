@@ -0,0 +1,61 @@
+import random
+
+import numpy as np
+
+from aggregates import RollingWindow
+from timeseries import SeriesStore, TimeSeries
+
+
+def test_time_series_wraps_and_grows():
+    series = TimeSeries(retention=10, capacity=4)
+    for ts in range(6):
+        series.append(ts, ts * 10.0)
+    series.expire(now=13)
+    # zostają odczyty z [3, 13]: bufor się zawinął, ale kolejność jest zachowana
+    assert len(series) == 3
+    for ts in range(6, 12):
+        series.append(ts, ts * 10.0)
+    assert series.capacity == 16
+    timestamps, values = series.arrays()
+    assert timestamps.tolist() == list(range(3, 12))
+    assert values.tolist() == [ts * 10.0 for ts in range(3, 12)]
+    assert series.mean(3, now=11) == 95.0
+    assert series.percentile(50, 100, now=11) == 70.0
+
+
+def test_time_series_fixed_capacity_overwrites_oldest():
+    series = TimeSeries(retention=100, capacity=4, max_capacity=4)
+    for ts in range(10):
+        series.append(ts, float(ts))
+    assert series.values_between(series.start, series.end).tolist() == [6.0, 7.0, 8.0, 9.0]
+
+
+def test_series_store_query_window():
+    store = SeriesStore(retention=3600)
+    for i in range(100):
+        store.add("LightSensor", 1000.0 + i, float(i), "lux")
+    result = store.query("LightSensor", 9, now=1099.0, percentiles=(50, 99))
+    assert result["count"] == 10
+    assert result["unit"] == "lux"
+    assert (result["min"], result["max"], result["mean"]) == (90.0, 99.0, 94.5)
+    assert result["p50"] == 94.5
+    assert store.query("Missing", 10)["count"] == 0
+
+
+def test_rolling_window_matches_full_recompute():
+    rng = random.Random(7)
+    window = RollingWindow(50)
+    readings = []
+    now = 0.0
+    for _ in range(2000):
+        now += rng.random()
+        value = rng.gauss(0, 10)
+        window.add(now, value)
+        readings.append((now, value))
+        if rng.random() < 0.1:
+            window.expire(now)
+            expected = [v for ts, v in readings if ts >= now - 50]
+            assert window.count == len(expected)
+            assert np.isclose(window.mean, sum(expected) / len(expected))
+            assert window.min == min(expected)
+            assert window.max == max(expected)
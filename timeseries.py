@@ -0,0 +1,173 @@
+import time
+
+import numpy as np
+
+
+class TimeSeries:
+    # Bufor pierścieniowy odczytów jednego czujnika: znaczniki czasu (sekundy od
+    # epoki) i wartości w dwóch tablicach float64, jednostka zapisana raz.
+    # Pozycje są bezwzględne (start/end rosną cały czas), a w tablicy leżą
+    # pod indeksem pozycja % capacity.
+    def __init__(self, retention: float, unit: str = None, capacity: int = 1024, max_capacity: int = None):
+        self.retention = retention
+        self.unit = unit
+        self.max_capacity = max_capacity
+        self._timestamps = np.empty(capacity)
+        self._values = np.empty(capacity)
+        self.start = 0
+        self.end = 0
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    @property
+    def capacity(self) -> int:
+        return len(self._timestamps)
+
+    @property
+    def nbytes(self) -> int:
+        return self._timestamps.nbytes + self._values.nbytes
+
+    def append(self, timestamp: float, value: float) -> None:
+        if self.end - self.start == self.capacity:
+            if self.max_capacity and self.capacity >= self.max_capacity:
+                # pełny bufor o stałym rozmiarze - nadpisujemy najstarszy odczyt
+                self.start += 1
+            else:
+                self._grow()
+        pos = self.end % self.capacity
+        self._timestamps[pos] = timestamp
+        self._values[pos] = value
+        self.end += 1
+
+    def extend(self, timestamps, values) -> None:
+        for timestamp, value in zip(timestamps, values):
+            self.append(timestamp, value)
+
+    def expire(self, now: float = None) -> None:
+        now = time.time() if now is None else now
+        self.start = self.first_at_or_after(now - self.retention, self.start, self.end)
+
+    def first_at_or_after(self, cutoff: float, first: int, last: int) -> int:
+        # Pierwsza pozycja z [first, last) o znaczniku >= cutoff, w kolejności zapisu
+        # (jak przy zdejmowaniu z początku kolejki).
+        for seg_first, seg_start, seg_stop in self._segments(first, last):
+            newer = self._timestamps[seg_start:seg_stop] >= cutoff
+            if newer.any():
+                return seg_first + int(newer.argmax())
+        return last
+
+    def timestamps_between(self, first: int, last: int) -> np.ndarray:
+        return self._gather(self._timestamps, first, last)
+
+    def values_between(self, first: int, last: int) -> np.ndarray:
+        return self._gather(self._values, first, last)
+
+    def arrays(self):
+        return self.timestamps_between(self.start, self.end), self.values_between(self.start, self.end)
+
+    def window(self, seconds: float, now: float = None) -> np.ndarray:
+        now = time.time() if now is None else now
+        cutoff = now - seconds
+        parts = [self._values[a:b][self._timestamps[a:b] >= cutoff]
+                 for _, a, b in self._segments(self.start, self.end)]
+        if not parts:
+            return np.empty(0)
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def mean(self, seconds: float, now: float = None):
+        values = self.window(seconds, now)
+        return float(values.mean()) if len(values) else None
+
+    def min(self, seconds: float, now: float = None):
+        values = self.window(seconds, now)
+        return float(values.min()) if len(values) else None
+
+    def max(self, seconds: float, now: float = None):
+        values = self.window(seconds, now)
+        return float(values.max()) if len(values) else None
+
+    def percentile(self, q, seconds: float, now: float = None):
+        values = self.window(seconds, now)
+        return float(np.percentile(values, q)) if len(values) else None
+
+    def _segments(self, first: int, last: int):
+        # Zakres bezwzględny [first, last) jako co najwyżej dwa kawałki tablicy
+        if first >= last:
+            return []
+        cap = self.capacity
+        a = first % cap
+        n = last - first
+        if a + n <= cap:
+            return [(first, a, a + n)]
+        return [(first, a, cap), (first + cap - a, 0, a + n - cap)]
+
+    def _gather(self, array: np.ndarray, first: int, last: int) -> np.ndarray:
+        parts = [array[a:b] for _, a, b in self._segments(max(first, self.start), last)]
+        if not parts:
+            return np.empty(0)
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def _grow(self) -> None:
+        new_capacity = self.capacity * 2
+        if self.max_capacity:
+            new_capacity = min(new_capacity, self.max_capacity)
+        positions = np.arange(self.start, self.end)
+        timestamps = np.empty(new_capacity)
+        values = np.empty(new_capacity)
+        timestamps[positions % new_capacity] = self._timestamps[positions % self.capacity]
+        values[positions % new_capacity] = self._values[positions % self.capacity]
+        self._timestamps = timestamps
+        self._values = values
+
+
+class SeriesStore:
+    # Historia wszystkich czujników, niezależna od GUI (można jej używać w serwerze bez Qt)
+    def __init__(self, retention: float = 12 * 3600, capacity: int = 1024, max_capacity: int = None):
+        self.retention = retention
+        self.capacity = capacity
+        self.max_capacity = max_capacity
+        self._series = {}
+
+    def __contains__(self, sensor_id) -> bool:
+        return sensor_id in self._series
+
+    def sensors(self) -> list:
+        return list(self._series)
+
+    def series(self, sensor_id):
+        return self._series.get(sensor_id)
+
+    def get_or_create(self, sensor_id, unit: str = None) -> TimeSeries:
+        series = self._series.get(sensor_id)
+        if series is None:
+            series = self._series[sensor_id] = TimeSeries(
+                self.retention, unit, self.capacity, self.max_capacity)
+        elif unit is not None:
+            series.unit = unit
+        return series
+
+    def add(self, sensor_id, timestamp: float, value: float, unit: str = None) -> None:
+        self.get_or_create(sensor_id, unit).append(timestamp, value)
+
+    def expire(self, now: float = None) -> None:
+        now = time.time() if now is None else now
+        for series in self._series.values():
+            series.expire(now)
+
+    def query(self, sensor_id, seconds: float, now: float = None, percentiles=()) -> dict:
+        series = self._series.get(sensor_id)
+        values = series.window(seconds, now) if series else np.empty(0)
+        result = {
+            "count": len(values),
+            "unit": series.unit if series else None,
+            "mean": float(values.mean()) if len(values) else None,
+            "min": float(values.min()) if len(values) else None,
+            "max": float(values.max()) if len(values) else None,
+        }
+        for q in percentiles:
+            result[f"p{q}"] = float(np.percentile(values, q)) if len(values) else None
+        return result
+
+    def nbytes(self) -> int:
+        return sum(series.nbytes for series in self._series.values())